@@ -29,6 +29,8 @@ CFFI_CDEF = """
 
     extern struct TDigest *tdigest_new(unsigned int compression);
     extern void tdigest_add(struct TDigest *digest, double value, long long weight);
+    extern void tdigest_add_many(struct TDigest *digest, const double *values,
+                                 const long long *weights, size_t count);
     extern void tdigest_merge(struct TDigest *digest1, struct TDigest *digest2);
     extern double tdigest_cdf(struct TDigest *digest, double value);
     extern double tdigest_quantile(struct TDigest *digest, double quantile);
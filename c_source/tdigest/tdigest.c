@@ -181,6 +181,17 @@ void tdigest_add(struct TDigest *digest, double value, long long weight) {
         tdigest_compress(digest);
 }
 
+void tdigest_add_many(struct TDigest *digest, const double *values,
+                      const long long *weights, size_t count) {
+    size_t i;
+
+    for (i = 0; i < count; i++) {
+        if (isnan(values[i]))
+            continue;
+        tdigest_add(digest, values[i], weights == NULL ? 1 : weights[i]);
+    }
+}
+
 double tdigest_cdf(struct TDigest *digest, double value) {
     if (digest == NULL)
         return 0;
@@ -7,6 +7,8 @@
 #ifndef TDIGEST_H
 #define TDIGEST_H
 
+#include <stddef.h>
+
 struct Centroid {
     long long weight;
     double mean;
@@ -38,6 +40,8 @@ struct TDigest {
 
 extern struct TDigest *tdigest_new(unsigned int compression);
 extern void tdigest_add(struct TDigest *digest, double value, long long weight);
+extern void tdigest_add_many(struct TDigest *digest, const double *values,
+                             const long long *weights, size_t count);
 extern void tdigest_merge(struct TDigest *digest1, struct TDigest *digest2);
 extern double tdigest_cdf(struct TDigest *digest, double value);
 extern double tdigest_quantile(struct TDigest *digest, double quantile);
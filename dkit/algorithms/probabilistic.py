@@ -0,0 +1,375 @@
+# Copyright (c) 2026 Cobus Nel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Probabilistic data structures that use fixed memory:
+
+* BloomFilter and ScalableBloomFilter for set membership with a
+  configurable false positive rate;
+* HyperLogLog for cardinality estimates;
+* SpaceSaving for the most frequent items (heavy hitters).
+
+Items are hashed with xxh3 on the canonical encoding of the item
+(`dkit.data.hashing.encode_key`) so that items that compare equal, e.g.
+1, 1.0 and Decimal("1"), have the same hash. Items of types that can
+not be encoded are hashed on the `repr` of the item.
+
+>>> bf = ScalableBloomFilter(capacity=100)
+>>> bf.add(("a", 1))
+False
+>>> ("a", 1) in bf
+True
+>>> hll = HyperLogLog()
+>>> hll.update(range(1000))
+>>> 950 < hll.cardinality() < 1050
+True
+"""
+# =========== =============== =================================================
+# 19 Oct 2026 Cobus Nel       Created
+# 19 Oct 2026 Cobus Nel       Added SpaceSaving
+# =========== =============== =================================================
+import heapq
+import itertools
+import math
+import xxhash
+
+from dkit.data.hashing import encode_key
+
+__all__ = [
+    "BloomFilter",
+    "ScalableBloomFilter",
+    "HyperLogLog",
+    "SpaceSaving",
+]
+
+_MASK_64 = (1 << 64) - 1
+
+
+def _encode(item) -> bytes:
+    """canonical encoding of item, the repr of unsupported types"""
+    try:
+        return encode_key(item)
+    except TypeError:
+        return repr(item).encode()
+
+
+def _hash128(item) -> int:
+    """128 bit hash of item"""
+    return xxhash.xxh3_128_intdigest(_encode(item))
+
+
+class BloomFilter(object):
+    """
+    Bloom filter backed by a bytearray
+
+    Args:
+        * capacity: number of items expected
+        * error_rate: false positive rate at capacity
+    """
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+        if capacity <= 0:
+            raise ValueError("capacity must be larger than 0")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, int(math.ceil(
+            -capacity * math.log(error_rate) / (math.log(2) ** 2)
+        )))
+        self.n_hashes = max(1, int(round(self.n_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.n_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, h: int):
+        """bit positions of 128 bit hash h using double hashing"""
+        h1, h2 = h & _MASK_64, h >> 64
+        n_bits = self.n_bits
+        return [(h1 + i * h2) % n_bits for i in range(self.n_hashes)]
+
+    def _add_hash(self, h: int) -> bool:
+        bits = self.bits
+        present = True
+        for pos in self._positions(h):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                present = False
+                bits[byte] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+    def _contains_hash(self, h: int) -> bool:
+        bits = self.bits
+        for pos in self._positions(h):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def add(self, item) -> bool:
+        """
+        add item
+
+        Returns:
+            True if the item was (probably) present
+        """
+        return self._add_hash(_hash128(item))
+
+    def __contains__(self, item) -> bool:
+        return self._contains_hash(_hash128(item))
+
+    def __len__(self):
+        """number of items added"""
+        return self.count
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter(object):
+    """
+    Bloom filter that grow when capacity is reached
+
+    A new, larger, filter with a tighter error rate is added each time
+    the current filter is full so that the overall false positive rate
+    stay below error_rate.
+
+    Args:
+        * capacity: capacity of the first filter
+        * error_rate: overall false positive rate
+        * growth: capacity multiplier for each new filter
+        * tightening: error rate multiplier for each new filter
+    """
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001,
+                 growth: int = 2, tightening: float = 0.5):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+
+    def _grow(self):
+        n = len(self.filters)
+        self.filters.append(
+            BloomFilter(
+                self.capacity * self.growth ** n,
+                self.error_rate * (1 - self.tightening) * self.tightening ** n
+            )
+        )
+
+    def add(self, item) -> bool:
+        """
+        add item
+
+        Returns:
+            True if the item was (probably) present
+        """
+        h = _hash128(item)
+        filters = self.filters
+        for f in filters[:-1]:
+            if f._contains_hash(h):
+                return True
+        if not filters or filters[-1].full:
+            if filters and filters[-1]._contains_hash(h):
+                return True
+            self._grow()
+        return self.filters[-1]._add_hash(h)
+
+    def __contains__(self, item) -> bool:
+        h = _hash128(item)
+        return any(f._contains_hash(h) for f in reversed(self.filters))
+
+    def __len__(self):
+        """number of items added"""
+        return sum(len(f) for f in self.filters)
+
+
+class HyperLogLog(object):
+    """
+    HyperLogLog cardinality estimator
+
+    Standard error is about 1.04 / sqrt(2 ** precision), 0.8% for the
+    default precision of 14 (16 KB of registers).
+
+    Args:
+        * precision: number of index bits (4 to 18)
+    """
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError("precision must be between 4 and 18")
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(self.m)
+
+    def add(self, item):
+        """add item"""
+        x = xxhash.xxh3_64_intdigest(_encode(item))
+        p = self.precision
+        index = x >> (64 - p)
+        w = x & ((1 << (64 - p)) - 1)
+        rank = (64 - p) - w.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, items):
+        """add items from iterable"""
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        """merge registers of other (with the same precision) into this instance"""
+        if other.precision != self.precision:
+            raise ValueError("precision differ")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def cardinality(self) -> int:
+        """estimated number of distinct items"""
+        m = self.m
+        if m >= 128:
+            alpha = 0.7213 / (1 + 1.079 / m)
+        else:
+            alpha = {16: 0.673, 32: 0.697, 64: 0.709}[m]
+        estimate = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # linear counting for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.cardinality()
+
+
+class SpaceSaving(object):
+    """
+    Space-Saving heavy hitter sketch
+
+    Track at most capacity counters. When a new item arrive and all
+    counters are in use, the item with the lowest count is replaced and
+    the new item inherit its count (recorded as the error). Any item
+    with a frequency above n / capacity is guaranteed to be tracked.
+
+    The item with the lowest count is found with a min heap of
+    (count, item) entries. Entries are not updated when a count
+    increase, stale entries are re-inserted with the current count when
+    they reach the top of the heap so that eviction is O(log capacity)
+    amortised.
+
+    >>> s = SpaceSaving(3)
+    >>> for c in "aaaabbbcd":
+    ...     s.add(c)
+    >>> s.top(2)
+    [('a', 4), ('b', 3)]
+
+    Args:
+        * capacity: number of counters
+    """
+    def __init__(self, capacity: int = 100):
+        if capacity <= 0:
+            raise ValueError("capacity must be larger than 0")
+        self.capacity = capacity
+        self.counts = {}
+        self.errors = {}
+        self.n = 0
+        # (count, sequence, item), sequence break ties between items
+        # that can not be compared
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def _push(self, item, count):
+        heapq.heappush(self._heap, (count, next(self._sequence), item))
+
+    def _evict(self):
+        """remove and return the item with the lowest count and its count"""
+        counts = self.counts
+        heap = self._heap
+        while True:
+            count, _, item = heapq.heappop(heap)
+            current = counts[item]
+            if current == count:
+                del counts[item]
+                del self.errors[item]
+                return count
+            # stale entry
+            self._push(item, current)
+
+    def _rebuild(self):
+        self._heap = [
+            (count, next(self._sequence), item) for item, count in self.counts.items()
+        ]
+        heapq.heapify(self._heap)
+
+    def add(self, item, count: int = 1):
+        """add item"""
+        self.n += count
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+        elif len(counts) < self.capacity:
+            counts[item] = count
+            self.errors[item] = 0
+            self._push(item, count)
+        else:
+            minimum = self._evict()
+            counts[item] = minimum + count
+            self.errors[item] = minimum
+            self._push(item, minimum + count)
+
+    def update(self, items):
+        """add items from iterable"""
+        for item in items:
+            self.add(item)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        """
+        merge other sketch into this instance
+
+        Items missing from a full sketch are estimated with the minimum
+        count of that sketch.
+        """
+        min_self = min(self.counts.values()) if len(self.counts) >= self.capacity else 0
+        min_other = min(other.counts.values()) if len(other.counts) >= other.capacity else 0
+        counts, errors = {}, {}
+        for item in set(self.counts) | set(other.counts):
+            counts[item] = self.counts.get(item, min_self) + other.counts.get(item, min_other)
+            errors[item] = (
+                self.errors.get(item, min_self) + other.errors.get(item, min_other)
+            )
+        keep = sorted(counts, key=counts.get, reverse=True)[:self.capacity]
+        self.counts = {item: counts[item] for item in keep}
+        self.errors = {item: errors[item] for item in keep}
+        self.n += other.n
+        self._rebuild()
+        return self
+
+    def top(self, k: int):
+        """list of (item, count) for the k most frequent items"""
+        return heapq.nlargest(k, self.counts.items(), key=lambda x: x[1])
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state["_sequence"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._sequence = itertools.count(
+            max((entry[1] for entry in self._heap), default=-1) + 1
+        )
@@ -1,12 +1,63 @@
+import math
+import struct
+import sys
+from array import array
 from collections import namedtuple
-from tdigest._tdigest import lib as _lib
+from tdigest._tdigest import ffi as _ffi, lib as _lib
 DEFAULT_COMPRESSION = 400
 
+# magic, compression, min, max, number of centroids
+_HEADER = struct.Struct("<4sIddI")
+_MAGIC = b"TDG1"
+
 Centroid = namedtuple("Centroid", ("weight", "mean"))
 
 # Adapted from https://github.com/kpdemetriou/tdigest-cffi
 
 
+def _as_buffer(values, typecode):
+    """
+    contiguous buffer of values with typecode ('d' or 'q')
+
+    numpy arrays and array.array instances of the correct type are
+    used without copying.
+    """
+    try:
+        view = memoryview(values)
+    except TypeError:
+        return array(typecode, values)
+    compatible = view.format == typecode or (
+        typecode == "q" and view.format == "l" and view.itemsize == 8
+    )
+    if compatible and view.c_contiguous and view.ndim == 1:
+        return values
+    return array(typecode, values)
+
+
+def _add_many_c(digest, values, weights, count: int):
+    """add buffers of values and weights with tdigest_add_many"""
+    _lib.tdigest_add_many(
+        digest,
+        _ffi.from_buffer("double[]", values),
+        _ffi.from_buffer("long long[]", weights) if weights is not None else _ffi.NULL,
+        count
+    )
+
+
+def _add_many_python(digest, values, weights, count: int):
+    """add buffers of values and weights one at a time with tdigest_add"""
+    _weights = weights if weights is not None else [1] * count
+    for value, weight in zip(memoryview(values).cast("B").cast("d"), _weights):
+        if not math.isnan(value):
+            _lib.tdigest_add(digest, value, weight)
+
+
+# compiled libraries built before tdigest_add_many was added use the
+# python loop
+HAS_ADD_MANY = hasattr(_lib, "tdigest_add_many")
+_add_many = _add_many_c if HAS_ADD_MANY else _add_many_python
+
+
 class TDigest:
     """
     Tdigest implementation
@@ -75,6 +126,29 @@ class TDigest:
 
         _lib.tdigest_add(self._struct, value, weight)
 
+    def insert_many(self, values, weights=None):
+        """
+        insert a batch of values
+
+        values are passed to the C library as a buffer. NaN values are
+        ignored.
+
+        args:
+            * values: numpy float64 array, array('d') or iterable of numbers
+            * weights: optional integer weights for each value
+        """
+        values = _as_buffer(values, "d")
+        count = len(values)
+        if weights is not None:
+            weights = _as_buffer(weights, "q")
+            if len(weights) != count:
+                raise ValueError("'weights' must be the same length as 'values'")
+            if count and min(memoryview(weights).cast("B").cast("q")) <= 0:
+                raise ValueError("'weight' must larger than 0")
+        if count == 0:
+            return
+        _add_many(self._struct, values, weights, count)
+
     def median(self):
         return self.quantile(0.5)
 
@@ -128,6 +202,52 @@ class TDigest:
             "centroids": list(self.centroids())
         }
 
+    def to_bytes(self) -> bytes:
+        """
+        compact binary representation
+
+        a header followed by the centroid weights (int64) and
+        means (float64) in little endian byte order.
+        """
+        self._compress()
+        n = self._struct.centroid_count
+        weights = array("q", (self._struct.centroids[i].weight for i in range(n)))
+        means = array("d", (self._struct.centroids[i].mean for i in range(n)))
+        if sys.byteorder == "big":
+            weights.byteswap()
+            means.byteswap()
+        return _HEADER.pack(
+            _MAGIC, self._struct.compression, self._struct.min, self._struct.max, n
+        ) + weights.tobytes() + means.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "TDigest":
+        """rebuild from `to_bytes` representation"""
+        magic, compression, _min, _max, n = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("invalid TDigest data")
+        offset = _HEADER.size
+        weights = array("q")
+        weights.frombytes(data[offset:offset + 8 * n])
+        means = array("d")
+        means.frombytes(data[offset + 8 * n:offset + 16 * n])
+        if sys.byteorder == "big":
+            weights.byteswap()
+            means.byteswap()
+        new_digest = cls(compression)
+        new_digest.insert_many(means, weights)
+        new_digest._struct.min = _min
+        new_digest._struct.max = _max
+        return new_digest
+
+    def __reduce__(self):
+        """pickle support
+
+        ffi objects cannot be pickled, the digest is pickled as
+        the bytes created by `to_bytes`
+        """
+        return (self.__class__.from_bytes, (self.to_bytes(),))
+
     @classmethod
     def from_dict(cls, source):
         """rebuild from dictionary
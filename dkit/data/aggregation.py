@@ -24,14 +24,55 @@ dictionary like objects.abs
 
 Generators are employed to ensure aggregation is done without
 requiring the data to be loaded in Memory.
+
+Each target field is accumulated with the cheapest accumulator that
+provide all the aggregations requested for that field. E.g. Sum and
+Count only track sums while a t-digest is only maintained when Median,
+IQR or Quantile is requested.
+
+Columnar batches (pyarrow RecordBatch or Table, NumPy structured arrays
+or mappings of column arrays) are aggregated with a vectorised group-by
+that merge the per group results into the same accumulators:
+
+>>> import numpy as np
+>>> batch = {"k": np.array(["a", "b", "a"]), "v": np.array([1.0, 2.0, 3.0])}
+>>> a = Aggregate() + GroupBy("k") + Sum("v")
+>>> a.feed_batch(batch)
+>>> list(a.results())
+[{'k': 'a', 'sum_v': 4.0}, {'k': 'b', 'sum_v': 2.0}]
 """
+import glob
+import math
+import os
+import pickle
+import sys
+import tempfile
 from abc import ABC
 from collections import defaultdict
+from functools import partial
+from itertools import chain
 from operator import attrgetter, itemgetter
 from typing import List, Dict
 
-from .. import exceptions, messages
-from .stats import Accumulator
+import xxhash
+
+from .. import CHUNK_SIZE, exceptions, messages
+from ..utilities.cmd_helper import LazyLoad
+from .hashing import encode_key
+from .iteration import chunker
+from .manipulate import external_sort, iter_partials
+from .stats import (
+    AbstractAccumulator, Accumulator, CountAccumulator, DistinctAccumulator,
+    MomentAccumulator, SumAccumulator, TopKAccumulator
+)
+
+numpy = LazyLoad("numpy")
+
+# number of spill partitions when not specified
+SPILL_PARTITIONS = 8
+
+# maximum depth of recursive re-partitioning of spilled partitions
+MAX_SPILL_DEPTH = 8
 
 all = [
     "Aggregate",
@@ -45,21 +86,247 @@ all = [
     "Var",
     "Quantile",
     "Count",
+    "CountDistinct",
     "IQR",
+    "TopK",
 ]
 
 
+def _is_batch(obj) -> bool:
+    """True if obj is a columnar batch rather than a row"""
+    return hasattr(obj, "column_names") or hasattr(obj, "dtype")
+
+
+def _batch_columns(batch, names) -> Dict[str, object]:
+    """extract required columns from a batch"""
+    if hasattr(batch, "column_names"):
+        # pyarrow RecordBatch, arrays are converted when used
+        return {n: batch.column(n) for n in names}
+    return {n: numpy.asarray(batch[n]) for n in names}
+
+
+def _rows_to_columns(rows, names, keys=()) -> Dict[str, "numpy.ndarray"]:
+    """
+    transpose a list of rows to numpy column arrays
+
+    key columns are object arrays so that key values retain their type
+    """
+    columns = {}
+    for n in names:
+        values = [row[n] for row in rows]
+        if n in keys:
+            columns[n] = numpy.empty(len(values), dtype=object)
+            columns[n][:] = values
+        else:
+            columns[n] = numpy.asarray(values)
+    return columns
+
+
+def _first_appearance(codes, first):
+    """
+    renumber codes of sorted uniques in order of first appearance
+
+    Args:
+        * codes: code per row
+        * first: index of the first row of each code
+
+    Returns:
+        codes and the order of the sorted uniques
+    """
+    order = numpy.argsort(first, kind="stable")
+    rank = numpy.empty(len(order), dtype=numpy.intp)
+    rank[order] = numpy.arange(len(order))
+    return rank[codes.ravel()], order
+
+
+def _as_numpy(values) -> "numpy.ndarray":
+    """convert pyarrow arrays to numpy"""
+    if hasattr(values, "to_numpy"):
+        return values.to_numpy(zero_copy_only=False)
+    return values
+
+
+def _valid(values):
+    """boolean mask of non null values"""
+    if values.dtype.kind == "f":
+        return ~numpy.isnan(values)
+    if values.dtype.kind == "O":
+        return numpy.not_equal(values, None)
+    return numpy.ones(len(values), dtype=bool)
+
+
+def _factorize(values):
+    """integer codes and list of unique values in order of first appearance"""
+    if hasattr(values, "dictionary_encode"):
+        # pyarrow array
+        encoded = values.dictionary_encode(null_encoding="encode")
+        return (
+            encoded.indices.to_numpy(zero_copy_only=False).astype(numpy.intp),
+            encoded.dictionary.to_pylist()
+        )
+    if values.dtype.kind != "O":
+        uniques, first, codes = numpy.unique(
+            values, return_index=True, return_inverse=True
+        )
+        codes, order = _first_appearance(codes, first)
+        return codes, uniques[order].tolist()
+    index = {}
+    codes = numpy.fromiter(
+        (index.setdefault(v, len(index)) for v in values.tolist()),
+        dtype=numpy.intp,
+        count=len(values)
+    )
+    return codes, list(index)
+
+
+def _group_ids(key_columns, n_rows):
+    """
+    group id per row and list of key tuples per group id
+
+    group ids are assigned in order of first appearance
+    """
+    if len(key_columns) == 0:
+        return numpy.zeros(n_rows, dtype=numpy.intp), [()]
+    codes, uniques = zip(*[_factorize(column) for column in key_columns])
+    if len(codes) == 1:
+        return codes[0], [(u,) for u in uniques[0]]
+
+    # combine codes into one integer per row (mixed radix)
+    sizes = [len(u) for u in uniques]
+    if numpy.prod(sizes, dtype=float) < 2 ** 62:
+        combined = numpy.zeros(n_rows, dtype=numpy.int64)
+        for code, size in zip(codes, sizes):
+            combined = combined * size + code
+        distinct, first, group_ids = numpy.unique(
+            combined, return_index=True, return_inverse=True
+        )
+        group_ids, order = _first_appearance(group_ids, first)
+        distinct = distinct[order]
+        digits = []
+        for size in reversed(sizes):
+            distinct, digit = numpy.divmod(distinct, size)
+            digits.append(digit.tolist())
+        rows = zip(*reversed(digits))
+    else:
+        distinct, first, group_ids = numpy.unique(
+            numpy.stack(codes, axis=1), axis=0, return_index=True, return_inverse=True
+        )
+        group_ids, order = _first_appearance(group_ids, first)
+        rows = distinct[order].tolist()
+    keys = [
+        tuple(uniques[i][code] for i, code in enumerate(row))
+        for row in rows
+    ]
+    return group_ids.ravel(), keys
+
+
+def _key_hash(key, seed: int = 0) -> int:
+    """
+    hash of a group key that is stable across processes
+
+    keys that compare equal hash the same, keys that can not be encoded
+    canonically are hashed on their repr
+    """
+    try:
+        data = encode_key(key)
+    except TypeError:
+        data = repr(key).encode()
+    return xxhash.xxh3_64_intdigest(data, seed)
+
+
+def _merge_accumulators(accumulators, other):
+    """merge accumulators per target and key of other into accumulators"""
+    for target, other_accumulators in other.items():
+        mine = accumulators[target]
+        for key, accumulator in other_accumulators.items():
+            if key in mine:
+                mine[key].merge(accumulator)
+            else:
+                mine[key] = accumulator
+
+
+def _group_keys(accumulators) -> dict:
+    """union of the group keys of all targets, in order of appearance"""
+    keys = {}
+    for target_accumulators in accumulators.values():
+        keys.update(dict.fromkeys(target_accumulators))
+    return keys
+
+
+def _iter_spill_file(file_name):
+    """yield spilled partitions from a spill file"""
+    with open(file_name, "rb") as infile:
+        while True:
+            try:
+                yield pickle.load(infile)
+            except EOFError:
+                break
+
+
+def _factory_class(accumulator):
+    """accumulator class of a defaultdict of accumulators"""
+    factory = accumulator.default_factory
+    return factory.func if isinstance(factory, partial) else factory
+
+
+def _consume_groups(accumulator, keys, groups, counts, values):
+    """push the values of each group to the accumulator of the group"""
+    order = numpy.argsort(groups, kind="stable")
+    bounds = numpy.cumsum(counts).tolist()
+    s_values = values[order]
+    start = 0
+    for key, end in zip(keys, bounds):
+        group_accumulator = accumulator[key]
+        if end > start:
+            group_accumulator.push_many(s_values[start:end])
+        start = end
+
+
 class Aggregate(object):
     """
     aggregation control object
 
+    data can be an iterable of rows (dictionary like objects) or of columnar
+    batches (pyarrow RecordBatch or Table, NumPy structured arrays). Batches
+    are aggregated with a vectorised group-by. Null values (None or NaN)
+    are ignored by the vectorised group-by.
+
+    When processes > 0, chunks of the input are distributed to worker
+    processes that aggregate locally. The accumulators of the workers
+    are merged when the input is exhausted.
+
+    When max_groups > 0 and more groups than max_groups are held in
+    memory, the accumulators are partitioned by key hash and spilled to
+    temporary files. Worker processes spill to the same files. Partitions
+    are merged one at a time when results are produced, a partition with
+    more than max_groups groups is partitioned again.
+
     Args:
-        * data: iterator of dictionary like objects
+        * data: iterator of dictionary like objects or batches
+        * batch_size: transpose rows into batches of this size and
+          aggregate vectorised. 0 to accumulate row by row.
+        * processes: number of worker processes. 0 to aggregate in
+          the current process
+        * max_groups: memory budget in number of groups. 0 to keep all
+          groups in memory
+        * partitions: number of spill partitions. Partitions that exceed
+          max_groups are partitioned again in proportion to their size
     """
-    def __init__(self, data=None):
+    def __init__(self, data=None, batch_size: int = 0, processes: int = 0,
+                 max_groups: int = 0, partitions: int = SPILL_PARTITIONS):
         self.data = data
+        self.batch_size = batch_size
+        self.processes = processes
+        self.max_groups = max_groups
+        self.partitions = partitions
+        self._spill_dir: tempfile.TemporaryDirectory = None
+        # directory for spill files, shared with worker processes
+        self._spill_path: str = None
+        self._spilled = False
         self.groupby_keys: List[str] = []
-        self.accumulators: Dict[str, Accumulator] = {}
+        self.accumulators: Dict[str, Dict[tuple, AbstractAccumulator]] = {}
+        # field accumulated in each accumulator slot
+        self.sources: Dict[str, str] = {}
         self.aggregations: List["AbstractAggregation"] = []
         self.sorter: "OrderBy" = None
 
@@ -71,41 +338,337 @@ class Aggregate(object):
         other._modify(self)
         return self
 
+    def _template(self):
+        """
+        empty instance with the same keys, accumulators and spill
+        directory
+        """
+        template = Aggregate(
+            batch_size=self.batch_size,
+            max_groups=self.max_groups,
+            partitions=self.partitions
+        )
+        template._spill_path = self._spill_path
+        template.groupby_keys = list(self.groupby_keys)
+        template.sources = dict(self.sources)
+        template.accumulators = {
+            target: defaultdict(accumulator.default_factory)
+            for target, accumulator in self.accumulators.items()
+        }
+        return template
+
+    def _iter_chunks(self, data):
+        """
+        yield chunks for `_feed_data` in workers: each batch as a one item
+        list and rows as lists of rows
+        """
+        data = iter(data)
+        first = next(data, None)
+        if first is None:
+            return
+        data = chain([first], data)
+        if _is_batch(first):
+            for batch in data:
+                yield [batch]
+        else:
+            for chunk in chunker(data, self.batch_size or CHUNK_SIZE):
+                yield list(chunk)
+
+    def _feed_parallel(self, data):
+        if self.max_groups > 0:
+            # workers spill to the same directory
+            self._make_spill_dir()
+        partials = iter_partials(self._template(), self._iter_chunks(data), self.processes)
+        for partial in partials:
+            self._spilled = self._spilled or partial._spilled
+            self.merge(partial)
+            self._check_budget()
+
+    def merge(self, other: "Aggregate"):
+        """
+        merge the accumulators of another instance into this instance
+
+        Both instances must have the same group by keys and aggregations.
+        """
+        _merge_accumulators(self.accumulators, other.accumulators)
+        return self
+
+    @property
+    def n_groups(self) -> int:
+        """number of groups held in memory"""
+        return len(_group_keys(self.accumulators))
+
+    def _check_budget(self):
+        """spill accumulators to disk when the memory budget is exceeded"""
+        if self.max_groups > 0 and self.n_groups > self.max_groups:
+            self._spill()
+
+    def _make_spill_dir(self):
+        if self._spill_path is None:
+            self._spill_dir = tempfile.TemporaryDirectory(prefix="dk_agg_")
+            self._spill_path = self._spill_dir.name
+
+    def _spill(self):
+        """
+        partition accumulators by key hash and append each partition
+        to its spill file
+        """
+        self._make_spill_dir()
+        self._spilled = True
+        self._write_partitions(
+            self.accumulators,
+            [self._spill_file(str(i)) for i in range(self.partitions)]
+        )
+        for accumulators in self.accumulators.values():
+            accumulators.clear()
+
+    @staticmethod
+    def _write_partitions(accumulators, file_names, seed: int = 0):
+        """append accumulators partitioned by key hash to file_names"""
+        n = len(file_names)
+        partitions = [{target: {} for target in accumulators} for _ in range(n)]
+        slots = {}
+        for target, target_accumulators in accumulators.items():
+            for key, accumulator in target_accumulators.items():
+                slot = slots.get(key)
+                if slot is None:
+                    slot = slots[key] = _key_hash(key, seed) % n
+                partitions[slot][target][key] = accumulator
+        for file_name, partition in zip(file_names, partitions):
+            if any(len(v) for v in partition.values()):
+                with open(file_name, "ab") as outfile:
+                    pickle.dump(partition, outfile, pickle.HIGHEST_PROTOCOL)
+
+    def _spill_file(self, partition: str) -> str:
+        """spill file of partition for the current process"""
+        return os.path.join(self._spill_path, f"partition_{partition}_{os.getpid()}.pkl")
+
+    def _partition_files(self, partition: str) -> List[str]:
+        """spill files of partition written by all processes"""
+        return sorted(glob.glob(
+            os.path.join(self._spill_path, f"partition_{partition}_*.pkl")
+        ))
+
+    def _load_partition(self, file_names: List[str], depth: int):
+        """
+        merge the spilled accumulators in file_names
+
+        Returns:
+            merged instance, or None and the number of sub partitions
+            when more than max_groups groups are loaded. The number of
+            sub partitions is estimated from the size of the files.
+        """
+        merged = self._template()
+        total_size = sum(os.path.getsize(f) for f in file_names)
+        read_size = 0
+        for file_name in file_names:
+            with open(file_name, "rb") as infile:
+                while True:
+                    try:
+                        spilled = pickle.load(infile)
+                    except EOFError:
+                        break
+                    _merge_accumulators(merged.accumulators, spilled)
+                    if merged.n_groups > self.max_groups > 0 and depth < MAX_SPILL_DEPTH:
+                        fraction = (read_size + infile.tell()) / max(total_size, 1)
+                        return None, max(
+                            2, math.ceil(merged.n_groups / fraction / self.max_groups)
+                        )
+            read_size += os.path.getsize(file_name)
+        return merged, 0
+
+    def _iter_partition(self, partition: str, depth: int = 0):
+        """
+        merge the spilled accumulators of one partition and yield results
+
+        A partition with more than max_groups groups is partitioned again
+        with a different hash seed.
+        """
+        file_names = self._partition_files(partition)
+        merged, n = self._load_partition(file_names, depth)
+        if merged is None:
+            yield from self._split_partition(partition, file_names, n, depth)
+            return
+        for file_name in file_names:
+            os.remove(file_name)
+        yield from merged._iter_result(self.aggregations)
+
+    def _split_partition(self, partition: str, file_names: List[str], n: int, depth: int):
+        """partition spill files into n sub partitions and merge each"""
+        sub_partitions = [f"{partition}.{i}" for i in range(n)]
+        sub_files = [self._spill_file(p) for p in sub_partitions]
+        for file_name in file_names:
+            for spilled in _iter_spill_file(file_name):
+                self._write_partitions(spilled, sub_files, seed=depth + 1)
+            os.remove(file_name)
+        for sub_partition in sub_partitions:
+            yield from self._iter_partition(sub_partition, depth + 1)
+
+    def _iter_spilled(self):
+        """spill remaining accumulators and yield results per partition"""
+        self._spill()
+        try:
+            for i in range(self.partitions):
+                yield from self._iter_partition(str(i))
+        finally:
+            self._spill_dir.cleanup()
+            self._spill_dir = None
+            self._spill_path = None
+            self._spilled = False
+
     def _feed_data(self, data):
+        if self.processes > 0:
+            self._feed_parallel(data)
+            return
+        data = iter(data)
+        first = next(data, None)
+        if first is None:
+            return
+        data = chain([first], data)
+        if _is_batch(first):
+            for batch in data:
+                self.feed_batch(batch)
+        elif self.batch_size > 0:
+            for chunk in chunker(data, self.batch_size):
+                rows = list(chunk)
+                self._feed_columns(
+                    _rows_to_columns(rows, self.required_fields, self.groupby_keys),
+                    len(rows)
+                )
+                self._check_budget()
+        elif self.max_groups > 0:
+            for chunk in chunker(data, CHUNK_SIZE):
+                self._feed_rows(chunk)
+                self._check_budget()
+        else:
+            self._feed_rows(data)
+
+    def _feed_rows(self, data):
+        sources = [
+            (self.sources[slot], accumulator)
+            for slot, accumulator in self.accumulators.items()
+        ]
         for row in data:
             key = tuple(row[k] for k in self.groupby_keys)
-            for target, accumulator in self.accumulators.items():
-                accumulator[key].push(row[target])
+            for field, accumulator in sources:
+                accumulator[key].push(row[field])
+
+    def feed_batch(self, batch):
+        """
+        aggregate a columnar batch with a vectorised group-by
+
+        Args:
+            * batch: pyarrow RecordBatch or Table, NumPy structured array or
+              mapping of column names to arrays
+        """
+        if hasattr(batch, "to_batches"):
+            # pyarrow Table
+            for record_batch in batch.to_batches():
+                self.feed_batch(record_batch)
+            return
+        columns = _batch_columns(batch, self.required_fields)
+        n_rows = len(columns[self.required_fields[0]]) if columns else 0
+        if n_rows > 0:
+            self._feed_columns(columns, n_rows)
+            self._check_budget()
+
+    def _feed_columns(self, columns, n_rows):
+        group_ids, keys = _group_ids(
+            [columns[k] for k in self.groupby_keys], n_rows
+        )
+        n_groups = len(keys)
+        for slot, accumulator in self.accumulators.items():
+            factory = _factory_class(accumulator)
+            values = _as_numpy(columns[self.sources[slot]])
+            valid = _valid(values)
+            groups = group_ids[valid]
+            counts = numpy.bincount(groups, minlength=n_groups)
+            if not factory.numeric:
+                # sketches consume the values of each group
+                _consume_groups(accumulator, keys, groups, counts, values[valid])
+                continue
+            if factory.level == CountAccumulator.level:
+                for key, count in zip(keys, counts.tolist()):
+                    accumulator[key].merge_summary(count)
+                continue
+
+            values = numpy.asarray(values[valid], dtype=float)
+            if factory.level >= Accumulator.level:
+                # quantiles require the values of each group
+                _consume_groups(accumulator, keys, groups, counts, values)
+                continue
+
+            sums = numpy.bincount(groups, weights=values, minlength=n_groups)
+            mins = numpy.full(n_groups, sys.float_info.max)
+            maxs = numpy.full(n_groups, -sys.float_info.max)
+            numpy.minimum.at(mins, groups, values)
+            numpy.maximum.at(maxs, groups, values)
+            if factory.level >= MomentAccumulator.level:
+                means = sums / numpy.maximum(counts, 1)
+                m2 = numpy.bincount(
+                    groups, weights=(values - means[groups]) ** 2, minlength=n_groups
+                ).tolist()
+            else:
+                m2 = [0.0] * n_groups
+            summaries = zip(
+                keys, counts.tolist(), sums.tolist(), mins.tolist(), maxs.tolist(), m2
+            )
+            for key, *summary in summaries:
+                accumulator[key].merge_summary(*summary)
 
     @property
     def required_fields(self):
         """List of fields required by aggregator"""
-        return self.groupby_keys + list(self.accumulators.keys())
+        fields = list(self.groupby_keys)
+        for field in self.sources.values():
+            if field not in fields:
+                fields.append(field)
+        return fields
 
     @property
     def key_tuples(self):
         """list if key tuples"""
-        first_aggregator = next(iter(self.accumulators.values()))
-        return first_aggregator.keys()
+        return _group_keys(self.accumulators).keys()
 
-    def _iter_result(self):
+    def _iter_result(self, aggregations):
         for key_tuple in self.key_tuples:
             row = {k: key_tuple[i] for i, k in enumerate(self.groupby_keys)}
-            for aggregation in self.aggregations:
-                accumulator = self.accumulators[aggregation.target][key_tuple]
+            for aggregation in aggregations:
+                accumulator = self.accumulators[aggregation.slot][key_tuple]
                 row[aggregation.display_name] = aggregation.get_value(accumulator)
             yield(row)
 
     def __iter__(self):
         self._feed_data(self.data)
-        if self.sorter is not None:
+        yield from self.results()
+
+    def results(self):
+        """
+        yield aggregated rows for data fed so far
+
+        Spilled partitions are merged and the spill files removed.
+        Spilled results are ordered with an external sort.
+        """
+        spilled = self._spilled
+        if spilled:
+            rows = self._iter_spilled()
+        else:
+            rows = self._iter_result(self.aggregations)
+        if self.sorter is not None and spilled:
+            yield from external_sort(
+                rows,
+                key=self.sorter.sort_keys,
+                reverse=self.sorter.descending,
+                chunk_size=self.max_groups
+            )
+        elif self.sorter is not None:
             yield from sorted(
-                self._iter_result(),
+                rows,
                 key=self.sorter.sort_keys,
                 reverse=self.sorter.descending
             )
         else:
-            yield from self._iter_result()
+            yield from rows
 
     def __call__(self, data):
         self.data = data
@@ -158,6 +721,7 @@ class AbstractAggregation(AbstractModifier):
 
     function = "None"
     abbreviation = "none"
+    accumulator = Accumulator
 
     def __init__(self, target: str = ""):
         self.target: str = target
@@ -168,10 +732,24 @@ class AbstractAggregation(AbstractModifier):
         self.alias_name = alias
         return self
 
+    @property
+    def slot(self) -> str:
+        """
+        accumulator slot. Aggregations of a target share the slot and
+        the accumulator with the highest level is used.
+        """
+        return self.target
+
+    def _factory(self):
+        """accumulator factory"""
+        return self.accumulator
+
     def _modify(self, other: GroupBy):
-        # Add accumulator
-        if self.target not in other.accumulators:
-            other.accumulators[self.target] = defaultdict(lambda: Accumulator())
+        # Add accumulator or upgrade to one that support this aggregation
+        current = other.accumulators.get(self.slot)
+        if current is None or _factory_class(current).level < self.accumulator.level:
+            other.accumulators[self.slot] = defaultdict(self._factory())
+            other.sources[self.slot] = self.target
 
         # Add output
         other.aggregations.append(self)
@@ -184,7 +762,7 @@ class AbstractAggregation(AbstractModifier):
         else:
             return self.alias_name
 
-    def get_value(self, accumulator: Accumulator):
+    def get_value(self, accumulator: AbstractAccumulator):
         """
         return appropriate value from accumulator
         """
@@ -195,6 +773,7 @@ class Count(AbstractAggregation):
     """number of observations"""
     function = "observations"
     abbreviation = "count"
+    accumulator = CountAccumulator
 
 
 class IQR(AbstractAggregation):
@@ -207,12 +786,14 @@ class Max(AbstractAggregation):
     """maximum value"""
     function = "max"
     abbreviation = "max"
+    accumulator = SumAccumulator
 
 
 class Mean(AbstractAggregation):
     """minimum value"""
     function = "mean"
     abbreviation = "avg"
+    accumulator = MomentAccumulator
 
 
 class Median(AbstractAggregation):
@@ -225,24 +806,28 @@ class Min(AbstractAggregation):
     """minimum value"""
     function = "min"
     abbreviation = "min"
+    accumulator = SumAccumulator
 
 
 class Sum(AbstractAggregation):
     """sum of values"""
     function = "sum"
     abbreviation = "sum"
+    accumulator = SumAccumulator
 
 
 class Std(AbstractAggregation):
     """standard deviation"""
     function = "stdev"
     abbreviation = "std"
+    accumulator = MomentAccumulator
 
 
 class Var(AbstractAggregation):
     """variance"""
     function = "variance"
     abbreviation = "var"
+    accumulator = MomentAccumulator
 
 
 class Quantile(AbstractAggregation):
@@ -264,8 +849,57 @@ class Quantile(AbstractAggregation):
         return self.__display_name
 
 
+class CountDistinct(AbstractAggregation):
+    """approximate number of distinct values (HyperLogLog)"""
+    function = "distinct"
+    abbreviation = "distinct"
+    accumulator = DistinctAccumulator
+
+    @property
+    def slot(self):
+        return f"{self.target}:distinct"
+
+
+class TopK(AbstractAggregation):
+    """
+    approximate k most frequent values (Space-Saving)
+
+    The value is a list of (value, count) tuples.
+
+    args:
+        * target: field
+        * k: number of values
+        * capacity: number of counters maintained (default 10 * k)
+    """
+    function = "top"
+    abbreviation = "top"
+    accumulator = TopKAccumulator
+
+    def __init__(self, target, k: int = 10, capacity: int = None):
+        super().__init__(target)
+        self.k = k
+        self.capacity = capacity
+
+    @property
+    def slot(self):
+        return f"{self.target}:top{self.k}"
+
+    def _factory(self):
+        return partial(TopKAccumulator, capacity=self.capacity or max(100, 10 * self.k))
+
+    def get_value(self, accumulator):
+        return accumulator.top(self.k)
+
+    @property
+    def display_name(self):
+        if self.alias_name:
+            return self.alias_name
+        return f"{self.abbreviation}{self.k}_{self.target}"
+
+
 MAP_NON_PARAMETRIC_FUNCTIONS = {
     "count": Count,
+    "count_distinct": CountDistinct,
     "std": Std,
     "sum": Sum,
     "iqr": IQR,
@@ -274,6 +908,7 @@ MAP_NON_PARAMETRIC_FUNCTIONS = {
     "min": Min,
     "max": Max,
     "var": Var,
+    "top": TopK,
 }
 
 MAP_PARAMETRIC_FUNCTIONS = {
@@ -0,0 +1,181 @@
+# Copyright (c) 2026 Cobus Nel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Helpers for columnar batches used by vectorised evaluation of
+expressions and filters.
+
+A batch is a pyarrow RecordBatch or Table, a NumPy structured array or a
+mapping of column names to arrays (lists, NumPy or pyarrow arrays).
+Columns are returned as pyarrow arrays so that they can be used with
+`pyarrow.compute`.
+
+>>> batch = {"a": [1, 2, None]}
+>>> num_rows(batch)
+3
+>>> column(batch, "a").to_pylist()
+[1, 2, None]
+"""
+# =========== =============== =================================================
+# 19 Oct 2026 Cobus Nel       Created
+# =========== =============== =================================================
+from decimal import Decimal
+from typing import Dict, List
+
+from ..utilities.cmd_helper import LazyLoad
+
+pa = LazyLoad("pyarrow")
+pc = LazyLoad("pyarrow.compute")
+
+__all__ = [
+    "broadcast",
+    "column",
+    "column_path",
+    "from_columns",
+    "from_values",
+    "num_rows",
+    "to_arrow",
+    "to_rows",
+    "truthy",
+]
+
+
+def _is_arrow(batch) -> bool:
+    return hasattr(batch, "column_names")
+
+
+def _is_structured(batch) -> bool:
+    return hasattr(batch, "dtype") and batch.dtype.names is not None
+
+
+def to_arrow(batch):
+    """convert batch to a pyarrow RecordBatch or Table"""
+    if _is_arrow(batch):
+        return batch
+    if _is_structured(batch):
+        return pa.table({n: batch[n] for n in batch.dtype.names})
+    return pa.table({k: column(batch, k) for k in batch})
+
+
+def num_rows(batch) -> int:
+    """number of rows in batch"""
+    if _is_arrow(batch):
+        return batch.num_rows
+    if _is_structured(batch):
+        return len(batch)
+    for values in batch.values():
+        return len(values)
+    return 0
+
+
+def column(batch, name):
+    """
+    column of batch as a pyarrow array
+
+    Raises:
+        KeyError if the column does not exist
+    """
+    if _is_arrow(batch):
+        return batch.column(name)
+    if _is_structured(batch) and name not in batch.dtype.names:
+        raise KeyError(name)
+    values = batch[name]
+    if isinstance(values, (pa.Array, pa.ChunkedArray)):
+        return values
+    return pa.array(values)
+
+
+def column_path(batch, path: List[str]):
+    """
+    column of batch identified by path, nested names are resolved as
+    struct fields
+    """
+    values = column(batch, path[0])
+    if len(path) > 1:
+        values = pc.struct_field(values, path[1:])
+    return values
+
+
+def to_rows(batch) -> List[Dict]:
+    """convert batch to a list of dictionaries"""
+    return to_arrow(batch).to_pylist()
+
+
+def broadcast(value, n: int):
+    """repeat a scalar result n times, arrays are returned as is"""
+    if isinstance(value, pa.Scalar):
+        return pa.repeat(value, n)
+    if not isinstance(value, (pa.Array, pa.ChunkedArray)):
+        return pa.repeat(pa.scalar(value), n)
+    return value
+
+
+def truthy(values):
+    """
+    boolean mask of values that evaluate to True (nulls are False)
+
+    >>> truthy(pa.array([0, 1, None])).to_pylist()
+    [False, True, False]
+    """
+    kind = values.type
+    if pa.types.is_boolean(kind):
+        mask = values
+    elif pa.types.is_integer(kind) or pa.types.is_floating(kind):
+        mask = pc.not_equal(values, 0)
+    elif pa.types.is_string(kind) or pa.types.is_large_string(kind):
+        mask = pc.greater(pc.utf8_length(values), 0)
+    elif pa.types.is_null(kind):
+        mask = pa.repeat(pa.scalar(False), len(values))
+    else:
+        mask = pa.array([bool(v) for v in values.to_pylist()], pa.bool_())
+    return pc.fill_null(mask, False)
+
+
+def from_columns(columns: Dict, like=None):
+    """
+    create a batch from a mapping of column names to pyarrow arrays
+
+    A RecordBatch is returned when like is a RecordBatch, otherwise
+    a Table.
+    """
+    if isinstance(like, pa.RecordBatch) \
+            and all(isinstance(v, pa.Array) for v in columns.values()):
+        return pa.RecordBatch.from_pydict(columns)
+    return pa.table(columns)
+
+
+def from_values(values: List):
+    """
+    create a pyarrow array from a list of python values
+
+    Integers outside the int64 range are stored as decimals so that
+    they are exact.
+
+    >>> from_values([2 ** 64, None]).to_pylist()
+    [Decimal('18446744073709551616'), None]
+    """
+    try:
+        return pa.array(values)
+    except OverflowError:
+        if not all(v is None or isinstance(v, int) for v in values):
+            raise
+        return pa.array(
+            [None if v is None else Decimal(v) for v in values],
+            pa.decimal256(76, 0)
+        )
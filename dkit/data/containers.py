@@ -4,6 +4,7 @@ import collections.abc
 import os
 import pickle
 import shelve
+import sqlite3
 from _pickle import Pickler, Unpickler, dumps, loads
 from io import BytesIO
 from tempfile import NamedTemporaryFile
@@ -30,6 +31,7 @@ __all__ = [
     "OrderedSet",
     "RangeCounter",
     "ReusableStack",
+    "SQLiteMultiMap",
     "SortedCollection",
 ]
 
@@ -728,6 +730,134 @@ class JSONShelve(collections.abc.MutableMapping):
         return True
 
 
+class SQLiteMultiMap(collections.abc.MutableMapping):
+    """
+    SQLite backed multimap that map a key to a list of values
+
+    Values are appended with `append` and written in batches. Value
+    lists are never re-written, each value is stored as a row. Reads
+    are served from a LRU cache of `cache_size` keys.
+
+    Keys and values must be picklable. Keys are compared by `repr`.
+
+    Values in an existing file are removed when it is opened unless
+    reuse is True.
+
+    usage:
+
+        with SQLiteMultiMap("index.sqlite") as db:
+            db.append(("a", 1), {"value": 1})
+            db[("a", 1)]
+
+    Args:
+        - file_name: database file (":memory:" for an in memory database)
+        - batch_size: number of values buffered before writing
+        - cache_size: number of keys in the read cache
+        - reuse: keep values stored in an existing file
+    """
+    def __init__(self, file_name: str = ":memory:", batch_size: int = 10_000,
+                 cache_size: int = 1024, reuse: bool = False):
+        self.file_name = file_name
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(file_name)
+        self.conn.execute("PRAGMA journal_mode=OFF")
+        self.conn.execute("PRAGMA synchronous=OFF")
+        if not reuse:
+            self.conn.execute("DROP TABLE IF EXISTS multimap")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS multimap "
+            "(id INTEGER PRIMARY KEY, key TEXT, key_obj BLOB, value BLOB)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS multimap_key ON multimap(key)")
+        self._buffer = []
+        self._cache = SizedMap(cache_size)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+    def append(self, key, value):
+        """append value to the list of values for key"""
+        k = repr(key)
+        self._buffer.append(
+            (k, pickle.dumps(key, pickle.HIGHEST_PROTOCOL),
+             pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        )
+        self._cache.pop(k, None)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """write buffered values"""
+        if self._buffer:
+            self.conn.executemany(
+                "INSERT INTO multimap (key, key_obj, value) VALUES (?, ?, ?)",
+                self._buffer
+            )
+            self.conn.commit()
+            self._buffer = []
+
+    def __getitem__(self, key):
+        k = repr(key)
+        if k in self._cache:
+            self._cache.move_to_end(k)
+            return self._cache[k]
+        self.flush()
+        values = [
+            pickle.loads(r[0]) for r in
+            self.conn.execute("SELECT value FROM multimap WHERE key=? ORDER BY id", (k,))
+        ]
+        if not values:
+            raise KeyError(key)
+        self._cache[k] = values
+        return values
+
+    def __setitem__(self, key, values):
+        self.flush()
+        self.conn.execute("DELETE FROM multimap WHERE key=?", (repr(key),))
+        for value in values:
+            self.append(key, value)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._cache.pop(repr(key), None)
+        self.conn.execute("DELETE FROM multimap WHERE key=?", (repr(key),))
+        self.conn.commit()
+
+    def __contains__(self, key):
+        self.flush()
+        row = self.conn.execute(
+            "SELECT 1 FROM multimap WHERE key=? LIMIT 1", (repr(key),)
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        self.flush()
+        cursor = self.conn.execute(
+            "SELECT key_obj FROM multimap GROUP BY key ORDER BY min(id)"
+        )
+        return (pickle.loads(r[0]) for r in cursor)
+
+    def __len__(self):
+        self.flush()
+        return self.conn.execute("SELECT count(DISTINCT key) FROM multimap").fetchone()[0]
+
+    def clear(self):
+        """remove all keys and values"""
+        self._buffer = []
+        self._cache.clear()
+        self.conn.execute("DELETE FROM multimap")
+        self.conn.commit()
+
+    def close(self):
+        """flush and close"""
+        self.flush()
+        self.conn.close()
+
+
 class OrderedSet(collections.abc.MutableSet):
     """
     OrderedSet: Behave like a set but items are ordered
@@ -21,35 +21,144 @@
 """
 Utilities to assist with identifying differences between two similar
 datasets
+
+When huge is True, both datasets are partitioned by an xxhash of the
+canonical encoding of the key into temporary files. Each pair of partitions is compared in memory,
+optionally in a pool of worker processes, so that the memory required is
+bounded by the size of a partition.
 """
-from dkit.utilities.file_helper import temp_filename
-from dkit.data.helpers import md5_obj_hash
+import os
+import pickle
+import tempfile
+from multiprocessing import Pool
+
+import xxhash
+
 from dkit import messages
+from dkit.data.hashing import encode_key, get_hasher
 from .. import NA_VALUE
-import shelve
+
+# rows pickled per block in partition files
+BLOCK_SIZE = 1000
+
+
+def _encode(key) -> bytes:
+    """canonical encoding of key, equal keys of different types encode the same"""
+    try:
+        return encode_key(key)
+    except TypeError:
+        return repr(key).encode()
+
+
+class _PartitionedRows(object):
+    """
+    (key, row) pairs partitioned by key hash into files in directory
+
+    Args:
+        * directory: directory for partition files
+        * prefix: file name prefix
+        * n: number of partitions
+    """
+    def __init__(self, directory: str, prefix: str, n: int):
+        self.n = n
+        self.paths = [os.path.join(directory, f"{prefix}_{i}.pkl") for i in range(n)]
+
+    def write(self, pairs):
+        """write iterable of (key, row) pairs"""
+        n = self.n
+        files = [open(path, "wb") for path in self.paths]
+        buffers = [[] for _ in range(n)]
+        try:
+            for key, row in pairs:
+                i = xxhash.xxh3_64_intdigest(_encode(key)) % n
+                buffer = buffers[i]
+                buffer.append((key, row))
+                if len(buffer) >= BLOCK_SIZE:
+                    pickle.dump(buffer, files[i], pickle.HIGHEST_PROTOCOL)
+                    buffers[i] = []
+            for buffer, f in zip(buffers, files):
+                if buffer:
+                    pickle.dump(buffer, f, pickle.HIGHEST_PROTOCOL)
+        finally:
+            for f in files:
+                f.close()
+
+
+def _read_partition(path):
+    """yield (key, row) pairs from partition file"""
+    with open(path, "rb") as infile:
+        while True:
+            try:
+                yield from pickle.load(infile)
+            except EOFError:
+                break
+
+
+def _is_modified(a, b, fields) -> bool:
+    if fields:
+        return any(a[field] != b[field] for field in fields)
+    return a != b
+
+
+def _diff_partition(args):
+    """
+    compare one pair of partitions
+
+    Args:
+        * args: tuple of (path a, path b, mode, fields) where mode is
+          one of added, deleted or modified
+
+    Returns:
+        list of rows (added, deleted) or (key, a, b) tuples (modified)
+    """
+    path_a, path_b, mode, fields = args
+    rows_a = dict(_read_partition(path_a))
+    retval = []
+    if mode == "deleted":
+        keys_b = set(k for k, _ in _read_partition(path_b))
+        retval = [row for k, row in rows_a.items() if k not in keys_b]
+    elif mode == "added":
+        rows_b = dict(_read_partition(path_b))
+        retval = [row for k, row in rows_b.items() if k not in rows_a]
+    else:
+        rows_b = dict(_read_partition(path_b))
+        for k, b in rows_b.items():
+            a = rows_a.get(k)
+            if a is not None and _is_modified(a, b, fields):
+                retval.append((k, a, b))
+    return retval
 
 
 class Compare(object):
+    """
+    Compare two datasets
 
-    def __init__(self, a, b, keys=None, huge=False):
+    Args:
+        * a: iterable of rows (dictionaries)
+        * b: iterable of rows (dictionaries)
+        * keys: list of key fields. Rows are compared on all fields
+          when not specified
+        * huge: partition data to disk for datasets that do not fit
+          in memory
+        * partitions: number of partitions used when huge is True
+        * processes: number of worker processes used to compare
+          partitions. 0 to compare in the current process
+    """
+    def __init__(self, a, b, keys=None, huge=False, partitions=64, processes=0):
         self.a = a
         self.b = b
         self.keys = keys
         self.huge = huge
+        self.partitions = partitions
+        self.processes = processes
         self.__processed = False
-        if huge:
-            self.db_a = shelve.open(str(temp_filename()))
-            self.db_b = shelve.open(str(temp_filename()))
-        else:
-            self.db_a = {}
-            self.db_b = {}
+        self.__tmp_dir = None
+        self.db_a = {}
+        self.db_b = {}
 
     def __del__(self):
-        if self.huge:
-            self.db_a.clear()
-            self.db_a.close()
-            self.db_b.clear()
-            self.db_b.close()
+        if self.__tmp_dir is not None:
+            self.__tmp_dir.cleanup()
 
     def __build_indexes(self):
         """Build indexes.
@@ -57,8 +166,15 @@ class Compare(object):
         Index status is saved and will only be done once
         """
         if not self.__processed:
-            self.db_a.update(self.__index(self.a))
-            self.db_b.update(self.__index(self.b))
+            if self.huge:
+                self.__tmp_dir = tempfile.TemporaryDirectory(prefix="dk_diff_")
+                self.db_a = _PartitionedRows(self.__tmp_dir.name, "a", self.partitions)
+                self.db_b = _PartitionedRows(self.__tmp_dir.name, "b", self.partitions)
+                self.db_a.write(self.__index(self.a))
+                self.db_b.write(self.__index(self.b))
+            else:
+                self.db_a.update(self.__index(self.a))
+                self.db_b.update(self.__index(self.b))
         self.__processed = True
 
     def __index(self, rows):
@@ -68,63 +184,65 @@ class Compare(object):
             """returns index as tuple of key values"""
             return tuple(row[k] for k in keys)
 
-        def keymap_str(row):
-            """returns index as md5 hash of bencode of key values"""
-            return md5_obj_hash(tuple(row[k] for k in keys))
-
         if self.keys:
-            # keys are specified
-            if self.huge:
-                # Assume database is a shelve that require string keys
-                kf = keymap_str
-            else:
-                # database is a normal dict (can have any key)
-                kf = keymap
+            kf = keymap
         else:
-            # no keys use hash of bencode of row
-            kf = md5_obj_hash
+            # no keys use canonical hash of row
+            kf = get_hasher(algorithm="xxh3_128")
 
         for row in rows:
             yield (kf(row), row)
 
+    def __iter_partitions(self, mode, fields=()):
+        """yield results of diff for each partition"""
+        tasks = [
+            (self.db_a.paths[i], self.db_b.paths[i], mode, fields)
+            for i in range(self.partitions)
+        ]
+        if self.processes > 0:
+            with Pool(self.processes) as pool:
+                for result in pool.imap(_diff_partition, tasks):
+                    yield from result
+        else:
+            for task in tasks:
+                yield from _diff_partition(task)
+
     def added(self):
         """
         yields rows that are in set b but not set a
         """
         self.__build_indexes()
-        for kb in self.db_b.keys():
-            if kb not in self.db_a:
-                yield self.db_b[kb]
+        if self.huge:
+            yield from self.__iter_partitions("added")
+        else:
+            for kb in self.db_b.keys():
+                if kb not in self.db_a:
+                    yield self.db_b[kb]
 
     def deleted(self):
         """
         yields rows that are in set a but not set b
         """
         self.__build_indexes()
-        for ka in self.db_a.keys():
-            if ka not in self.db_b:
-                yield self.db_a[ka]
+        if self.huge:
+            yield from self.__iter_partitions("deleted")
+        else:
+            for ka in self.db_a.keys():
+                if ka not in self.db_b:
+                    yield self.db_a[ka]
 
     def __modified(self, fields):
         """yields modified rows"""
-        db_a = self.db_a                    # optimize lookup
-        if len(fields) > 0:
-            for k, b in self.db_b.items():
-                try:
-                    a = db_a[k]
-                except KeyError:
-                    continue
-                if any([a[field] != b[field] for field in fields]):
-                    yield (k, a, b)
+        if self.huge:
+            yield from self.__iter_partitions("modified", fields)
         else:
+            db_a = self.db_a                    # optimize lookup
             for k, b in self.db_b.items():
                 try:
                     a = db_a[k]
                 except KeyError:
                     continue
-                a_hash = md5_obj_hash(a)
-                b_hash = md5_obj_hash(b)
-                if a_hash != b_hash:
+                if _is_modified(a, b, fields):
                     yield (k, a, b)
 
     def deltas(self, *fields):
@@ -24,11 +24,16 @@ DATE        NAME            COMMENT
 2017        Cobus Nel       Initial version
 Jan 2018    Cobus Nel       Updated
 Jun 2018    Cobus Nel       Updated for revised infix_parser class
+19 Oct 2026 Cobus Nel       Vectorised evaluation of columnar batches
+19 Oct 2026 Cobus Nel       Compiled Proxy tests
 =========== =============== =================================================
 """
+from ..exceptions import DKitDataException
 from ..parsers import infix_parser
+from . import columnar
 import operator as op
 import re
+from functools import lru_cache
 from typing import List
 
 
@@ -108,18 +113,95 @@ class ExpressionFilter(infix_parser.ExpressionParser):
     Create filter with string expression.
 
     This class is designed to be used with the python filter function.
+    Columnar batches are filtered with `mask` or `filter_batch`:
+
+    >>> f = ExpressionFilter("${age} > 30")
+    >>> f.filter_batch({"age": [20, 40]}).to_pylist()
+    [{'age': 40}]
     """
-    pass
+
+    def mask(self, batch):
+        """boolean mask of rows in batch that pass the filter"""
+        return columnar.truthy(self.eval_batch(batch))
+
+    def filter_batch(self, batch):
+        """rows in batch that pass the filter (pyarrow Table or RecordBatch)"""
+        return columnar.to_arrow(batch).filter(self.mask(batch))
 
 
 #
 # The remainder of the file is dedicated to the Proxy filter
 #
+@lru_cache(maxsize=1024)
+def _compile_source(source: str):
+    """compile generated source (cached)"""
+    return compile(source, "<proxy filter>", "exec")
+
+
+# python equivalent of comparisons
+_PY_COMPARISONS = {
+    op.eq: "==",
+    op.ne: "!=",
+    op.lt: "<",
+    op.gt: ">",
+    op.le: "<=",
+    op.ge: ">=",
+}
+
+
 class _Comparison(object):
     """
     Abstract class that provide common methods
     """
 
+    def _generate(self, add_name) -> str:
+        """
+        python source for the test, objects referenced by the source
+        are registered with add_name
+        """
+        return f"{add_name(self)}(row)"
+
+    def compile(self):
+        """
+        compile the test to a single python function
+
+        Returns:
+            callable that test a row
+        """
+        namespace = {}
+
+        def add_name(obj):
+            name = f"_c{len(namespace)}"
+            namespace[name] = obj
+            return name
+
+        source = f"def _test(row):\n    return {self._generate(add_name)}\n"
+        exec(_compile_source(source), namespace)
+        return namespace["_test"]
+
+    def to_arrow(self):
+        """
+        convert the test to a pyarrow.compute.Expression, e.g. to
+        filter a pyarrow dataset
+        """
+        raise DKitDataException(
+            f"{self.__class__.__name__} cannot be converted to an arrow expression"
+        )
+
+    def mask(self, batch):
+        """
+        boolean mask of rows in a columnar batch that pass the test
+
+        Args:
+            batch: pyarrow RecordBatch or Table, NumPy structured array
+                or mapping of column names to arrays
+        """
+        raise NotImplementedError  # pragma: no cover
+
+    def filter_batch(self, batch):
+        """rows in batch that pass the test (pyarrow Table or RecordBatch)"""
+        return columnar.to_arrow(batch).filter(self.mask(batch))
+
     def __and__(self, other):
         return _BinaryLogicalComparison(self, other, op.and_)
 
@@ -139,6 +221,26 @@ class _BinaryLogicalComparison(_Comparison):
     def __call__(self, data):
         return self.operand(self.left(data), self.right(data))
 
+    def mask(self, batch):
+        kernel = columnar.pc.and_ if self.operand is op.and_ else columnar.pc.or_
+        return kernel(self.left.mask(batch), self.right.mask(batch))
+
+    def _generate(self, add_name):
+        left = self.left._generate(add_name)
+        right = self.right._generate(add_name)
+        if self.operand is op.and_:
+            return f"({left} and {right})"
+        elif self.operand is op.or_:
+            return f"({left} or {right})"
+        return f"{add_name(self.operand)}({left}, {right})"
+
+    def to_arrow(self):
+        if self.operand is op.and_:
+            return self.left.to_arrow() & self.right.to_arrow()
+        elif self.operand is op.or_:
+            return self.left.to_arrow() | self.right.to_arrow()
+        return super().to_arrow()
+
 
 class _UnaryLogicalComparison(_Comparison):
     """
@@ -151,6 +253,19 @@ class _UnaryLogicalComparison(_Comparison):
     def __call__(self, data):
         return self.operand(self.instance(data))
 
+    def mask(self, batch):
+        return columnar.pc.invert(self.instance.mask(batch))
+
+    def _generate(self, add_name):
+        if self.operand is op.not_:
+            return f"(not {self.instance._generate(add_name)})"
+        return f"{add_name(self.operand)}({self.instance._generate(add_name)})"
+
+    def to_arrow(self):
+        if self.operand is op.not_:
+            return ~self.instance.to_arrow()
+        return super().to_arrow()
+
 
 class _BinaryTest(_Comparison):
     """
@@ -170,6 +285,54 @@ class _BinaryTest(_Comparison):
     def __invert__(self):
         return _UnaryLogicalComparison(self, op.not_)
 
+    def mask(self, batch):
+        values = columnar.column_path(batch, self.path)
+        kernel = _VECTOR_TESTS.get(getattr(self.comparison, "__func__", self.comparison))
+        if kernel is not None:
+            try:
+                return columnar.pc.fill_null(kernel(values, self.left), False)
+            except (columnar.pa.ArrowException, TypeError):
+                pass
+        # evaluate row by row
+        comparison, left = self.comparison, self.left
+        return columnar.pa.array(
+            [bool(comparison(v, left)) for v in values.to_pylist()],
+            columnar.pa.bool_()
+        )
+
+    def _generate(self, add_name):
+        value = "row" + "".join(
+            f"[{node!r}]" if isinstance(node, (str, int)) else f"[{add_name(node)}]"
+            for node in self.path
+        )
+        comparison = getattr(self.comparison, "__func__", self.comparison)
+        other = add_name(self.left)
+        if comparison in _PY_COMPARISONS:
+            return f"({value} {_PY_COMPARISONS[comparison]} {other})"
+        elif comparison is _BinaryTest.isin.__func__:
+            return f"({value} in {other})"
+        elif comparison is _BinaryTest.match.__func__:
+            return f"bool({other}.match({value}))"
+        elif comparison is _BinaryTest.search.__func__:
+            return f"bool({other}.search({value}))"
+        elif comparison is _BinaryTest.filter.__func__:
+            return f"{other}({value})"
+        return f"{add_name(self.comparison)}({value}, {other})"
+
+    def to_arrow(self):
+        pc = columnar.pc
+        field = pc.field(*self.path)
+        comparison = getattr(self.comparison, "__func__", self.comparison)
+        if comparison in _PY_COMPARISONS:
+            return comparison(field, self.left)
+        elif comparison is _BinaryTest.isin.__func__:
+            return field.isin(list(self.left))
+        elif comparison is _BinaryTest.match.__func__:
+            return pc.match_substring_regex(field, pattern=f"^(?:{self.left.pattern})")
+        elif comparison is _BinaryTest.search.__func__:
+            return pc.match_substring_regex(field, pattern=self.left.pattern)
+        return super().to_arrow()
+
     @classmethod
     def isin(self, lhs, rhs):
         return lhs in rhs
@@ -206,6 +369,46 @@ class _ExistanceTest(_Comparison):
                 return False
         return True
 
+    def mask(self, batch):
+        # columnar data do not distinguish between missing and null values
+        try:
+            values = columnar.column_path(batch, self.path)
+        except (KeyError, columnar.pa.ArrowException):
+            n_rows = columnar.num_rows(batch)
+            return columnar.pa.repeat(columnar.pa.scalar(False), n_rows)
+        return columnar.pc.is_valid(values)
+
+    def to_arrow(self):
+        return columnar.pc.field(*self.path).is_valid()
+
+
+def _v_equal(values, other):
+    if other is None:
+        return columnar.pc.is_null(values)
+    return columnar.pc.equal(values, other)
+
+
+def _v_isin(values, options):
+    return columnar.pc.is_in(values, value_set=columnar.pa.array(list(options)))
+
+
+# vectorised equivalent of tests, nulls evaluate to False
+_VECTOR_TESTS = {
+    op.eq: _v_equal,
+    op.ne: lambda v, o: columnar.pc.invert(columnar.pc.fill_null(_v_equal(v, o), False)),
+    op.lt: lambda v, o: columnar.pc.less(v, o),
+    op.gt: lambda v, o: columnar.pc.greater(v, o),
+    op.le: lambda v, o: columnar.pc.less_equal(v, o),
+    op.ge: lambda v, o: columnar.pc.greater_equal(v, o),
+    _BinaryTest.isin.__func__: _v_isin,
+    _BinaryTest.match.__func__: lambda v, m: columnar.pc.match_substring_regex(
+        v, pattern=f"^(?:{m.pattern})"
+    ),
+    _BinaryTest.search.__func__: lambda v, m: columnar.pc.match_substring_regex(
+        v, pattern=m.pattern
+    ),
+}
+
 
 class Proxy(object):
     """
@@ -264,6 +467,24 @@ class Proxy(object):
     >>> user.age.exists()(data)
     True
 
+    Tests can be compiled to a single function with direct (nested)
+    key access and short circuit evaluation of `&` and `|`:
+
+    >>> test = (user.age > 30) & (user.name == 'John')
+    >>> fn = test.compile()
+    >>> fn(data)
+    True
+
+    or converted to a pyarrow expression, e.g. to filter a dataset:
+
+    >>> (user.age > 30).to_arrow()
+    <pyarrow.compute.Expression (age > 30)>
+
+    Columnar batches are evaluated with `mask` or `filter_batch`:
+
+    >>> batch = {"name": ["John", "Susan"], "age": [33, 44]}
+    >>> (user.age > 40).mask(batch).to_pylist()
+    [False, True]
     """
     def __init__(self, path=[]):
         self.path = path
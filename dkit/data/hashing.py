@@ -0,0 +1,279 @@
+# Copyright (c) 2026 Cobus Nel
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+"""
+Canonical hashing of rows and other python data structures
+
+Objects are converted to a canonical form that is serialised with
+marshal (version 2, which does not depend on object identity) to a
+stable, type tagged binary encoding:
+
+* dictionary keys are sorted, so the insertion order of fields do
+  not affect the hash;
+* values are tagged with their type so that 1, 1.0, "1" and True
+  produce different hashes;
+* date, datetime, time and Decimal values are supported (Decimal
+  values are normalised so that Decimal("1.0") == Decimal("1.00")).
+
+`encode_key` is a variant for keys and set members in which values
+that compare equal (e.g. 1, 1.0, True and Decimal("1")) encode the same.
+
+The encoding is hashed with xxh3 (64 or 128 bit) or md5:
+
+>>> row_hash({"a": 1, "b": "x"}) == row_hash({"b": "x", "a": 1})
+True
+>>> row_hash({"a": 1, "b": "x"}, keys=["a"]) == row_hash({"a": 1, "b": "y"}, keys=["a"])
+True
+>>> len(row_hash({"a": 1}, algorithm="md5"))
+32
+
+md5 hashes of the bencode of an object remain available as
+`dkit.data.bencode.md5_hash` for compatibility.
+"""
+# =========== =============== =================================================
+# 19 Oct 2026 Cobus Nel       Created
+# =========== =============== =================================================
+import datetime
+import marshal
+from decimal import Decimal
+from hashlib import md5
+from typing import Iterable, List
+
+import xxhash
+
+__all__ = [
+    "ALGORITHMS",
+    "canonical",
+    "encode",
+    "encode_key",
+    "get_hasher",
+    "hash_rows",
+    "row_hash",
+]
+
+# marshal version 2 does not use references and is deterministic
+MARSHAL_VERSION = 2
+
+# types that marshal encode directly
+_NATIVE = {str, int, float, bool, type(None), bytes}
+
+# Ellipsis mark tagged values that marshal cannot encode
+_TAG = ...
+
+
+def _canonical_dict(value):
+    try:
+        items = sorted(value.items())
+    except TypeError:
+        # keys of different types
+        items = sorted(value.items(), key=lambda x: encode(x[0]))
+    if _NATIVE.issuperset(map(type, value.values())) and _NATIVE.issuperset(map(type, value)):
+        return (_TAG, "d", tuple(items))
+    return (_TAG, "d", tuple(
+        (k if k.__class__ in _NATIVE else canonical(k),
+         v if v.__class__ in _NATIVE else canonical(v))
+        for k, v in items
+    ))
+
+
+def _canonical_set(value):
+    return (_TAG, "e", tuple(sorted(encode(i) for i in value)))
+
+
+_CONVERTERS = {
+    Decimal: lambda x: (_TAG, "m", str(x.normalize())),
+    datetime.datetime: lambda x: (_TAG, "S", x.isoformat()),
+    datetime.date: lambda x: (_TAG, "D", x.isoformat()),
+    datetime.time: lambda x: (_TAG, "t", x.isoformat()),
+    list: lambda x: [canonical(i) for i in x],
+    tuple: lambda x: tuple(canonical(i) for i in x),
+    dict: _canonical_dict,
+    set: _canonical_set,
+    frozenset: _canonical_set,
+}
+
+# order matter for subclasses (bool is an int, datetime is a date)
+_BASE_TYPES = [
+    bool, int, float, str, bytes, Decimal, datetime.datetime, datetime.date,
+    datetime.time, list, tuple, dict, set, frozenset
+]
+
+
+def canonical(value):
+    """
+    canonical form of value that can be encoded with marshal
+    """
+    cls = value.__class__
+    if cls in _NATIVE:
+        return value
+    converter = _CONVERTERS.get(cls)
+    if converter is not None:
+        return converter(value)
+    for base in _BASE_TYPES:
+        if isinstance(value, base):
+            # subclass of a supported type (e.g. numpy.float64, OrderedDict)
+            if base in _NATIVE:
+                return base(value)
+            return _CONVERTERS[base](value)
+    if hasattr(value, "item"):
+        # numpy scalars
+        return canonical(value.item())
+    raise TypeError(f"type '{type(value).__name__}' is not supported: {value!r}")
+
+
+def encode(obj) -> bytes:
+    """
+    canonical binary encoding of obj
+
+    >>> encode({"b": 1, "a": 1.5}) == encode({"a": 1.5, "b": 1})
+    True
+    >>> encode(1) == encode(1.0)
+    False
+    """
+    return marshal.dumps(canonical(obj), MARSHAL_VERSION)
+
+
+def _equal_form(value):
+    """
+    value with numbers in a common form for values that compare equal
+    """
+    cls = value.__class__
+    if cls is str or cls is int:
+        return value
+    if isinstance(value, int):
+        # bool and int subclasses
+        return int(value)
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else float(value)
+    if isinstance(value, Decimal):
+        if value.is_finite():
+            if value == value.to_integral_value():
+                return int(value)
+            as_float = float(value)
+            if as_float == value:
+                return as_float
+        return value
+    if isinstance(value, list):
+        return [_equal_form(i) for i in value]
+    if isinstance(value, tuple):
+        return tuple(_equal_form(i) for i in value)
+    if isinstance(value, dict):
+        return {_equal_form(k): _equal_form(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_equal_form(i) for i in value)
+    if hasattr(value, "item") and not isinstance(value, (str, bytes)):
+        # numpy scalars
+        return _equal_form(value.item())
+    return value
+
+
+def encode_key(obj) -> bytes:
+    """
+    canonical binary encoding of obj in which values that compare
+    equal encode the same
+
+    use for keys and set members that are matched by equality
+
+    >>> encode_key(1) == encode_key(1.0) == encode_key(True) == encode_key(Decimal("1"))
+    True
+    >>> encode_key((1, "a")) == encode_key((1.0, "a"))
+    True
+    >>> encode_key(1) == encode_key("1")
+    False
+    """
+    return encode(_equal_form(obj))
+
+
+def _xxh3_64(data: bytes) -> int:
+    return xxhash.xxh3_64_intdigest(data)
+
+
+def _xxh3_128(data: bytes) -> int:
+    return xxhash.xxh3_128_intdigest(data)
+
+
+def _md5(data: bytes) -> str:
+    return md5(data).hexdigest()
+
+
+"""hash functions applied to the encoding"""
+ALGORITHMS = {
+    "xxh3_64": _xxh3_64,
+    "xxh3_128": _xxh3_128,
+    "md5": _md5,
+}
+
+
+def get_hasher(keys: List[str] = None, algorithm: str = "xxh3_64"):
+    """
+    function that hash a row
+
+    args:
+        * keys: hash only these fields (in the order specified). All
+          fields are hashed if not specified
+        * algorithm: one of xxh3_64, xxh3_128 (integer hashes) or md5
+          (hexdigest)
+    """
+    try:
+        hash_fn = ALGORITHMS[algorithm]
+    except KeyError:
+        raise ValueError(f"invalid hash algorithm: {algorithm}")
+
+    dumps = marshal.dumps
+    if keys:
+        keys = list(keys)
+
+        def hasher(row):
+            values = tuple(
+                v if v.__class__ in _NATIVE else canonical(v)
+                for v in (row[k] for k in keys)
+            )
+            return hash_fn(dumps(values, MARSHAL_VERSION))
+    else:
+        def hasher(row):
+            if row.__class__ is dict:
+                return hash_fn(dumps(_canonical_dict(row), MARSHAL_VERSION))
+            return hash_fn(dumps(canonical(row), MARSHAL_VERSION))
+
+    return hasher
+
+
+def row_hash(row, keys: List[str] = None, algorithm: str = "xxh3_64"):
+    """
+    canonical hash of row
+
+    args:
+        * row: dictionary (or any supported object when keys is None)
+        * keys: hash only these fields
+        * algorithm: one of xxh3_64, xxh3_128 or md5
+    """
+    return get_hasher(keys, algorithm)(row)
+
+
+def hash_rows(rows: Iterable, keys: List[str] = None, algorithm: str = "xxh3_64") -> list:
+    """
+    canonical hashes of a batch of rows
+
+    args:
+        * rows: iterable of rows
+        * keys: hash only these fields
+        * algorithm: one of xxh3_64, xxh3_128 or md5
+    """
+    hasher = get_hasher(keys, algorithm)
+    return [hasher(row) for row in rows]
@@ -19,6 +19,16 @@
 """
 Abstraction of Histogram to assist with generating and plotting
 of frequency plots.
+
+HistogramBuilder count values into fixed bins in batches and can be
+used to build histograms from streams that do not fit in memory:
+
+>>> builder = HistogramBuilder.from_range(0, 10, 5)
+>>> builder.update([1, 2, 2.5, 9, 10, 11])
+>>> [b.count for b in builder.histogram().bins]
+[1, 2, 0, 0, 2]
+>>> builder.overflow
+1
 """
 import math
 from decimal import Decimal, getcontext
@@ -27,6 +37,7 @@ from typing import List
 
 from dataclasses import dataclass
 
+from ..utilities.cmd_helper import LazyLoad
 from .containers import SortedCollection
 from .stats import Accumulator
 import warnings
@@ -34,7 +45,9 @@ import tabulate
 
 from boltons.statsutils import Stats
 
-__all__ = ["Histogram", "binner"]
+np = LazyLoad("numpy")
+
+__all__ = ["Histogram", "HistogramBuilder", "binner"]
 
 
 def binner(data, value_field, bins: int = None, bin_digits: int = 1):
@@ -172,6 +185,134 @@ class Histogram(object):
         return Histogram(bins)
 
 
+class HistogramBuilder(object):
+    """
+    Streaming histogram with fixed bin edges
+
+    Values are counted in batches using numpy.searchsorted. Bins are
+    closed on the left except for the last bin that is closed on both
+    sides (similar to numpy.histogram). Values outside the edges are
+    counted in underflow and overflow.
+
+    Builders with the same edges can be merged, e.g. to combine
+    partial histograms from different files or processes.
+
+    Args:
+        * edges: sorted list of bin edges (number of bins + 1)
+    """
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        if len(self.edges) < 2 or np.any(np.diff(self.edges) <= 0):
+            raise ValueError("edges must be increasing with at least two values")
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    @classmethod
+    def from_range(cls, low: float, high: float, bins: int = 10) -> "HistogramBuilder":
+        """equal width bins from low to high"""
+        return cls(np.linspace(low, high, bins + 1))
+
+    @classmethod
+    def from_accumulator(cls, accumulator: "Accumulator", bins: int = 10,
+                         precision: int = None) -> "HistogramBuilder":
+        """
+        equal width bins estimated from a first pass Accumulator
+
+        The range is limited to median +- 2.5 * iqr to exclude
+        outliers, otherwise the minimum and maximum is used.
+
+        args:
+            * accumulator: Accumulator with first pass statistics
+            * bins: number of bins
+            * precision: round edges to this number of digits
+        """
+        median, iqr = accumulator.median, accumulator.iqr
+        low = max(accumulator.min, median - 2.5 * iqr)
+        high = min(accumulator.max, median + 2.5 * iqr)
+        if precision is not None:
+            p = pow(10, precision)
+            low = math.floor(low * p) / p
+            high = math.ceil(high * p) / p
+        if high <= low:
+            high = low + 1
+        return cls.from_range(low, high, bins)
+
+    def update(self, values):
+        """
+        add a batch of values
+
+        None and NaN values are ignored.
+
+        args:
+            * values: list, numpy or pyarrow array of values
+        """
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        edges = self.edges
+        n = len(self.counts)
+        idx = np.searchsorted(edges, values, side="right") - 1
+        idx[values == edges[-1]] = n - 1
+        under = idx < 0
+        over = idx >= n
+        self.underflow += int(np.count_nonzero(under))
+        self.overflow += int(np.count_nonzero(over))
+        self.counts += np.bincount(idx[~(under | over)], minlength=n)
+
+    def update_rows(self, rows, field: str, batch_size: int = 100_000):
+        """
+        add values of field from an iterable of dicts in batches
+        """
+        batch = []
+        for row in rows:
+            batch.append(row[field])
+            if len(batch) >= batch_size:
+                self.update(batch)
+                batch = []
+        if batch:
+            self.update(batch)
+        return self
+
+    def push(self, value):
+        """add a single value"""
+        self.update([value])
+
+    def merge(self, other: "HistogramBuilder") -> "HistogramBuilder":
+        """add counts of other into this instance"""
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("histogram edges differ")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+    def __add__(self, other: "HistogramBuilder") -> "HistogramBuilder":
+        retval = HistogramBuilder(self.edges)
+        return retval.merge(self).merge(other)
+
+    @property
+    def observations(self) -> int:
+        """number of values counted, including underflow and overflow"""
+        return int(self.counts.sum()) + self.underflow + self.overflow
+
+    def histogram(self, clip: bool = False) -> Histogram:
+        """
+        Histogram instance
+
+        args:
+            * clip: add underflow and overflow counts to the first
+              and last bins
+        """
+        counts = [int(i) for i in self.counts]
+        if clip:
+            counts[0] += self.underflow
+            counts[-1] += self.overflow
+        edges = [float(i) for i in self.edges]
+        return Histogram(
+            [Bin(edges[i], edges[i + 1], c) for i, c in enumerate(counts)]
+        )
+
+
 class LegacyHistogram(Accumulator):
     """
     Create histogram bins and frequencies from data
@@ -41,18 +41,34 @@ Data manipulation routines.
 # 21 Nov 2019 Cobus nel       Added distinct and rename
 # 12 Dec 2019 Cobus Nel       Added Substitute
 # 23 Sep 2020 Cobus Nel       Added duplicates
+# 19 Oct 2026 Cobus Nel       Added external_sort
+# 19 Oct 2026 Cobus Nel       Added sort_merge and grace_hash joins
+# 19 Oct 2026 Cobus Nel       Pivot with accumulators
+# 19 Oct 2026 Cobus Nel       Approximate distinct and duplicates
+# 19 Oct 2026 Cobus Nel       duplicates use canonical row hash
 # =========== =============== =================================================
-from .. import NA_VALUE
+from .. import CHUNK_SIZE, NA_VALUE, exceptions, messages
+from ..algorithms.probabilistic import HyperLogLog, ScalableBloomFilter
 from ..decorators import deprecated
 from ..utilities.introspection import is_list
-from .helpers import md5_obj_hash
+from .hashing import get_hasher
+from .iteration import chunker
+from .stats import MomentAccumulator, SumAccumulator
 import collections
+import copy
+import functools
+import heapq
 import itertools
 import math
+import multiprocessing
+import numbers
 import operator
+import pickle
+import queue
 import re
 import statistics
 import sys
+import tempfile
 import typing
 
 if sys.version_info.major == 3 and sys.version_info.minor >= 10:
@@ -70,14 +86,21 @@ __all__ = [
     "Substitute",
     "aggregate",
     "aggregates",
+    "count_distinct",
     "distinct",
     "duplicates",
+    "external_sort",
     "index",
+    "iter_partials",
     "melt",
     "merge",
     "reduce_aggregate",
+    "sort_key",
 ]
 
+# seconds between checks on worker processes
+POLL_INTERVAL = 0.5
+
 
 PIVOT_FUNCTIONS = {
     "max": max,
@@ -95,6 +118,33 @@ else:
     PIVOT_FUNCTIONS["mean"] = statistics.mean
     PIVOT_FUNCTIONS["sum"] = sum
 
+def _cell_variance(cell, name="variance"):
+    """sample variance of an accumulated pivot cell"""
+    if cell._observations < 2:
+        raise statistics.StatisticsError(f"{name} requires at least two data points")
+    return cell._std / (cell._observations - 1)
+
+
+def _cell_stdev(cell):
+    """sample standard deviation of an accumulated pivot cell"""
+    return math.sqrt(_cell_variance(cell, "stdev"))
+
+
+# Functions that are computed with an accumulator per pivot cell of
+# float values instead of a list of values: function -> (accumulator, getter).
+# Getters read the unrounded state of the accumulator.
+PIVOT_ACCUMULATORS = {
+    sum: (SumAccumulator, operator.attrgetter("_sum")),
+    math.fsum: (SumAccumulator, operator.attrgetter("_sum")),
+    min: (SumAccumulator, operator.attrgetter("_min")),
+    max: (SumAccumulator, operator.attrgetter("_max")),
+    statistics.mean: (MomentAccumulator, operator.attrgetter("_mean")),
+    statistics.stdev: (MomentAccumulator, _cell_stdev),
+    statistics.variance: (MomentAccumulator, _cell_variance),
+}
+if sys.version_info >= (3, 8):
+    PIVOT_ACCUMULATORS[statistics.fmean] = (MomentAccumulator, operator.attrgetter("_mean"))
+
 
 def melt(the_iterable, id_fields: typing.List[str],  var_name: str = "variable",
          value_name: str = "value"):
@@ -113,20 +163,287 @@ def melt(the_iterable, id_fields: typing.List[str],  var_name: str = "variable",
             yield retval
 
 
-def distinct(iter_input, *keys):
+@functools.total_ordering
+class _Descending(object):
+    """invert the ordering of a wrapped value"""
+    __slots__ = ["value"]
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+
+def sort_key(*keys, reverse=False) -> typing.Callable:
+    """
+    key function for sorting rows on multiple keys
+
+    Args:
+        * keys: fields to sort on
+        * reverse: bool or a list of bool (one for each key) that
+          specify descending order
+
+    Returns:
+        key function
+    """
+    if not is_list(reverse):
+        return operator.itemgetter(*keys)
+    if len(reverse) != len(keys):
+        raise ValueError("one reverse flag is required for each key")
+
+    def _key(row):
+        return tuple(
+            _Descending(row[k]) if r else row[k]
+            for k, r in zip(keys, reverse)
+        )
+    return _key
+
+
+def _partial_worker(template, in_queue, out_queue):
+    """
+    feed chunks from in_queue to template until None is received
+
+    the template (or the first exception raised) is sent to out_queue
+    once the input is exhausted. The queue is drained after an error so
+    that the producer never blocks.
+    """
+    error = None
+    for chunk in iter(in_queue.get, None):
+        if error is None:
+            try:
+                template._feed_data(chunk)
+            except Exception as e:
+                error = e
+    if error is not None:
+        try:
+            pickle.dumps(error)
+        except Exception:
+            # the parent would never receive an exception that can not be pickled
+            error = exceptions.DKitDataException(repr(error))
+    out_queue.put(error if error is not None else template)
+
+
+def _check_workers(workers, n_results: int = 0):
+    """
+    raise if more workers exited than results received
+
+    Raises:
+        DKitDataException
+    """
+    exited = [w for w in workers if w.exitcode is not None]
+    if len(exited) > n_results:
+        raise exceptions.DKitDataException(
+            f"worker process exited without a result (exit codes: "
+            f"{[w.exitcode for w in exited]})"
+        )
+
+
+def _put_chunk(in_queue, chunk, workers):
+    """put chunk on in_queue, raise if workers exit while the queue is full"""
+    while True:
+        try:
+            in_queue.put(chunk, timeout=POLL_INTERVAL)
+            return
+        except queue.Full:
+            _check_workers(workers)
+
+
+def _get_results(out_queue, workers):
+    """
+    one result per worker from out_queue
+
+    A worker flush its result before it exit, a worker that exited
+    without a result is detected when the queue remain empty for a
+    poll interval after the exit.
+    """
+    results = []
+    while len(results) < len(workers):
+        try:
+            results.append(out_queue.get(timeout=POLL_INTERVAL))
+        except queue.Empty:
+            exited = sum(1 for w in workers if w.exitcode is not None)
+            if exited > len(results):
+                # allow the result of a worker that just exited to arrive
+                try:
+                    results.append(out_queue.get(timeout=POLL_INTERVAL))
+                except queue.Empty:
+                    _check_workers(workers, len(results))
+    return results
+
+
+def iter_partials(template, chunks, processes: int):
+    """
+    process chunks in worker processes and yield the partial results
+
+    Each worker receive a copy of template and feed the chunks it
+    takes from a shared queue to `template._feed_data`. The partial
+    results are yielded when all chunks are processed and should be
+    merged by the caller. Exceptions in workers are raised.
+
+    Args:
+        * template: picklable object with a `_feed_data(chunk)` method
+        * chunks: iterable of chunks
+        * processes: number of worker processes
+
+    Yields:
+        partial results (one per worker)
+
+    Raises:
+        DKitDataException if a worker exit without a result
+    """
+    in_queue = multiprocessing.Queue(maxsize=2 * processes)
+    out_queue = multiprocessing.Queue()
+    workers = [
+        multiprocessing.Process(
+            target=_partial_worker,
+            args=(template, in_queue, out_queue),
+            daemon=True
+        )
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        try:
+            for chunk in chunks:
+                _put_chunk(in_queue, chunk, workers)
+        finally:
+            for _ in workers:
+                _put_chunk(in_queue, None, workers)
+        results = _get_results(out_queue, workers)
+    except BaseException:
+        for worker in workers:
+            worker.terminate()
+        raise
+    finally:
+        for worker in workers:
+            worker.join()
+    for result in results:
+        if isinstance(result, Exception):
+            raise result
+        yield result
+
+
+def _write_run(rows) -> typing.IO:
+    """write sorted rows to a temporary file in pickled blocks"""
+    run = tempfile.TemporaryFile(prefix="dk_sort_")
+    for i in range(0, len(rows), 1000):
+        pickle.dump(rows[i:i + 1000], run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    """yield rows from a run file and close the file"""
+    try:
+        while True:
+            try:
+                yield from pickle.load(run)
+            except EOFError:
+                break
+    finally:
+        run.close()
+
+
+def _merge_runs(runs, key, reverse) -> typing.IO:
+    """merge runs into a new run"""
+    merged = heapq.merge(*(_read_run(r) for r in runs), key=key, reverse=reverse)
+    run = tempfile.TemporaryFile(prefix="dk_sort_")
+    for block in iter(lambda: list(itertools.islice(merged, 1000)), []):
+        pickle.dump(block, run, pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def external_sort(iter_input, *keys, reverse=False, key=None,
+                  chunk_size: int = CHUNK_SIZE, fan_in: int = 64):
+    """sort an iterable that may not fit into memory
+
+    Chunks of chunk_size rows are sorted in memory and spilled to
+    temporary files as sorted runs. The runs are combined with a k-way
+    merge. Input that fit in one chunk is sorted in memory.
+
+    The sort is stable.
+
+    >>> rows = [{"a": 1, "b": 2}, {"a": 2, "b": 1}, {"a": 1, "b": 1}]
+    >>> list(external_sort(rows, "a", "b", reverse=[False, True], chunk_size=2))
+    [{'a': 1, 'b': 2}, {'a': 1, 'b': 1}, {'a': 2, 'b': 1}]
+
+    Args:
+        * iter_input: iterable of dictionary rows
+        * keys: fields to sort on
+        * reverse: True to sort descending or a list of bool that
+          specify descending order for each key
+        * key: key function, used instead of keys
+        * chunk_size: number of rows sorted in memory
+        * fan_in: maximum number of runs merged at once
+
+    Yields:
+        rows in sorted order
+    """
+    if key is None:
+        key = sort_key(*keys, reverse=reverse)
+    # mixed directions are handled by the key function
+    descending = reverse if not is_list(reverse) else False
+
+    iter_input = iter(iter_input)
+    runs = []
+    for chunk in iter(lambda: list(itertools.islice(iter_input, chunk_size)), []):
+        chunk.sort(key=key, reverse=descending)
+        if not runs and len(chunk) < chunk_size:
+            # everything fit in memory
+            yield from chunk
+            return
+        runs.append(_write_run(chunk))
+        chunk = None
+
+    # merge consecutive groups of runs to limit the number of open files
+    while len(runs) > fan_in:
+        runs = [
+            _merge_runs(runs[i:i + fan_in], key, descending)
+            for i in range(0, len(runs), fan_in)
+        ]
+
+    yield from heapq.merge(*(_read_run(r) for r in runs), key=key, reverse=descending)
+
+
+def _row_key(row, keys):
+    """key tuple or row items when no keys are specified"""
+    if keys:
+        return tuple(row[k] for k in keys)
+    return tuple(row.items())
+
+
+def distinct(iter_input, *keys, approximate: bool = False, error_rate: float = 0.001):
     """extract distinct rows from iterable
 
     Items are mapped in memory, not suitable for
-    huge datasets
+    huge datasets unless approximate is True.
+
+    In approximate mode rows are tracked with a scalable Bloom filter
+    and yielded when first seen. A fraction (error_rate) of distinct
+    rows may be dropped as false positives.
 
     Args:
         iter_input: iterable of dictionary rows
         keys: list of keys required
+        approximate: use a Bloom filter
+        error_rate: false positive rate in approximate mode
 
     Yields:
         Dictionaries
     """
-    if len(keys) > 0:
+    if approximate:
+        seen = ScalableBloomFilter(error_rate=error_rate)
+        for row in iter_input:
+            key = _row_key(row, keys)
+            if not seen.add(key):
+                yield dict(zip(keys, key)) if keys else dict(key)
+    elif len(keys) > 0:
         _distinct = set(
             tuple(r[i] for i in keys) for r in iter_input
         )
@@ -138,7 +455,7 @@ def distinct(iter_input, *keys):
         yield from (dict(i) for i in _distinct)
 
 
-def duplicates(iter_input, *keys):
+def duplicates(iter_input, *keys, approximate: bool = False, error_rate: float = 0.001):
     """extract duplicate rows from an iterable
 
     Use `*keys` to identify keys to track. If
@@ -147,16 +464,29 @@ def duplicates(iter_input, *keys):
     each duplicate are reported *only* once.
 
     record keeping is in memory, not suited for
-    extremely huge datasets
+    extremely huge datasets unless approximate is True.
+
+    In approximate mode rows are tracked with scalable Bloom filters.
+    A fraction (error_rate) of unique rows may be reported as
+    duplicates.
 
     Args:
         iter_input: iterable of dictionary rows
         key: list of keys required
+        approximate: use Bloom filters
+        error_rate: false positive rate in approximate mode
 
     Yields:
         dict
     """
-    if len(keys) > 0:
+    if approximate:
+        seen = ScalableBloomFilter(error_rate=error_rate)
+        reported = ScalableBloomFilter(error_rate=error_rate)
+        for row in iter_input:
+            key = _row_key(row, keys)
+            if seen.add(key) and not reported.add(key):
+                yield dict(zip(keys, key)) if keys else row
+    elif len(keys) > 0:
         counts = collections.Counter(
             tuple(r[i] for i in keys) for r in iter_input
         )
@@ -166,8 +496,9 @@ def duplicates(iter_input, *keys):
         # test for duplicates
         uniq = set({})
         duplicates = set({})
+        row_hash = get_hasher(algorithm="xxh3_128")
         for row in iter_input:
-            _hash = md5_obj_hash(row)
+            _hash = row_hash(row)
             if _hash not in uniq:
                 uniq.add(_hash)
             else:
@@ -189,6 +520,30 @@ def distinct_values(iter_input, field) -> set:
     return set(r[field] for r in iter_input)
 
 
+def count_distinct(iter_input, *keys, approximate: bool = False,
+                   precision: int = 14) -> int:
+    """number of distinct rows (or key combinations)
+
+    In approximate mode the count is estimated with HyperLogLog in
+    fixed memory (standard error of 0.8% at the default precision).
+
+    Args:
+        * iter_input: iterable of dictionary rows
+        * keys: keys to count (all fields if omitted)
+        * approximate: estimate with HyperLogLog
+        * precision: HyperLogLog precision
+
+    returns:
+        number of distinct rows
+    """
+    keys_iter = (_row_key(r, keys) for r in iter_input)
+    if approximate:
+        hll = HyperLogLog(precision)
+        hll.update(keys_iter)
+        return hll.cardinality()
+    return len(set(keys_iter))
+
+
 def reduce_aggregate(the_iterable, by_list, value_field, function=operator.add):
     """
     reducing aggregator
@@ -266,18 +621,67 @@ def aggregates(the_iterable, by_list, agg_list):
 #
 # merge
 #
+class _Partitions(object):
+    """
+    rows partitioned by key hash into temporary files
+
+    Args:
+        * n: number of partitions
+    """
+    block_size = 1000
+
+    def __init__(self, n: int):
+        self.n = n
+        self.files = [tempfile.TemporaryFile(prefix="dk_part_") for _ in range(n)]
+        self.buffers = [[] for _ in range(n)]
+
+    def add(self, key, row):
+        i = hash(key) % self.n
+        buffer = self.buffers[i]
+        buffer.append(row)
+        if len(buffer) >= self.block_size:
+            pickle.dump(buffer, self.files[i], pickle.HIGHEST_PROTOCOL)
+            self.buffers[i] = []
+
+    def read(self, i: int):
+        """yield rows in partition i and close the partition file"""
+        run = self.files[i]
+        if self.buffers[i]:
+            pickle.dump(self.buffers[i], run, pickle.HIGHEST_PROTOCOL)
+            self.buffers[i] = []
+        run.seek(0)
+        yield from _read_run(run)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+
 class _Merge(object):
     """
     implement merge logic
+
+    strategies:
+        * hash: index the right side in memory (or in backend)
+        * sort_merge: stream both sides, which must be sorted on the keys
+        * grace_hash: partition both sides to disk by key hash when the
+          right side exceed max_rows rows
     """
+    strategies = ["hash", "sort_merge", "grace_hash"]
+
     def __init__(self, left, right, by_l, by_r, all_l=False, all_r=False, backend=None,
-                 null=NA_VALUE):
+                 null=NA_VALUE, strategy="hash", max_rows=1_000_000, partitions=16):
+        if strategy not in self.strategies:
+            raise ValueError(messages.MSG_0030.format(strategy))
         self.by_l = by_l
         self.by_r = by_r
         self.all_l = all_l
         self.all_r = all_r
         self.backend = backend
         self.null = null
+        self.strategy = strategy
+        self.max_rows = max_rows
+        self.partitions = partitions
         self.right = iter(right)
         self.left = iter(left)
 
@@ -295,6 +699,10 @@ class _Merge(object):
             self.peek_l = left[0]
             self.i_l = left
 
+        self._rename_dict = self.__rename_dict()
+        self._empty_right = {v: null for v in self._rename_dict.values()}
+        self._empty_left = {k: null for k in self.peek_l.keys()}
+
     def __rename_dict(self):
         """
         build rename dictionary for right hand data
@@ -330,7 +738,28 @@ class _Merge(object):
                 yield row
 
     def right_join(self):
-        raise NotImplementedError
+        null = self.null
+        rename_dict = self.__rename_dict()
+        by_l = self.by_l
+        empty_left = {k: null for k in self.peek_l.keys()}
+        matched_keys = set()
+        idx_r = index(self.i_r, self.by_r, backend=self.backend)
+        # matched rows
+        for row in self.i_l:
+            l_key = tuple(row[i] for i in by_l)
+            r_matches = idx_r.get(l_key, [])
+            if r_matches:
+                matched_keys.add(l_key)
+            for r_match in r_matches:
+                row.update({rename_dict[k]: v for k, v in r_match.items()})
+                yield row
+        # right hand
+        for r_key in idx_r.keys():
+            if r_key not in matched_keys:
+                for row in idx_r[r_key]:
+                    _row = dict(empty_left)
+                    _row.update({rename_dict[k]: v for k, v in row.items()})
+                    yield _row
 
     def full_join(self):
         null = self.null
@@ -357,7 +786,112 @@ class _Merge(object):
                     _row.update({rename_dict[k]: v for k, v in row.items()})
                     yield _row
 
+    def _join_rows(self, l_rows, r_rows):
+        """
+        join rows of matching key groups. Either side may be empty
+        """
+        rename_dict = self._rename_dict
+        if not r_rows:
+            if self.all_l:
+                empty_right = self._empty_right
+                for row in l_rows:
+                    yield {**row, **empty_right}
+        elif not l_rows:
+            if self.all_r:
+                empty_left = self._empty_left
+                for r_row in r_rows:
+                    yield {**empty_left, **{rename_dict[k]: v for k, v in r_row.items()}}
+        else:
+            renamed = [{rename_dict[k]: v for k, v in r.items()} for r in r_rows]
+            for row in l_rows:
+                for r_row in renamed:
+                    yield {**row, **r_row}
+
+    def _sorted_groups(self, rows, keys):
+        """group consecutive rows with the same key and validate order"""
+        previous = None
+        for key, group in itertools.groupby(rows, key=lambda r: tuple(r[k] for k in keys)):
+            if previous is not None and key < previous:
+                raise exceptions.DKitDataException(messages.MSG_0031.format(key, previous))
+            previous = key
+            yield key, list(group)
+
+    def sort_merge_join(self):
+        """
+        merge join of inputs sorted in ascending order on the join keys
+
+        Only the rows of one key group are held in memory.
+        """
+        left = self._sorted_groups(self.i_l, self.by_l)
+        right = self._sorted_groups(self.i_r, self.by_r)
+        l_key, l_rows = next(left, (None, None))
+        r_key, r_rows = next(right, (None, None))
+        while l_rows is not None and r_rows is not None:
+            if l_key == r_key:
+                yield from self._join_rows(l_rows, r_rows)
+                l_key, l_rows = next(left, (None, None))
+                r_key, r_rows = next(right, (None, None))
+            elif l_key < r_key:
+                yield from self._join_rows(l_rows, [])
+                l_key, l_rows = next(left, (None, None))
+            else:
+                yield from self._join_rows([], r_rows)
+                r_key, r_rows = next(right, (None, None))
+        while l_rows is not None:
+            yield from self._join_rows(l_rows, [])
+            l_key, l_rows = next(left, (None, None))
+        while r_rows is not None:
+            yield from self._join_rows([], r_rows)
+            r_key, r_rows = next(right, (None, None))
+
+    def _index_join(self, l_rows, r_rows):
+        """hash join of one pair of partitions"""
+        by_l, by_r = self.by_l, self.by_r
+        idx_r = {}
+        for r_row in r_rows:
+            idx_r.setdefault(tuple(r_row[k] for k in by_r), []).append(r_row)
+        matched_keys = set()
+        for row in l_rows:
+            l_key = tuple(row[k] for k in by_l)
+            r_matches = idx_r.get(l_key, [])
+            if r_matches:
+                matched_keys.add(l_key)
+            yield from self._join_rows([row], r_matches)
+        if self.all_r:
+            for r_key, r_matches in idx_r.items():
+                if r_key not in matched_keys:
+                    yield from self._join_rows([], r_matches)
+
+    def grace_hash_join(self):
+        """
+        hash join that partition both sides to disk when the right
+        side exceed max_rows rows
+        """
+        i_r = iter(self.i_r)
+        r_buffer = list(itertools.islice(i_r, self.max_rows + 1))
+        if len(r_buffer) <= self.max_rows:
+            yield from self._index_join(self.i_l, r_buffer)
+            return
+
+        by_l, by_r = self.by_l, self.by_r
+        left, right = _Partitions(self.partitions), _Partitions(self.partitions)
+        try:
+            for r_row in itertools.chain(r_buffer, i_r):
+                right.add(tuple(r_row[k] for k in by_r), r_row)
+            r_buffer = None
+            for row in self.i_l:
+                left.add(tuple(row[k] for k in by_l), row)
+            for i in range(self.partitions):
+                yield from self._index_join(left.read(i), list(right.read(i)))
+        finally:
+            left.close()
+            right.close()
+
     def __iter__(self):
+        if self.strategy == "sort_merge":
+            return self.sort_merge_join()
+        elif self.strategy == "grace_hash":
+            return self.grace_hash_join()
         # Join logic
         if (not self.all_l) and (not self.all_r):
             return self.inner_join()
@@ -370,10 +904,20 @@ class _Merge(object):
 
 
 def merge(left, right, by_l, by_r, all_l=False, all_r=False, backend=None,
-          null=NA_VALUE):
+          null=NA_VALUE, strategy="hash", max_rows=1_000_000):
     """
     merge datasets similar to SQL joins.
 
+    Join strategies:
+
+        * hash: index the right side in memory (or backend)
+        * sort_merge: stream inputs that are sorted in ascending order on
+          the join keys (e.g. with external_sort). Only rows of one key is
+          held in memory.
+        * grace_hash: as hash when the right side has no more than max_rows
+          rows, otherwise partition both sides to disk by key hash and
+          join one partition at a time.
+
     Args:
         * left: left (itereable) side of join
         * right: right (iterable) side fo join
@@ -381,20 +925,33 @@ def merge(left, right, by_l, by_r, all_l=False, all_r=False, backend=None,
         * by_r: list of fields to join on right side
         * all_l: include all rows from left side
         * all_r: include all rows from right side
-        * backend: map backend for right hand side. if large data use a shelve
+        * backend: map backend for right hand side. if large data use a shelve.
+          existing entries in the backend are removed
+        * strategy: join strategy
+        * max_rows: right side rows held in memory for grace_hash
 
     Returns:
         generator of dictionaries
     """
     _by_left = by_l if is_list(by_l) else [by_l]
-    _by_right = by_r if is_list(by_l) else [by_r]
-    yield from _Merge(left, right, _by_left, _by_right, all_l, all_r, backend, null)
+    _by_right = by_r if is_list(by_r) else [by_r]
+    yield from _Merge(
+        left, right, _by_left, _by_right, all_l, all_r, backend, null,
+        strategy=strategy, max_rows=max_rows
+    )
 
 
 class Indexer(MutableMapping):
+    """
+    index rows by key
 
+    Args:
+        * backend: mapping used to store the index (e.g. a shelve). The
+          backend is cleared before rows are indexed.
+    """
     def __init__(self, backend=None):
         if backend is not None:
+            backend.clear()
             self._store = backend
         else:
             self._store = dict()
@@ -417,6 +974,29 @@ class Indexer(MutableMapping):
     def __keytransform__(self, key):
         return key
 
+    def _add_rows(self, pairs):
+        """
+        add (key, row) pairs
+
+        Multimap backends (e.g. SQLiteMultiMap) append rows directly. For
+        other mappings the row list is stored back after each append so
+        that mappings without writeback (e.g. shelve) are updated.
+        """
+        store = self._store
+        if hasattr(store, "append"):
+            for key, row in pairs:
+                store.append(self.__keytransform__(key), row)
+            store.flush()
+            return
+        for key, row in pairs:
+            key = self.__keytransform__(key)
+            try:
+                rows = store[key]
+                rows.append(row)
+            except KeyError:
+                rows = [row]
+            store[key] = rows
+
     def process(self):
         raise NotImplementedError
 
@@ -430,11 +1010,8 @@ class KeyIndexer(Indexer):
         self.__process()
 
     def __process(self):
-        for row in self.the_iterable:
-            try:
-                self.__getitem__(row[self.index_field]).append(row)
-            except KeyError:
-                self.__setitem__(row[self.index_field], [row])
+        field = self.index_field
+        self._add_rows((row[field], row) for row in self.the_iterable)
         return self
 
     @deprecated()
@@ -452,12 +1029,7 @@ class MultiKeyIndexer(Indexer):
 
     def __process(self):
         indexes = self.index_fields
-        for row in self.the_iterable:
-            the_key = tuple(row[k] for k in indexes)
-            try:
-                self.__getitem__(the_key).append(row)
-            except KeyError:
-                self.__setitem__(the_key, [row])
+        self._add_rows((tuple(row[k] for k in indexes), row) for row in self.the_iterable)
         return self
 
     @deprecated()
@@ -537,6 +1109,20 @@ class __PivotAbstract(object):
         return [str(i) for i in self._pivot_headings_raw()]
 
 
+def _push_numeric(accumulator, value):
+    """
+    push value to the accumulator of a pivot cell
+
+    Raises:
+        TypeError for values that are not numbers, consistent with the
+        functions computed from lists of values
+    """
+    if value.__class__ is float or isinstance(value, numbers.Real):
+        accumulator.push(value)
+    else:
+        raise TypeError(f"value {value!r} is not numeric")
+
+
 class Pivot(__PivotAbstract):
     """
     Generate pivot tables
@@ -546,11 +1132,16 @@ class Pivot(__PivotAbstract):
     This class require functions that operate on
     iterables. For example, sum.
 
-    This version of the class require more memory since
-    lists of values are maintained.  However the advantage
-    is that non commutative calculations (e.g. calculation of
-    median) can be performed.
+    Functions listed in PIVOT_ACCUMULATORS (e.g. sum, min, max,
+    statistics.mean, statistics.stdev) are computed with an accumulator
+    for cells of float values so that memory is bounded by the number of
+    cells. Other cells (e.g. int, str or date values) and other functions
+    maintain lists of values, which require more memory. However the
+    advantage is that non commutative calculations (e.g. calculation of
+    median) can be performed and results retain the type of the values.
 
+    When processes > 0, chunks of the input are pivoted in worker
+    processes and the partial pivots merged.
 
     Example usage of this class as below:
 
@@ -571,9 +1162,13 @@ class Pivot(__PivotAbstract):
         - missing: value to substitute for _missing value
         - ensure_cols: ensure these columns exist
         - order_cols: sort columns in pivot
+        - processes: number of worker processes (0 for none)
     """
     def __init__(self, data, row_keys, col_key, value_key, function=sum,
-                 missing=0, ensure_cols=None, order_cols: bool = False):
+                 missing=0, ensure_cols=None, order_cols: bool = False,
+                 processes: int = 0):
+        self._processes = processes
+        self._accumulator = PIVOT_ACCUMULATORS.get(function, (None, None))[0]
         super().__init__(data, row_keys, col_key, value_key,
                          function, missing, ensure_cols, order_cols)
 
@@ -584,37 +1179,114 @@ class Pivot(__PivotAbstract):
         """
         Create pivoted data structure
         """
-        ds = {}
-        for row in self._data:
-            self._col_keys.add(row[self._col_key])
-            key = tuple([row[k] for k in self._row_keys])
-            if key in ds.keys():
-                if row[self._col_key] in ds[key].keys():
-                    ds[key][row[self._col_key]].append(row[self._value_key])
+        self._ds = {}
+        if self._processes > 0:
+            template = copy.copy(self)
+            template._data = None
+            template._col_keys = set()
+            template._processes = 0
+            chunks = (list(chunk) for chunk in chunker(self._data, CHUNK_SIZE))
+            for partial in iter_partials(template, chunks, self._processes):
+                self.merge(partial)
+        else:
+            self._feed_data(self._data)
+        return self._ds
+
+    def _feed_data(self, data):
+        """add rows to the pivot"""
+        ds = self._ds
+        col_keys = self._col_keys
+        row_keys = self._row_keys
+        col_key = self._col_key
+        value_key = self._value_key
+        accumulator = self._accumulator
+        for row in data:
+            column = row[col_key]
+            col_keys.add(column)
+            key = tuple([row[k] for k in row_keys])
+            cells = ds.get(key)
+            if cells is None:
+                cells = ds[key] = {}
+            value = row[value_key]
+            cell = cells.get(column)
+            if cell is None:
+                if accumulator is not None and isinstance(value, float):
+                    cell = cells[column] = accumulator()
+                    cell.push(value)
                 else:
-                    ds[key][row[self._col_key]] = [row[self._value_key]]
+                    cells[column] = [value]
+            elif cell.__class__ is list:
+                cell.append(value)
             else:
-                ds[key] = {row[self._col_key]: [row[self._value_key]]}
-        return ds
+                _push_numeric(cell, value)
+
+    def merge(self, other: "Pivot"):
+        """
+        merge cells of other pivot (created with the same parameters)
+        into this pivot
+        """
+        self._col_keys.update(other._col_keys)
+        for key, other_cells in other._ds.items():
+            cells = self._ds.setdefault(key, {})
+            for column, cell in other_cells.items():
+                mine = cells.get(column)
+                if mine is None:
+                    cells[column] = cell
+                elif mine.__class__ is list and cell.__class__ is list:
+                    mine.extend(cell)
+                elif mine.__class__ is list:
+                    for value in mine:
+                        _push_numeric(cell, value)
+                    cells[column] = cell
+                elif cell.__class__ is list:
+                    for value in cell:
+                        _push_numeric(mine, value)
+                else:
+                    mine.merge(cell)
+        return self
+
+    def _cell_function(self, function):
+        """function that compute the value of a cell"""
+        accumulator, getter = PIVOT_ACCUMULATORS.get(function, (None, None))
+        if self._accumulator is not None and accumulator is not None \
+                and issubclass(self._accumulator, accumulator):
+            get_value = getter
+        else:
+            get_value = None
+
+        def cell_function(cell):
+            if cell.__class__ is list:
+                return function(cell)
+            if get_value is None:
+                raise exceptions.DKitDataException(
+                    messages.MSG_0032.format(getattr(function, "__name__", function))
+                )
+            return get_value(cell)
+
+        return cell_function
 
     def rows(self, function=None, missing=0):
         """
         Iterator for rows in pivot table.
 
         This _function can be used to recreate the pivot table
-        using a different _function or _missing value.
+        using a different _function or _missing value. When cells
+        are accumulated the function must be provided by the
+        accumulator used (e.g. min or max for a pivot created with sum).
         """
         function = function if function else self._function
         missing = missing if missing else self._missing
         row_keys = self._row_keys
         row_headings = self.row_headings
         col_headings = self._pivot_headings_raw()
+        cell_function = self._cell_function(function)
 
         for row_key in row_headings:
             retval = dict(zip(row_keys, row_key))
+            cells = self._ds[row_key]
             retval.update(
                 [
-                    (str(col_key), function(self._ds[row_key].get(col_key, [missing])))
+                    (str(col_key), cell_function(cells.get(col_key, [missing])))
                     for col_key in col_headings
                 ]
             )
@@ -22,13 +22,34 @@ Data matching classes and routines
 =========== =========== =================================================
 22 May 2017 Cobus Nel   Created
 23 May 2017 Cobus Nel   Added supporting functions and tests.
+19 Oct 2026 Cobus Nel   Added candidate blocking
+19 Oct 2026 Cobus Nel   Added batched and parallel scoring
 =========== =========== =================================================
 """
+import os
 import string
 import logging
+from bisect import bisect_left
+from collections import defaultdict, deque
+from itertools import islice
+from multiprocessing import Pool
+from operator import itemgetter
 from Levenshtein import ratio
 from dkit.data import manipulate as cm
 from dkit.utilities import instrumentation as ci
+from ..utilities.cmd_helper import LazyLoad
+
+try:
+    from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+except ImportError:
+    rf_process = None
+
+numpy = LazyLoad("numpy")
+
+# maximum size of the score matrix calculated at a time
+MATRIX_CELLS = 4_000_000
+# left hand rows scored at a time
+BATCH_SIZE = 1000
 
 
 logger = logging.getLogger(__name__)
@@ -126,8 +147,12 @@ class FieldSpec(object):
         score one instance of left and right using
         specified scoring mechanism.
         """
-        left_cleaned = self.prep_left(left_row)
-        right_cleaned = compare_values[self.index]
+        return self.score_cleaned(self.prep_left(left_row), compare_values[self.index])
+
+    def score_cleaned(self, left_cleaned, right_cleaned):
+        """
+        score cleaned left and right values
+        """
         if left_cleaned is None or right_cleaned is None:
             return 0
         else:
@@ -135,6 +160,357 @@ class FieldSpec(object):
             return r * self.contribution
 
 
+def soundex(word: str) -> str:
+    """
+    American soundex code of word
+
+    >>> soundex("Robert"), soundex("Rupert"), soundex("Tymczak")
+    ('R163', 'R163', 'T522')
+    """
+    codes = {}
+    for letters, digit in [("bfpv", "1"), ("cgjkqsxz", "2"), ("dt", "3"),
+                           ("l", "4"), ("mn", "5"), ("r", "6")]:
+        for letter in letters:
+            codes[letter] = digit
+    word = "".join(c for c in word.lower() if c.isalpha())
+    if not word:
+        return ""
+    retval = word[0].upper()
+    last = codes.get(word[0], "")
+    for c in word[1:]:
+        code = codes.get(c, "")
+        if code and code != last:
+            retval += code
+            if len(retval) == 4:
+                break
+        if c not in "hw":
+            last = code
+    return retval.ljust(4, "0")
+
+
+class AbstractBlocker(object):
+    """
+    Candidate blocking for DictMatcher
+
+    A blocker index the right hand rows and return the keys of
+    plausible candidates for a left hand row, so that only these
+    pairs are scored.
+
+    Args:
+        field_spec: FieldSpec that define the left and right fields
+    """
+    def __init__(self, field_spec: FieldSpec):
+        self.field_spec = field_spec
+
+    def clean_left(self, row):
+        return self.field_spec.prep_left(row)
+
+    def clean_right(self, row):
+        return self.field_spec.prep_right(row)
+
+    def fit(self, right_rows):
+        """
+        index iterable of (key, row) pairs for the right hand data
+        """
+        raise NotImplementedError
+
+    def candidates(self, left_row) -> set:
+        """keys of right hand candidates for left_row"""
+        raise NotImplementedError
+
+
+class _InvertedIndexBlocker(AbstractBlocker):
+    """
+    Blocker based on an inverted index of blocking keys
+
+    Args:
+        field_spec: FieldSpec that define the left and right fields
+        max_block_size: ignore blocking keys shared by more than this
+            number of right hand rows (0 for no limit)
+    """
+    def __init__(self, field_spec: FieldSpec, max_block_size: int = 0):
+        super().__init__(field_spec)
+        self.max_block_size = max_block_size
+        self.index = defaultdict(list)
+
+    def keys(self, value) -> set:
+        """blocking keys for value"""
+        raise NotImplementedError
+
+    def fit(self, right_rows):
+        self.index.clear()
+        for key, row in right_rows:
+            value = self.clean_right(row)
+            if value is not None:
+                for block_key in self.keys(value):
+                    self.index[block_key].append(key)
+        if self.max_block_size:
+            self.index = defaultdict(list, {
+                k: v for k, v in self.index.items() if len(v) <= self.max_block_size
+            })
+
+    def candidates(self, left_row) -> set:
+        value = self.clean_left(left_row)
+        retval = set()
+        if value is not None:
+            index = self.index
+            for block_key in self.keys(value):
+                if block_key in index:
+                    retval.update(index[block_key])
+        return retval
+
+
+class NGramBlocker(_InvertedIndexBlocker):
+    """
+    Block on shared character n-grams of the cleaned values
+
+    Args:
+        field_spec: FieldSpec that define the left and right fields
+        n: n-gram length
+        max_block_size: ignore n-grams shared by more than this
+            number of right hand rows (0 for no limit)
+    """
+    def __init__(self, field_spec: FieldSpec, n: int = 3, max_block_size: int = 0):
+        super().__init__(field_spec, max_block_size)
+        self.n = n
+
+    def keys(self, value) -> set:
+        n = self.n
+        if len(value) <= n:
+            return {value}
+        return {value[i:i + n] for i in range(len(value) - n + 1)}
+
+
+class TokenBlocker(_InvertedIndexBlocker):
+    """
+    Block on shared words
+
+    Words are extracted from the raw values (lower case, punctuation
+    removed) as FieldSpec cleaning may remove whitespace.
+
+    Args:
+        field_spec: FieldSpec that define the left and right fields
+        max_block_size: ignore words shared by more than this number of
+            right hand rows (0 for no limit)
+    """
+    def _tokens(self, value):
+        spec = self.field_spec
+        if value in spec.skip:
+            return None
+        value = str(value).lower()
+        if spec.translate_table is not None:
+            value = value.translate(spec.translate_table)
+        words = value.split()
+        if spec.stop_words is not None:
+            words = [w for w in words if w not in spec.stop_words]
+        return words
+
+    def clean_left(self, row):
+        return self._tokens(row[self.field_spec.left])
+
+    def clean_right(self, row):
+        return self._tokens(row[self.field_spec.right])
+
+    def keys(self, value) -> set:
+        return set(value)
+
+
+class PhoneticBlocker(TokenBlocker):
+    """
+    Block on shared soundex codes of words
+
+    Args:
+        field_spec: FieldSpec that define the left and right fields
+        max_block_size: ignore codes shared by more than this number of
+            right hand rows (0 for no limit)
+    """
+    def keys(self, value) -> set:
+        return {soundex(word) for word in value} - {""}
+
+
+class SortedNeighbourhoodBlocker(AbstractBlocker):
+    """
+    Sorted neighbourhood blocking
+
+    Right hand rows are sorted on the cleaned value. The candidates for
+    a left hand row are the `window` rows on either side of the
+    position of the left value in the sorted order.
+
+    Args:
+        field_spec: FieldSpec that define the left and right fields
+        window: number of neighbours on each side
+    """
+    def __init__(self, field_spec: FieldSpec, window: int = 10):
+        super().__init__(field_spec)
+        self.window = window
+        self.values = []
+        self.keys = []
+
+    def fit(self, right_rows):
+        pairs = sorted(
+            (
+                (value, key) for value, key in
+                ((self.clean_right(row), key) for key, row in right_rows)
+                if value is not None
+            ),
+            key=itemgetter(0)
+        )
+        self.values = [i[0] for i in pairs]
+        self.keys = [i[1] for i in pairs]
+
+    def candidates(self, left_row) -> set:
+        value = self.clean_left(left_row)
+        if value is None:
+            return set()
+        pos = bisect_left(self.values, value)
+        return set(self.keys[max(0, pos - self.window):pos + self.window])
+
+
+class _Scorer(object):
+    """
+    score left hand rows against the prepared right hand data
+
+    When rapidfuzz is available and the field specifications use the
+    default ratio, scores are calculated with the rapidfuzz cdist
+    (all pairs) or cpdist (blocked pairs) kernels using `workers`
+    threads. Otherwise pairs are scored one at a time.
+
+    Args:
+        field_spec: list of FieldSpec instances
+        right_data: dict of right hand key: cleaned values
+        blocking: list of fitted blockers
+        threshold: only return matches above this value (0-100)
+        workers: number of threads used by rapidfuzz (-1 for all)
+    """
+    def __init__(self, field_spec, right_data, blocking, threshold, workers=1):
+        self.field_spec = field_spec
+        self.right_data = right_data
+        self.blocking = blocking
+        self.threshold = threshold
+        self.workers = workers
+        self.keys = list(right_data)
+        self.position = {k: i for i, k in enumerate(self.keys)}
+        self.vectorised = rf_process is not None and all(
+            i.ratio is ratio for i in field_spec
+        )
+        if blocking and not hasattr(rf_process, "cpdist"):
+            self.vectorised = False
+
+    @property
+    def batch_size(self):
+        """number of left hand rows scored together"""
+        if self.vectorised and not self.blocking:
+            return max(1, MATRIX_CELLS // max(1, len(self.keys)))
+        return BATCH_SIZE
+
+    def candidates(self, left_row):
+        """right hand keys to score for left_row"""
+        if not self.blocking:
+            return self.keys
+        keys = set()
+        for blocker in self.blocking:
+            keys.update(blocker.candidates(left_row))
+        return sorted(keys, key=self.position.__getitem__)
+
+    def score_rows(self, rows):
+        """
+        score list of left hand rows
+
+        Returns:
+            list of [(right key, score), ...] for each row
+        """
+        if not self.vectorised:
+            return [self._score_row(row) for row in rows]
+        elif self.blocking:
+            return self._score_pairs(rows)
+        else:
+            return self._score_matrix(rows)
+
+    def _score_row(self, left_row):
+        # clean left hand values once per row
+        left_values = [(i, i.prep_left(left_row)) for i in self.field_spec]
+        retval = []
+        right_data = self.right_data
+        for right_key in self.candidates(left_row):
+            compare_values = right_data[right_key]
+            score = 100.0 * sum(
+                i.score_cleaned(left, compare_values[i.index]) for i, left in left_values
+            )
+            if score > self.threshold:
+                retval.append((right_key, score))
+        return retval
+
+    def _scores(self, spec, left, right, kernel):
+        """weighted scores with zero for None values"""
+        scores = kernel(
+            [i if i is not None else "" for i in left],
+            [i if i is not None else "" for i in right],
+            scorer=rf_fuzz.ratio, dtype=numpy.float64, workers=self.workers
+        )
+        scores *= spec.contribution
+        return scores
+
+    def _score_matrix(self, rows):
+        """score all pairs with cdist"""
+        right_values = list(self.right_data.values())
+        scores = numpy.zeros((len(rows), len(right_values)))
+        for spec in self.field_spec:
+            left = [spec.prep_left(row) for row in rows]
+            right = [i[spec.index] for i in right_values]
+            m = self._scores(spec, left, right, rf_process.cdist)
+            m[numpy.array([i is None for i in left], dtype=bool), :] = 0
+            m[:, numpy.array([i is None for i in right], dtype=bool)] = 0
+            scores += m
+        keys = self.keys
+        retval = []
+        for row_scores in scores:
+            idx = numpy.nonzero(row_scores > self.threshold)[0]
+            retval.append([(keys[j], float(row_scores[j])) for j in idx])
+        return retval
+
+    def _score_pairs(self, rows):
+        """score blocked pairs with cpdist"""
+        candidates = [self.candidates(row) for row in rows]
+        right_data = self.right_data
+        pair_keys = [k for keys in candidates for k in keys]
+        scores = numpy.zeros(len(pair_keys))
+        if pair_keys:
+            for spec in self.field_spec:
+                left = [
+                    value
+                    for row, keys in zip(rows, candidates)
+                    for value in [spec.prep_left(row)] * len(keys)
+                ]
+                right = [right_data[k][spec.index] for k in pair_keys]
+                m = self._scores(spec, left, right, rf_process.cpdist)
+                m[numpy.array([i is None for i in left], dtype=bool)] = 0
+                m[numpy.array([i is None for i in right], dtype=bool)] = 0
+                scores += m
+        retval = []
+        start = 0
+        for keys in candidates:
+            row_scores = scores[start:start + len(keys)]
+            retval.append([
+                (k, float(score)) for k, score in zip(keys, row_scores)
+                if score > self.threshold
+            ])
+            start += len(keys)
+        return retval
+
+
+# scorer for process pool workers
+_worker_scorer = None
+
+
+def _init_worker(scorer):
+    global _worker_scorer
+    _worker_scorer = scorer
+
+
+def _score_chunk(rows):
+    return _worker_scorer.score_rows(rows)
+
+
 class DictMatcher(object):
     """
     Link two datasets.
@@ -152,18 +528,28 @@ class DictMatcher(object):
         field_spec: list of FieldSpec instances
         threshold: only return matches above this value (0-100)
         count_trigger: period for triggering a log entry
+        blocking: list of blockers (e.g. NGramBlocker). Only right hand
+            rows returned by at least one blocker are scored. All pairs
+            are scored if not specified.
+        workers: number of rapidfuzz threads (-1 for all cores). If
+            rapidfuzz is not available (or a custom ratio function is
+            used), left hand rows are scored in chunks by a pool of
+            worker processes when workers is not 1.
 
     Yields:
         dicts with fields "left", "right", "probability"
     """
     def __init__(self, left, right, left_key, right_key, field_spec,
-                 threshold: float = 92.0, count_trigger: int = 1000):
+                 threshold: float = 92.0, count_trigger: int = 1000,
+                 blocking=None, workers: int = 1):
         self.left = left
         self.right = right
         self.left_key = left_key
         self.right_key = right_key
         self.field_spec = field_spec
         self.threshold = threshold
+        self.blocking = blocking or []
+        self.workers = workers
         self.right_data = {}
         self.stats = ci.CounterLogger(logger=__name__, trigger=count_trigger)
         self.__cached = None
@@ -191,31 +577,58 @@ class DictMatcher(object):
             field_spec.contribution = float(field_spec.contribution) / total_contribution
 
         # build right hand data
+        right_rows = []
+        self.right_data = {}
         for row in self.right:
             self.right_data[row[self.right_key]] =\
                 [i.prep_right(row) for i in self.field_spec]
+            if self.blocking:
+                right_rows.append((row[self.right_key], row))
+
+        for blocker in self.blocking:
+            blocker.fit(right_rows)
         logger.info("Preparation complete")
 
+    def _iter_scored(self, scorer):
+        """yield (left row, [(right key, score), ...])"""
+        i_left = iter(self.left)
+        chunks = iter(lambda: list(islice(i_left, scorer.batch_size)), [])
+        if scorer.vectorised or self.workers == 1:
+            for rows in chunks:
+                yield from zip(rows, scorer.score_rows(rows))
+        else:
+            processes = self.workers if self.workers > 0 else os.cpu_count()
+            with Pool(processes, initializer=_init_worker, initargs=(scorer,)) as pool:
+                # at most 2 chunks per process are in flight so that memory
+                # is bounded when scoring is slower than reading
+                pending = deque()
+                for rows in chunks:
+                    pending.append((rows, pool.apply_async(_score_chunk, (rows,))))
+                    if len(pending) >= 2 * processes:
+                        rows, scored = pending.popleft()
+                        yield from zip(rows, scored.get())
+                while pending:
+                    rows, scored = pending.popleft()
+                    yield from zip(rows, scored.get())
+
     def __iter__(self):
         """iter"""
         self.__initialize()
         logger.info("Start matching")
         self.stats.start()
-        for left_row in self.left:
-            candidates = []
-            for right_key, compare_values in self.right_data.items():
-                score = 100.0 * sum(i.score(left_row, compare_values) for i in self.field_spec)
-                if score > self.threshold:
-                    retval = {
-                        "m.left.key": left_row[self.left_key],
-                        "m.right.key": right_key,
-                        "m.score": score,
-                    }
-                    candidates.append(retval)
-            no_candidates = len(candidates)
-            for i, candidate in enumerate(candidates):
-                candidate["m.rank"] = "{} of {}".format(i+1, no_candidates)
-                yield candidate
+        scorer = _Scorer(
+            self.field_spec, self.right_data, self.blocking, self.threshold,
+            self.workers
+        )
+        for left_row, matches in self._iter_scored(scorer):
+            no_candidates = len(matches)
+            for i, (right_key, score) in enumerate(matches):
+                yield {
+                    "m.left.key": left_row[self.left_key],
+                    "m.right.key": right_key,
+                    "m.score": score,
+                    "m.rank": "{} of {}".format(i+1, no_candidates),
+                }
             self.stats.increment()
         self.stats.stop()
 
@@ -23,15 +23,22 @@
 # 26 Apr 2018 Cobus Nel       updated for iterators
 # 29 Oct 2018 Cobus Nel       updated with support for TDigest to calculate
 #                             quantiles
+# 19 Oct 2026 Cobus Nel       added lightweight accumulators
+# 19 Oct 2026 Cobus Nel       added sketch accumulators
+# 19 Oct 2026 Cobus Nel       added push_many, array backed BufferAccumulator
 # =========== =============== =================================================
 
 """
 Statistical utilities
 
 """
+import copy
 import sys
 import cython
+from array import array
+from itertools import islice
 from dkit.algorithms import tdigest
+from dkit.algorithms.probabilistic import HyperLogLog, SpaceSaving
 import math
 from boltons.statsutils import Stats
 from decimal import Decimal
@@ -39,6 +46,20 @@ from ..utilities.cmd_helper import LazyLoad
 
 numpy = LazyLoad("numpy")
 
+# HyperLogLog precision used by DistinctAccumulator (0.8% standard error)
+HLL_PRECISION = 14
+
+# values converted to an array at a time by push_many
+PUSH_CHUNK_SIZE = 100_000
+
+
+def _float_array(values):
+    """
+    values as float64 numpy array with None and NaN values removed
+    """
+    arr = numpy.asarray(values, dtype=float).ravel()
+    return arr[~numpy.isnan(arr)]
+
 
 def quantile_bins(values, n_quantiles=10, strict=False):
     """compute n quantile bins
@@ -77,6 +98,12 @@ def quantile_bins(values, n_quantiles=10, strict=False):
 class AbstractAccumulator(object):
     """base class for accumulators"""
 
+    # Capability of the accumulator. An accumulator provide all the
+    # statistics of accumulators with a lower level.
+    level = 0
+    # accept numeric values only (sketches accept any hashable value)
+    numeric = True
+
     def as_map(self):
         """
         statistics as dictionary
@@ -111,6 +138,31 @@ class AbstractAccumulator(object):
         for value in values:
             self.push(value)
 
+    def push_many(self, values):
+        """
+        push a batch of values
+
+        values can be a list, NumPy array or any iterable. Iterables
+        without a length are consumed in chunks of PUSH_CHUNK_SIZE.
+
+        >>> a = Accumulator()
+        >>> a.push_many(numpy.arange(10))
+        >>> print(a.stdev)
+        3.02765
+        """
+        if hasattr(values, "__len__"):
+            self._push_batch(values)
+        else:
+            i_values = iter(values)
+            chunk = list(islice(i_values, PUSH_CHUNK_SIZE))
+            while chunk:
+                self._push_batch(chunk)
+                chunk = list(islice(i_values, PUSH_CHUNK_SIZE))
+
+    def _push_batch(self, values):
+        """push a batch of values, override for vectorised implementations"""
+        self.consume(values.tolist() if hasattr(values, "tolist") else values)
+
     def __call__(self, values):
         """
         consume values in iterable and yield back
@@ -139,24 +191,55 @@ class AbstractAccumulator(object):
 
 
 class BufferAccumulator(AbstractAccumulator):
+    """
+    Accumulator that keep all values for exact statistics
+
+    Values are stored as doubles in an array.array buffer.
+
+    >>> a = BufferAccumulator(range(10))
+    >>> a.median, a.observations
+    (4.5, 10)
+
+    When no values are pushed mean, stdev and variance are 0, sum is 0
+    and min, max and quantiles raise (ValueError and IndexError).
+    """
+    level = 3
 
     def __init__(self, values=None, precision: int = 5):
-        self.buffer_ = values if values else []
+        self._buffer = array("d")
         self.precision = precision
+        if values is not None:
+            self.push_many(values)
+
+    @property
+    def buffer_(self):
+        """values as numpy array (a copy of the buffer)"""
+        return numpy.array(self._buffer, dtype=float)
+
+    def _view(self):
+        """
+        numpy view of the buffer
+
+        the buffer can not be resized while a view exist, views must
+        not be retained
+        """
+        return numpy.frombuffer(self._buffer, dtype=float)
 
     @property
     def mean(self):
         """
         sample mean
         """
-        return round(numpy.mean(self.buffer_), self.precision)
+        if not self._buffer:
+            return 0.0
+        return round(float(numpy.mean(self._view())), self.precision)
 
     def quantile(self, q):
         """
         quantile at value
         """
         return round(
-            numpy.quantile(self.buffer_, q),
+            float(numpy.quantile(self._view(), q)),
             self.precision
         )
 
@@ -173,7 +256,7 @@ class BufferAccumulator(AbstractAccumulator):
         """
         maximum value
         """
-        return max(self.buffer_)
+        return float(numpy.max(self._view()))
 
     @property
     def median(self):
@@ -185,27 +268,31 @@ class BufferAccumulator(AbstractAccumulator):
         """
         minimum value
         """
-        return min(self.buffer_)
+        return float(numpy.min(self._view()))
 
     @property
     def observations(self):
         """
         number of observations
         """
-        return len(self.buffer_)
+        return len(self._buffer)
 
     @property
     def sum(self):
         """sum of values"""
-        return sum(self.buffer_)
+        if not self._buffer:
+            return 0
+        return math.fsum(self._buffer)
 
     @property
     def stdev(self):
         """
         sample standard deviation
         """
+        if not self._buffer:
+            return 0.0
         return round(
-            numpy.std(self.buffer_),
+            float(numpy.std(self._view())),
             self.precision
         )
 
@@ -214,8 +301,10 @@ class BufferAccumulator(AbstractAccumulator):
         """
         sample variance
         """
+        if not self._buffer:
+            return 0
         return round(
-            numpy.var(self.buffer_),
+            float(numpy.var(self._view())),
             self.precision
         )
 
@@ -223,15 +312,24 @@ class BufferAccumulator(AbstractAccumulator):
         """
         Feed a value to the Collector.
 
-        :param value: add value added to counters.
+        :param value: add value added to counters. None values are ignored
         :type value: float/int
         """
-        self.buffer_.append(value)
+        if value is not None:
+            self._buffer.append(float(value))
+
+    def _push_batch(self, values):
+        self._buffer.frombytes(_float_array(values).tobytes())
 
     def merge(self, other):
-        self.buffer.extend(other)
+        """merge other instance into this instance"""
+        self._buffer.extend(other._buffer)
         return self
 
+    def __add__(self, o):
+        """merge two instances"""
+        return copy.deepcopy(self).merge(o)
+
 
 class Accumulator(AbstractAccumulator):
     """
@@ -268,6 +366,8 @@ class Accumulator(AbstractAccumulator):
     Refer to additional examples, below
 
     """
+    level = 3
+
     def __init__(self, values=[], precision: int = 5):
         """
         Constructor
@@ -283,31 +383,59 @@ class Accumulator(AbstractAccumulator):
 
     def __add__(self, o):
         """merge two instances"""
-        a1 = self.from_dict(self.as_dict())
+        return self.from_dict(self.as_dict()).merge(o)
+
+    def merge(self, o):
+        """
+        merge other instance into this instance
 
-        n1 = self.observations
-        n2 = o.observations
+        `_std` hold the sum of squared deviations from the mean (M2) and
+        is combined with the parallel algorithm of Chan et al.
 
-        if n1 == 0 and n2 == 0:
-            return a1
+        Refer to:
+            * https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance
+        """
+        if o._observations == 0:
+            return self
+        self._merge_moments(o._observations, o._mean, o._std, o._min, o._max)
+        self._tdigest.merge(o._tdigest)
+        return self
+
+    def _merge_moments(self, n2, mean, m2, minimum, maximum):
+        """combine moments of a partition with n2 observations"""
+        n1 = self._observations
         if n1 == 0:
-            return o.from_dict(o.as_dict())
-        if n2 == 0:
-            return a1
-
-        a1._mean = (self._observations * self._mean + o._observations * o.mean) / \
-            (n1 + n2)
-        a1._std = math.sqrt((((n1-1)*(a1._std ** 2)) + ((n2-1)*(o._std ** 2)))/(n1+n2-2))
-        a1._min = min(self._min, o._min)
-        a1._max = max(self._max, o._max)
-        a1._observations = n1 + n2
-        a1._tdigest.merge(o._tdigest)
-        return a1
+            self._mean = mean
+            self._std = m2
+        else:
+            n = n1 + n2
+            delta = mean - self._mean
+            self._mean += delta * n2 / n
+            self._std += m2 + delta * delta * n1 * n2 / n
+        self._min = min(self._min, minimum)
+        self._max = max(self._max, maximum)
+        self._observations = n1 + n2
+
+    def _push_batch(self, values):
+        """
+        vectorised push
+
+        the moments of the batch are combined with the existing
+        moments and the values are inserted in the t-digest as
+        a buffer.
+        """
+        arr = _float_array(values)
+        if len(arr) == 0:
+            return
+        mean = float(arr.mean())
+        m2 = float(numpy.square(arr - mean).sum())
+        self._merge_moments(len(arr), mean, m2, float(arr.min()), float(arr.max()))
+        self._tdigest.insert_many(arr)
 
     def as_dict(self):
         """dict representation for serialisation
 
-        the t_digest cannot be pickled
+        the t_digest is represented as a dictionary
         """
         rv = dict(self.__dict__)
         rv["digest"] = rv.pop("_tdigest").as_dict()
@@ -433,3 +561,304 @@ class Accumulator(AbstractAccumulator):
             self._mean = _value
             self._std = 0.0
         self._tdigest.insert(_value)
+
+
+class CountAccumulator(AbstractAccumulator):
+    """
+    Lightweight accumulator that only count observations
+
+    None values are ignored, consistent with Accumulator.
+
+    >>> a = CountAccumulator([1, None, "a", 3])
+    >>> a.observations
+    3
+    """
+    level = 0
+
+    def __init__(self, values=[], precision: int = 5):
+        self.precision: int = precision
+        self._observations: cython.long = 0
+        self.consume(values)
+
+    @property
+    def observations(self):
+        """
+        number of observations
+        """
+        return self._observations
+
+    def push(self, value, strict=False):
+        """
+        Feed a value to the Collector.
+
+        Args:
+            - value: value to count. None values are ignored
+        """
+        if value is not None:
+            self._observations += 1
+
+    def __add__(self, o):
+        """merge two instances"""
+        return copy.deepcopy(self).merge(o)
+
+    def _summary(self):
+        """summary statistics in the form accepted by merge_summary"""
+        return (self._observations,)
+
+    def merge(self, o):
+        """merge other instance into this instance"""
+        self.merge_summary(*o._summary())
+        return self
+
+    def merge_summary(self, observations, total=0.0, minimum=None, maximum=None,
+                      m2=0.0):
+        """
+        merge summary statistics computed for a partition of values
+
+        Used to update the accumulator from vectorised computations.
+
+        Args:
+            - observations: number of (non null) values
+            - total: sum of values
+            - minimum: minimum value
+            - maximum: maximum value
+            - m2: sum of squared deviations from the partition mean
+        """
+        self._observations += observations
+
+
+class DistinctAccumulator(CountAccumulator):
+    """
+    Count distinct values with a HyperLogLog sketch
+
+    >>> a = DistinctAccumulator(["a", "b", "a", None])
+    >>> a.distinct
+    2
+    """
+    numeric = False
+
+    def __init__(self, values=[], precision: int = 5):
+        self._hll = HyperLogLog(HLL_PRECISION)
+        super().__init__(values, precision)
+
+    @property
+    def distinct(self):
+        """estimated number of distinct values"""
+        return self._hll.cardinality()
+
+    def push(self, value, strict=False):
+        if value is not None:
+            self._observations += 1
+            self._hll.add(value)
+
+    def merge(self, o):
+        self._observations += o._observations
+        self._hll.merge(o._hll)
+        return self
+
+
+class TopKAccumulator(CountAccumulator):
+    """
+    Most frequent values with a Space-Saving sketch
+
+    >>> a = TopKAccumulator("aaabbc")
+    >>> a.top(2)
+    [('a', 3), ('b', 2)]
+
+    Args:
+        - values: initial values
+        - capacity: number of counters maintained
+    """
+    numeric = False
+
+    def __init__(self, values=[], precision: int = 5, capacity: int = 100):
+        self._sketch = SpaceSaving(capacity)
+        super().__init__(values, precision)
+
+    def top(self, k: int):
+        """list of (value, count) for the k most frequent values"""
+        return self._sketch.top(k)
+
+    def push(self, value, strict=False):
+        if value is not None:
+            self._observations += 1
+            self._sketch.add(value)
+
+    def merge(self, o):
+        self._observations += o._observations
+        self._sketch.merge(o._sketch)
+        return self
+
+
+class SumAccumulator(CountAccumulator):
+    """
+    Lightweight accumulator for count, sum, min and max
+
+    >>> a = SumAccumulator([1, 2, None, 3.5])
+    >>> a.sum, a.min, a.max
+    (6.5, 1.0, 3.5)
+    """
+    level = 1
+
+    def __init__(self, values=[], precision: int = 5):
+        self._min: float = sys.float_info.max
+        self._max: float = -sys.float_info.max
+        self._sum: float = 0.0
+        super().__init__(values, precision)
+
+    @property
+    def max(self):
+        """
+        maximum value
+        """
+        return self._max
+
+    @property
+    def min(self):
+        """
+        minimum value
+        """
+        return self._min
+
+    @property
+    def sum(self):
+        """sum of values"""
+        return round(self._sum, self.precision)
+
+    def push(self, value, strict=False):
+        """
+        Feed a value to the Collector.
+
+        Args:
+            - value: add value added to counters. None values are ignored
+        """
+        if value is None:
+            return
+        _value = float(value)
+        if _value < self._min:
+            self._min = _value
+        if _value > self._max:
+            self._max = _value
+        self._observations += 1
+        self._sum += _value
+
+    def _push_batch(self, values):
+        """vectorised push using merge_summary"""
+        arr = _float_array(values)
+        if len(arr) > 0:
+            m2 = float(numpy.square(arr - arr.mean()).sum())
+            self.merge_summary(
+                len(arr), float(arr.sum()), float(arr.min()), float(arr.max()), m2
+            )
+
+    def _summary(self):
+        """summary statistics in the form accepted by merge_summary"""
+        return (self._observations, self._sum, self._min, self._max)
+
+    def merge_summary(self, observations, total=0.0, minimum=None, maximum=None,
+                      m2=0.0):
+        """
+        merge summary statistics computed for a partition of values
+
+        Refer to CountAccumulator.merge_summary
+        """
+        if observations == 0:
+            return
+        if minimum < self._min:
+            self._min = minimum
+        if maximum > self._max:
+            self._max = maximum
+        self._observations += observations
+        self._sum += total
+
+
+class MomentAccumulator(SumAccumulator):
+    """
+    Lightweight accumulator for count, sum, min, max, mean and variance
+
+    Use Accumulator if quantiles are required.
+
+    >>> a = MomentAccumulator(range(10))
+    >>> a.mean, a.stdev
+    (4.5, 3.02765)
+    """
+    level = 2
+
+    def __init__(self, values=[], precision: int = 5):
+        self._mean: float = 0.0
+        self._std: float = 0.0
+        super().__init__(values, precision)
+
+    @property
+    def mean(self):
+        """
+        sample mean
+        """
+        if self._observations > 0:
+            return round(self._mean, self.precision)
+        else:
+            return 0.0
+
+    @property
+    def stdev(self):
+        """
+        sample standard deviation
+        """
+        return round(math.sqrt(self.variance), self.precision)
+
+    @property
+    def variance(self):
+        """
+        sample variance
+        """
+        if self._observations > 1:
+            return round(self._std / (self._observations - 1), self.precision)
+        else:
+            return 0
+
+    def push(self, value, strict=False):
+        """
+        Feed a value to the Collector.
+
+        Args:
+            - value: add value added to counters. None values are ignored
+
+        Refer to Accumulator.push for the variance algorithm.
+        """
+        if value is None:
+            return
+        _value = float(value)
+        if _value < self._min:
+            self._min = _value
+        if _value > self._max:
+            self._max = _value
+        self._observations += 1
+        self._sum += _value
+        delta = _value - self._mean
+        self._mean += delta / self._observations
+        self._std += delta * (_value - self._mean)
+
+    def _summary(self):
+        """summary statistics in the form accepted by merge_summary"""
+        return (self._observations, self._sum, self._min, self._max, self._std)
+
+    def merge_summary(self, observations, total=0.0, minimum=None, maximum=None,
+                      m2=0.0):
+        """
+        merge summary statistics computed for a partition of values
+
+        The mean and sum of squared deviations are combined with the
+        parallel algorithm of Chan et al.
+
+        Refer to:
+            * https://en.wikipedia.org/wiki/Algorithms_for_calculating_variance
+        """
+        if observations == 0:
+            return
+        n1 = self._observations
+        n = n1 + observations
+        other_mean = total / observations
+        delta = other_mean - self._mean
+        self._mean += delta * observations / n
+        self._std += m2 + delta * delta * n1 * observations / n
+        super().merge_summary(observations, total, minimum, maximum, m2)
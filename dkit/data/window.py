@@ -1,11 +1,11 @@
 from abc import ABC
-from collections import defaultdict, deque
-from statistics import median
-from scipy.stats import linregress
-from ..compatibility import fmean, fsum
+from bisect import bisect_left, insort
+from collections import OrderedDict, deque
+from math import fsum
 
 __all__ = [
     "MovingWindow",
+    "TimeWindow",
     "Average",
     "Gradient",
     "Median",
@@ -16,6 +16,18 @@ __all__ = [
 ]
 
 
+class _Partition(object):
+    """window values and function states for one partition"""
+    __slots__ = ["windows", "states", "times", "start", "last"]
+
+    def __init__(self, fields, functions):
+        self.windows = {field: deque() for field in fields}
+        self.states = [fn.new_state(self.windows[fn.field]) for fn in functions]
+        self.times = deque()
+        self.start = None
+        self.last = None
+
+
 class MovingWindow(ABC):
     """
     Moving Window
@@ -42,17 +54,50 @@ class MovingWindow(ABC):
         else:
             return 0
 
+    def _get_partition(self, partitions, key, row):
+        """retrieve partition for key, creating it if required"""
+        partition = partitions.get(key)
+        if partition is None:
+            partition = partitions[key] = _Partition(self.fields, self.functions)
+        return partition
+
+    def _advance(self, partition, row):
+        """
+        number of values to evict before row is added
+
+        Returns:
+            tuple of (number evicted, window complete after adding row)
+        """
+        if not partition.windows:
+            return 0, True
+        n = len(next(iter(partition.windows.values())))
+        evict = 1 if n >= self.lag else 0
+        return evict, n - evict + 1 >= self.lag
+
     def __call__(self, *sources):
-        fields = set(i.field for i in self.functions)
-        accumulators = defaultdict(lambda: defaultdict(lambda: deque(maxlen=self.lag)))
+        functions = self.functions
+        self.fields = fields = set(i.field for i in functions)
+        partitions = OrderedDict()
 
         for source in sources:
             for row in source:
                 key = self.get_key(row)
+                partition = self._get_partition(partitions, key, row)
+                n_evict, complete = self._advance(partition, row)
+                windows = partition.windows
+                evicted = {}
                 for field in fields:
-                    acc = accumulators[key]
-                    acc[field].append(row[field])
-                updates = any([fn.update(acc, row) for fn in self.functions])
+                    values = windows[field]
+                    evicted[field] = [values.popleft() for _ in range(n_evict)]
+                    values.append(row[field])
+                updates = False
+                for fn, state in zip(functions, partition.states):
+                    if state is not None:
+                        for value in evicted[fn.field]:
+                            state.pop(value)
+                        state.push(row[fn.field])
+                    if fn.update(state, windows[fn.field], complete, row):
+                        updates = True
                 if updates:
                     yield row
                 elif not self.truncate:
@@ -63,10 +108,208 @@ class MovingWindow(ABC):
         return self
 
 
+class TimeWindow(MovingWindow):
+    """
+    Moving window over a time (or other ordered) field
+
+    The window contain all rows with time in the range
+    (t - duration, t]. Rows are expected in time order per partition.
+    Window functions return `na` until the partition has been observed
+    for at least `duration`.
+
+    When timeout is specified, partitions that did not receive a row for
+    longer than timeout (relative to the latest time observed) are
+    discarded to bound memory. Rows are then expected in time order
+    across partitions.
+
+    Args:
+        field: time field
+        duration: window duration (e.g. timedelta(minutes=15))
+        truncate: do not yield rows before the window is complete
+        timeout: discard partitions idle for longer than timeout
+    """
+
+    def __init__(self, field, duration, truncate=False, timeout=None):
+        super().__init__(0, truncate)
+        self.time_field = field
+        self.duration = duration
+        self.timeout = timeout
+
+    def _get_partition(self, partitions, key, row):
+        now = row[self.time_field]
+        if self.timeout is not None:
+            expiry = now - self.timeout
+            while partitions:
+                oldest = next(iter(partitions.values()))
+                if oldest.last >= expiry:
+                    break
+                partitions.popitem(last=False)
+        partition = super()._get_partition(partitions, key, row)
+        if self.timeout is not None:
+            partitions.move_to_end(key)
+        if partition.start is None:
+            partition.start = now
+        partition.last = now
+        return partition
+
+    def _advance(self, partition, row):
+        now = row[self.time_field]
+        times = partition.times
+        cutoff = now - self.duration
+        evict = 0
+        while times and times[0] <= cutoff:
+            times.popleft()
+            evict += 1
+        times.append(now)
+        return evict, now - partition.start >= self.duration
+
+
+class _RunningSum(object):
+    """
+    exact running sum of the window
+
+    Maintain the Shewchuk partials of the window so that values can be
+    added and removed without loss of precision. The result is
+    identical to calling fsum on the window.
+    """
+    def __init__(self, values):
+        self.partials = []
+
+    def _add(self, x):
+        partials = self.partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def push(self, value):
+        self._add(float(value))
+
+    def pop(self, value):
+        self._add(-float(value))
+
+    @property
+    def value(self):
+        return fsum(self.partials)
+
+
+class _MonotonicQueue(object):
+    """
+    monotonic deque of window extremes
+
+    The front of the queue is the maximum (or minimum when
+    reverse is True) of the window.
+    """
+    def __init__(self, values, reverse=False):
+        self.queue = deque()
+        self.reverse = reverse
+
+    def push(self, value):
+        queue = self.queue
+        if self.reverse:
+            while queue and queue[-1] > value:
+                queue.pop()
+        else:
+            while queue and queue[-1] < value:
+                queue.pop()
+        queue.append(value)
+
+    def pop(self, value):
+        queue = self.queue
+        if queue and queue[0] == value:
+            queue.popleft()
+
+    @property
+    def value(self):
+        return self.queue[0]
+
+
+class _SortedWindow(object):
+    """sorted copy of the window for order statistics"""
+    def __init__(self, values):
+        self.ordered = []
+
+    def push(self, value):
+        insort(self.ordered, value)
+
+    def pop(self, value):
+        ordered = self.ordered
+        del ordered[bisect_left(ordered, value)]
+
+    @property
+    def value(self):
+        ordered = self.ordered
+        n = len(ordered)
+        i = n // 2
+        if n % 2 == 1:
+            return ordered[i]
+        return (ordered[i - 1] + ordered[i]) / 2
+
+
+class _RunningRegression(object):
+    """
+    least squares slope of the window against positions 0..n-1
+
+    Maintain sum(y) and sum(i * y). When a value is removed from the
+    front of the window the position of each remaining value decrease
+    by one so that:
+
+        sum_iy' = sum_iy - sum_y'
+
+    The sums are recalculated from the window every n updates to
+    limit accumulation of rounding errors.
+    """
+    def __init__(self, values):
+        self.values = values
+        self.n = 0
+        self.sum_y = 0.0
+        self.sum_iy = 0.0
+        self.updates = 0
+
+    def push(self, value):
+        value = float(value)
+        self.sum_iy += self.n * value
+        self.sum_y += value
+        self.n += 1
+        self.updates += 1
+        if self.updates >= self.n:
+            self.updates = 0
+            y = [float(i) for i in self.values]
+            self.sum_y = fsum(y)
+            self.sum_iy = fsum(i * v for i, v in enumerate(y))
+
+    def pop(self, value):
+        self.n -= 1
+        self.sum_y -= float(value)
+        self.sum_iy -= self.sum_y
+
+    @property
+    def value(self):
+        n = self.n
+        sxx = n * (n * n - 1) / 12
+        if sxx == 0:
+            return float("nan")
+        return (self.sum_iy - (n - 1) / 2 * self.sum_y) / sxx
+
+
 class AbstractWindowFunction(ABC):
+    """
+    Base class for window functions
 
+    Functions that define `state` is updated incrementally with
+    each value that enter (push) or leave (pop) the window. Other
+    functions call `function` with the window values on each row.
+    """
     function = None
     prefix = None
+    state = None
 
     def __init__(self, field, alias=None, na=0):
         self.field = field
@@ -78,13 +321,21 @@ class AbstractWindowFunction(ABC):
         self._alias = name
         return self
 
-    def update(self, accumulator, row):
-        values = accumulator[self.field]
-        if len(values) < self.lag:
+    def new_state(self, values):
+        """incremental state for a partition window"""
+        return self.state(values) if self.state is not None else None
+
+    def evaluate(self, state, values):
+        if state is not None:
+            return state.value
+        return self.function(values)
+
+    def update(self, state, values, complete, row):
+        if not complete:
             row[self._alias] = self.na
             return False
         else:
-            row[self._alias] = self.function(values)
+            row[self._alias] = self.evaluate(state, values)
             return True
 
     def _modify_(self, other):
@@ -102,15 +353,10 @@ class Average(AbstractWindowFunction):
 
     """
     prefix = "ma"
+    state = _RunningSum
 
-    def update(self, accumulator, row):
-        values = accumulator[self.field]
-        if len(values) < self.lag:
-            row[self._alias] = self.na
-            return False
-        else:
-            row[self._alias] = fmean(values)
-            return True
+    def evaluate(self, state, values):
+        return state.value / len(values)
 
 
 class Gradient(AbstractWindowFunction):
@@ -123,17 +369,7 @@ class Gradient(AbstractWindowFunction):
 
     """
     prefix = "gr"
-
-    def update(self, accumulator, row):
-        values = accumulator[self.field]
-        if len(values) < self.lag:
-            row[self._alias] = self.na
-            return False
-        else:
-            # found linregress will not work with Decimal values....
-            # f = [float(i) for i in values]
-            row[self._alias] = linregress(list(range(self.lag)), values)[0]
-            return True
+    state = _RunningRegression
 
 
 class Median(AbstractWindowFunction):
@@ -146,15 +382,7 @@ class Median(AbstractWindowFunction):
 
     """
     prefix = "median"
-
-    def update(self, accumulator, row):
-        values = accumulator[self.field]
-        if len(values) < self.lag:
-            row[self._alias] = self.na
-            return False
-        else:
-            row[self._alias] = median(values)
-            return True
+    state = _SortedWindow
 
 
 class Last(AbstractWindowFunction):
@@ -168,8 +396,7 @@ class Last(AbstractWindowFunction):
     """
     prefix = "last"
 
-    def update(self, accumulator, row):
-        values = accumulator[self.field]
+    def update(self, state, values, complete, row):
         row[self._alias] = values[-1]
         if len(values) > 0:
             return False
@@ -186,8 +413,8 @@ class Sum(AbstractWindowFunction):
         - na: use this value as na (default 0)
 
     """
-    function = fsum
     prefix = "sum"
+    state = _RunningSum
 
 
 class Max(AbstractWindowFunction):
@@ -199,8 +426,8 @@ class Max(AbstractWindowFunction):
         - na: use this value as na (default 0)
 
     """
-    function = max
     prefix = "max"
+    state = _MonotonicQueue
 
 
 class Min(AbstractWindowFunction):
@@ -212,5 +439,7 @@ class Min(AbstractWindowFunction):
         - na: use this value as na (default 0)
 
     """
-    function = min
     prefix = "min"
+
+    def new_state(self, values):
+        return _MonotonicQueue(values, reverse=True)
@@ -35,6 +35,8 @@ Mar 2026    Cobus Nel       Refactor:
                             - typing
                             - tests
                             - logic errors
+Oct 2026    Cobus Nel       Columnar batch building and native
+                            schema inference
 =========== =============== =================================================
 """
 import logging
@@ -45,6 +47,7 @@ from os import path
 from typing import Any
 
 import pyarrow as pa
+import pyarrow.compute as pc
 from jinja2 import Template
 from pyarrow.fs import FileSystem, LocalFileSystem, S3FileSystem, AwsDefaultS3RetryStrategy
 
@@ -62,6 +65,9 @@ pq = LazyLoad("pyarrow.parquet")
 
 logger = logging.getLogger("ext_arrow")
 
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+
 
 __all__ = [
     "ArrowSchemaGenerator",
@@ -69,10 +75,12 @@ __all__ = [
     "ParquetSink",
     "ParquetSource",
     "auto_write_parquet",
+    "build_columnar_table",
     "build_table",
     "clear_partition_data",
     "infer_and_coerce_arrow_schema",
     "infer_arrow_schema",
+    "infer_native_arrow_schema",
     "make_arrow_schema",
     "make_partition_path",
     "write_chunked_datasets",
@@ -395,6 +403,141 @@ def build_table(data: RowIterable, schema=None, micro_batch_size=CHUNK_SIZE) ->
     )
 
 
+def _rows_to_columns(
+    rows: Sequence[Row], names: Sequence[str] | None = None
+) -> dict[str, list]:
+    """
+    Transpose a chunk of row dictionaries to column lists.
+
+    Args:
+        rows: Row dictionaries.
+        names: Column names to extract. When omitted, the union of row keys
+            in order of first appearance is used.
+
+    Returns:
+        A mapping of column names to value lists. Keys missing from a row
+        are filled with ``None``.
+    """
+    if names is None:
+        names = list(dict.fromkeys(chain.from_iterable(rows)))
+    return {name: [row.get(name) for row in rows] for name in names}
+
+
+def _canonical_arrow_type(values: pa.Array) -> pa.DataType:
+    """
+    Map the type PyArrow inferred for a column to the type that
+    ``make_arrow_schema`` would produce for the same canonical field.
+
+    Integers are narrowed to ``int32`` unless the sampled values require
+    ``int64``. Decimals use the ``make_decimal`` defaults, widened only when
+    the sample needs more precision or scale. Nested types are kept as
+    inferred.
+
+    Args:
+        values: Column sample converted with ``pyarrow.array``.
+
+    Returns:
+        The Arrow type used for the column.
+    """
+    arrow_type = values.type
+    types = pa.types
+    if types.is_null(arrow_type) or types.is_string(arrow_type) \
+            or types.is_large_string(arrow_type):
+        definition = {"type": "string"}
+    elif types.is_boolean(arrow_type):
+        definition = {"type": "boolean"}
+    elif types.is_integer(arrow_type):
+        bounds = pc.min_max(values)
+        lo, hi = bounds["min"].as_py(), bounds["max"].as_py()
+        if lo is not None and (lo < INT32_MIN or hi > INT32_MAX):
+            definition = {"type": "int64"}
+        else:
+            definition = {"type": "integer"}
+    elif types.is_floating(arrow_type):
+        definition = {"type": "float"}
+    elif types.is_decimal(arrow_type):
+        scale = max(2, arrow_type.scale)
+        precision = max(12, arrow_type.precision - arrow_type.scale + scale)
+        definition = {"type": "decimal", "precision": precision, "scale": scale}
+    elif types.is_timestamp(arrow_type):
+        definition = {"type": "datetime"}
+    elif types.is_date(arrow_type):
+        definition = {"type": "date"}
+    elif types.is_binary(arrow_type) or types.is_large_binary(arrow_type):
+        definition = {"type": "binary"}
+    else:
+        return arrow_type
+    return ARROW_TYPE_SPECS[definition["type"]]["runtime"](definition)
+
+
+def infer_native_arrow_schema(
+    iterable: RowIterable, n: int = 50
+) -> tuple[pa.Schema, Iterator[Row]]:
+    """
+    Infer an Arrow schema from sampled rows using PyArrow type inference.
+
+    The sample is transposed to column lists once and each column is
+    converted with ``pyarrow.array``, which unifies types over the sample
+    (e.g. ``int`` and ``float`` values become floating point). The inferred
+    types are mapped to the same Arrow types produced by
+    ``make_arrow_schema`` so that the result is a drop-in replacement for
+    ``infer_arrow_schema``. Columns with values that cannot be unified are
+    typed as strings.
+
+    Args:
+        iterable: Input row iterator.
+        n: Number of rows to sample for inference.
+
+    Returns:
+        A tuple of ``(schema, iterable)``, where ``schema`` is the inferred
+        ``pyarrow.Schema`` and the returned iterable yields the sampled rows
+        followed by the remaining input rows unchanged.
+    """
+    i = iter(iterable)
+    buffer = list(islice(i, n))
+    fields = []
+    for name, values in _rows_to_columns(buffer).items():
+        try:
+            arrow_type = _canonical_arrow_type(pa.array(values))
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            logger.debug(f"unable to unify types for field {name}, using string")
+            arrow_type = pa.string()
+        fields.append(pa.field(name, arrow_type))
+    return pa.schema(fields), chain(buffer, i)
+
+
+def build_columnar_table(
+    data: RowIterable, schema: pa.Schema | None = None, micro_batch_size=CHUNK_SIZE
+) -> pa.Table:
+    """
+    Build a ``pyarrow.Table`` by transposing each micro-batch to columns.
+
+    Equivalent to ``build_table`` but each chunk is transposed to column
+    lists once and converted with ``RecordBatch.from_pydict``. When no
+    schema is supplied it is inferred from the first micro-batch with
+    ``infer_native_arrow_schema``.
+
+    Args:
+        data: Iterable of row dictionaries.
+        schema: Optional Arrow schema to enforce while building batches.
+        micro_batch_size: Number of rows to convert per record batch.
+
+    Returns:
+        A ``pyarrow.Table`` assembled from record batches.
+    """
+    if schema is None:
+        schema, data = infer_native_arrow_schema(data, micro_batch_size)
+
+    def iter_batch():
+        for chunk in chunker(data, size=micro_batch_size):
+            yield pa.RecordBatch.from_pydict(
+                _rows_to_columns(list(chunk), schema.names),
+                schema=schema
+            )
+
+    return pa.Table.from_batches(iter_batch(), schema=schema)
+
+
 class ParquetSource(source.AbstractMultiReaderSource):
     """
     Read parquet sources and yield row dictionaries via Arrow record batches.
@@ -480,6 +623,10 @@ class ParquetSink(sink.AbstractSink):
     rows. When ``coerce=True``, rows are coerced to the inferred or supplied
     canonical entity before conversion to Arrow record batches.
 
+    When ``columnar=True``, batches are transposed to column lists before
+    conversion and, without coercion, the schema is inferred with
+    ``infer_native_arrow_schema``.
+
     Args:
         writer: Output writer object.
         field_names: Unsupported field selection argument.
@@ -487,6 +634,7 @@ class ParquetSink(sink.AbstractSink):
         chunk_size: Number of rows to process per output batch.
         compression: Parquet compression codec.
         coerce: Coerce rows to the inferred or supplied schema before writing.
+        columnar: Use the columnar batch building path.
     """
     def __init__(
         self,
@@ -496,6 +644,7 @@ class ParquetSink(sink.AbstractSink):
         chunk_size: int = 50_000,
         compression: str = "snappy",
         coerce: bool = False,
+        columnar: bool = False,
     ):
         super().__init__()
         self.writer = writer
@@ -503,6 +652,7 @@ class ParquetSink(sink.AbstractSink):
         self.schema = schema
         self.compression = compression
         self.coerce = coerce
+        self.columnar = columnar
         if field_names is not None:
             raise NotImplementedError("field_names not implemented")
 
@@ -543,6 +693,8 @@ class ParquetSink(sink.AbstractSink):
             logger.info("No schema provided, generating arrow schema from data")
             if self.coerce is True:
                 _schema, _data = infer_and_coerce_arrow_schema(data, 1_000)
+            elif self.columnar is True:
+                _schema, _data = infer_native_arrow_schema(data, 1_000)
             else:
                 _schema, _data = infer_arrow_schema(data, 1_000)
         else:
@@ -553,10 +705,16 @@ class ParquetSink(sink.AbstractSink):
         def iter_batch():
             for chunk in chunker(_data, size=micro_batch_size):
                 rows = list(chunk)
-                yield pa.RecordBatch.from_pylist(
-                    rows,
-                    schema=_schema
-                )
+                if self.columnar is True:
+                    yield pa.RecordBatch.from_pydict(
+                        _rows_to_columns(rows, _schema.names),
+                        schema=_schema
+                    )
+                else:
+                    yield pa.RecordBatch.from_pylist(
+                        rows,
+                        schema=_schema
+                    )
                 self.stats.increment(len(rows))
 
         return pa.Table.from_batches(
@@ -583,7 +741,10 @@ class ParquetSink(sink.AbstractSink):
         return self
 
 
-def auto_write_parquet(path: str, iterable: RowIterable, n: int = 100, coerce: bool = False):
+def auto_write_parquet(
+    path: str, iterable: RowIterable, n: int = 100, coerce: bool = False,
+    columnar: bool = False
+):
     """
     Infer a schema and write dictionary rows to a parquet file.
 
@@ -592,15 +753,22 @@ def auto_write_parquet(path: str, iterable: RowIterable, n: int = 100, coerce: b
         iterable: Iterable of row dictionaries.
         n: Number of records used for schema inference.
         coerce: Coerce row values to the inferred schema when ``True``.
+        columnar: Use native schema inference and columnar batch building
+            when ``True``.
 
     Returns:
         ``None``.
     """
     if coerce is True:
         schema, data = infer_and_coerce_arrow_schema(iterable, n)
+    elif columnar is True:
+        schema, data = infer_native_arrow_schema(iterable, n)
     else:
         schema, data = infer_arrow_schema(iterable, n)
-    table = build_table(data, schema)
+    if columnar is True:
+        table = build_columnar_table(data, schema)
+    else:
+        table = build_table(data, schema)
     write_parquet_file(table, path)
 
 
@@ -18,6 +18,8 @@
 # OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 # SOFTWARE.
 from . import schema
+from ..data import columnar
+from ..exceptions import DKitETLException
 from ..parsers import infix_parser
 from typing import Dict, Iterator, List
 from abc import ABC, abstractmethod
@@ -63,14 +65,33 @@ class FormulaTransform(Transform):
             k: infix_parser.ExpressionParser(v.strip())
             for k, v in rule_map.items()
         }
+        # compiled functions
+        self.functions = [(k, p.compile()) for k, p in self.recipe.items()]
 
     def transform(self, row):
         """transform one row"""
-        return {k: p(row) for k, p in self.recipe.items()}
+        return {k: fn(row) for k, fn in self.functions}
+
+    def transform_batch(self, batch):
+        """
+        transform a columnar batch
+
+        Args:
+            batch: pyarrow RecordBatch or Table, NumPy structured array
+                or mapping of column names to arrays
+
+        Returns:
+            pyarrow Table (or RecordBatch if batch is a RecordBatch)
+        """
+        return columnar.from_columns(
+            {k: p.eval_batch(batch) for k, p in self.recipe.items()},
+            like=batch
+        )
 
     def __call__(self, the_iterable):
+        functions = self.functions
         return (
-            {k: p(row) for k, p in self.recipe.items()}
+            {k: fn(row) for k, fn in functions}
             for row in the_iterable
         )
 
@@ -129,3 +150,147 @@ class CoerceTransform(Transform):
             yield {
                 k: v(row.get(k, None)) for k, v in _schema.items()
             }
+
+
+class FusedPipeline(Transform):
+    """
+    Coerce, filter, transform and project rows in a single pass
+
+    The stages are fused into one generated generator function so that
+    each row is processed in one frame. Filters and formulas are inlined
+    (using the compiled form of the expressions) where possible.
+    Stages are applied in the order: coerce, filter, transform, project.
+
+    >>> p = FusedPipeline(
+    ...     row_filter=infix_parser.ExpressionParser("${x} > 1"),
+    ...     rule_map={"y": "${x} * 2"}
+    ... )
+    >>> list(p([{"x": 1}, {"x": 2}]))
+    [{'y': 4.0}]
+
+    Args:
+        validator: schema.EntityValidator used to coerce rows
+        row_filter: ExpressionParser, Proxy test or any callable
+        rule_map: dictionary of field name, formula pairs
+        fields: list of fields to project
+    """
+    def __init__(self, validator=None, row_filter=None, rule_map=None,
+                 fields: List[str] = None):
+        self.validator = validator
+        self.row_filter = row_filter
+        self.rule_map = rule_map
+        self.recipe = {
+            k: infix_parser.ExpressionParser(v.strip())
+            for k, v in rule_map.items()
+        } if rule_map else None
+        self.fields = fields
+        self.__fn = None
+        self.source = None
+
+    @staticmethod
+    def __expressions(item, add_name):
+        """fast and None safe expressions for item"""
+        if isinstance(item, infix_parser.InfixParser):
+            expressions = item._expression_source(add_name)
+            if expressions is not None:
+                return expressions
+            code = f"{add_name(item.compile())}(row)"
+        elif hasattr(item, "_generate"):
+            # Proxy tests
+            code = item._generate(add_name)
+        else:
+            code = f"{add_name(item)}(row)"
+        return code, code
+
+    @staticmethod
+    def __assign(target, fast, safe):
+        """statements that assign fast (or safe on TypeError) to target"""
+        if fast == safe:
+            return [f"{target} = {fast}"]
+        return [
+            "try:",
+            f"    {target} = {fast}",
+            "except TypeError:",
+            f"    {target} = {safe}",
+        ]
+
+    def __generate(self):
+        """generate source for the pipeline"""
+        namespace = {}
+
+        def add_name(obj):
+            name = f"_p{len(namespace)}"
+            namespace[name] = obj
+            return name
+
+        body = []
+        if self.validator is not None:
+            map_py = schema.EntityValidator.map_python
+            coerce = ", ".join(
+                f"{k!r}: {add_name(map_py[v['type']])}(row.get({k!r}))"
+                for k, v in self.validator.schema.items()
+            )
+            body.append(f"row = {{{coerce}}}")
+        if self.row_filter is not None:
+            fast, safe = self.__expressions(self.row_filter, add_name)
+            body += self.__assign("keep", fast, safe)
+            body += ["if not keep:", "    continue"]
+        if self.recipe is not None:
+            expressions = [
+                (k, self.__expressions(p, add_name)) for k, p in self.recipe.items()
+            ]
+            fast = ", ".join(f"{k!r}: {e[0]}" for k, e in expressions)
+            safe = ", ".join(f"{k!r}: {e[1]}" for k, e in expressions)
+            body += self.__assign("row", f"{{{fast}}}", f"{{{safe}}}")
+        if self.fields is not None:
+            project = ", ".join(f"{k!r}: row[{k!r}]" for k in self.fields)
+            body.append(f"row = {{{project}}}")
+        body.append("yield row")
+        lines = ["def _pipeline(rows):", "    for row in rows:"]
+        lines += [f"        {line}" for line in body]
+        return "\n".join(lines) + "\n", namespace
+
+    def compile(self):
+        """generated generator function that process an iterable of rows"""
+        if self.__fn is None:
+            self.source, namespace = self.__generate()
+            exec(compile(self.source, "<pipeline>", "exec"), namespace)
+            self.__fn = namespace["_pipeline"]
+        return self.__fn
+
+    def __call__(self, the_iterable):
+        return self.compile()(the_iterable)
+
+    def process_batch(self, batch):
+        """
+        filter, transform and project a columnar batch
+
+        Coercion is not available for batches.
+
+        Args:
+            batch: pyarrow RecordBatch or Table, NumPy structured array
+                or mapping of column names to arrays
+
+        Returns:
+            pyarrow Table or RecordBatch
+        """
+        if self.validator is not None:
+            raise DKitETLException("rows cannot be coerced in batch mode")
+        batch = columnar.to_arrow(batch)
+        row_filter = self.row_filter
+        if row_filter is not None:
+            if hasattr(row_filter, "mask"):
+                mask = row_filter.mask(batch)
+            elif isinstance(row_filter, infix_parser.InfixParser):
+                mask = columnar.truthy(row_filter.eval_batch(batch))
+            else:
+                raise DKitETLException("filter cannot be applied to batches")
+            batch = batch.filter(mask)
+        if self.recipe is not None:
+            batch = columnar.from_columns(
+                {k: p.eval_batch(batch) for k, p in self.recipe.items()},
+                like=batch
+            )
+        if self.fields is not None:
+            batch = batch.select(self.fields)
+        return batch
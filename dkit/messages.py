@@ -16,3 +16,6 @@ MSG_0026 = "Reportlab cannot process latex instructions"
 MSG_0027 = "Element should be encapsulated in a Paragraph"
 MSH_0028 = "Key '{}' not present in partition_map"
 MSH_0029 = "Invalid partition path, contains no '='"
+MSG_0030 = "Invalid join strategy: {}"
+MSG_0031 = "Input not sorted on join keys: {} after {}"
+MSG_0032 = "Function {} not available for accumulated pivot"
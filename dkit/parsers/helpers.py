@@ -108,6 +108,8 @@ def rex_match_closure():
         def match(parser):
             return scanner.search(parser._internal_eval()) is not None
         return match
+    # compiled as a regex search
+    validate_fn.regex = True
     return validate_fn
 
 
@@ -38,10 +38,42 @@ http://pyparsing.wikispaces.com/file/view/fourFn.py/30154950/fourFn.py
 2015 - initial version
 2018 - updated for performance
 2019 - improved formatting + support for pre-compiled functions such as regex
+2026 - compile expressions to python code
+
+Expressions are compiled to a python function by default. The parse
+actions record each element of the expression (in reverse polish order)
+and the program is translated to python source, e.g.
+
+    ${x} * 10 > 5
+
+is compiled to the equivalent of::
+
+    lambda row: ((row['x'] * 10.0) > 5.0)
+
+When an operation raise a TypeError because one of the operands are
+None, the operation evaluate to 0 (as with the stack based evaluator).
+Expressions that use functions that cannot be compiled (e.g. closures
+added to `_functions` by subclasses) are evaluated with the stack based
+evaluator.
+
+Expressions can also be evaluated over columnar batches with
+`eval_batch`. Operators and most functions are mapped to
+`pyarrow.compute` kernels. Nulls follow the same rules as None (e.g.
+arithmetic and comparisons evaluate to 0 and False), except that
+functions propagate nulls. Expressions with functions that cannot be
+vectorised are evaluated row by row.
+
+The pyparsing grammar is built once per process and parsed programs
+are kept in a least recently used cache, keyed on the expression and
+the functions, operators and constants of the parser.
 """
 
 import math
 import operator
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from random import (randint, uniform)
 from datetime import datetime
 from pyparsing import (
@@ -53,6 +85,7 @@ from pyparsing import (
     QuotedString,
     Word,
     ZeroOrMore,
+    alphanums,
     alphas,
     delimitedList,
     nums,
@@ -61,13 +94,17 @@ from pyparsing import (
     originalTextFor,
 )
 
-from ..data import helpers
+from ..data import columnar, helpers
 from ..data.containers import ReusableStack
 from ..exceptions import DKitParseException
 from ..utilities import time_helper
+from ..utilities.cmd_helper import LazyLoad
 from .helpers import rex_match_closure
 from .. import NA_VALUE
 
+pa = LazyLoad("pyarrow")
+pc = LazyLoad("pyarrow.compute")
+
 
 # def cmp(a, b):
 #    """
@@ -83,12 +120,79 @@ def replace_na(value, replacement):
         return value
 
 
+def none_safe(op):
+    """
+    wrap binary operator op to return 0 when the operation fail
+    as a result of a None operand
+    """
+    def wrapper(a, b):
+        try:
+            return op(a, b)
+        except TypeError as e:
+            if a is None or b is None:
+                return 0
+            else:
+                raise e
+    return wrapper
+
+
+# python equivalent of operators
+_PY_OPERATORS = {
+    "+": "+",
+    "-": "-",
+    "*": "*",
+    "/": "/",
+    "^": "**",
+    "!=": "!=",
+    "==": "==",
+    "<": "<",
+    "<=": "<=",
+    ">": ">",
+    ">=": ">=",
+    "&": "&",
+    "|": "|",
+}
+
+_OPERATORS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "^": operator.pow,
+    "!=": operator.ne,
+    "==": operator.eq,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "&": operator.and_,
+    "|": operator.or_,
+}
+
+# number of compiled expressions cached
+COMPILE_CACHE_SIZE = 1024
+
+
+class _NotCompilable(Exception):
+    """raised for functions that cannot be compiled"""
+    pass
+
+
+@lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def _compile_source(source: str):
+    """compile generated source (cached)"""
+    return compile(source, "<infix expression>", "exec")
+
+
 def f1_closure(fn):
     def validate_fn(parser, strg, tokens):
         fname = tokens[0]
         if len(tokens) != 2:
             raise DKitParseException(f"function {fname} require 1 parameter")
         return lambda x: fn(x._internal_eval())
+    # used when compiling
+    validate_fn.function = fn
+    validate_fn.n_args = 1
     return validate_fn
 
 
@@ -103,9 +207,178 @@ def f2_closure(fn):
             par_a = parser._internal_eval()
             return fn(par_a, par_b)
         return ret_fn
+    validate_fn.function = fn
+    validate_fn.n_args = 2
     return validate_fn
 
 
+_F1_MAP = {
+    "abs": abs,
+    "bool": helpers.to_boolean,
+    "capitalize": lambda x: x.capitalize(),
+    "cos": math.cos,
+    "float": float,
+    "is_null": lambda x: x is None,
+    "lower": lambda x: x.lower(),
+    "len": lambda x: len(x),
+    "int": lambda x: int(float(x)),
+    "not": lambda x: not x,
+    "round": round,
+    "sin": math.sin,
+    # "sgn": lambda a: abs(a) > epsilon and cmp(a, 0) or 0,
+    "sqrt": math.sqrt,
+    "str": str,
+    "tan": math.tan,
+    "title": lambda x: x.title(),
+    "trunc": math.trunc,
+    "upper": lambda x: x.upper(),
+    "from_unixtime": time_helper.from_unixtime,  # include TZ
+    "from_timestamp": datetime.fromtimestamp,
+}
+
+_F2_MAP = {
+    "randint": lambda x, y: float(randint(x, y)),
+    "uniform": uniform,
+    "replace_na": replace_na,
+    "strftime": lambda d, f: d.strftime(f),
+    "strptime": datetime.strptime,
+}
+
+# default functions, shared by instances so that parsed programs
+# can be cached
+_FUNCTIONS = {k: f1_closure(v) for k, v in _F1_MAP.items()}
+_FUNCTIONS.update({k: f2_closure(v) for k, v in _F2_MAP.items()})
+_FUNCTIONS["match"] = rex_match_closure()
+
+# number of parsed programs cached
+PARSE_CACHE_SIZE = 1024
+
+
+class _ProgramCache(object):
+    """least recently used cache of parsed programs"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.data[key] = value
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def clear(self):
+        self.data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+
+_PARSE_CACHE = _ProgramCache(PARSE_CACHE_SIZE)
+
+# the grammar is shared by all parsers. Parse actions are dispatched to
+# the parser that is active in the current thread.
+_PARSE_LOCK = threading.RLock()
+_active = threading.local()
+
+
+def _factory_key(factory):
+    """identify function factory for the parse cache"""
+    return getattr(factory, "function", factory), getattr(factory, "n_args", 0)
+
+
+#
+# vectorised evaluation with pyarrow.compute
+#
+def _null_to_zero(kernel):
+    """operations on nulls evaluate to 0 (or False)"""
+    def wrapper(a, b):
+        result = kernel(a, b)
+        return pc.fill_null(result, False if pa.types.is_boolean(result.type) else 0)
+    return wrapper
+
+
+def _v_equal(a, b):
+    both_null = pc.and_(pc.is_null(a), pc.is_null(b))
+    return pc.or_(pc.fill_null(pc.equal(a, b), False), both_null)
+
+
+def _v_divide(a, b):
+    return pc.divide_checked(pc.cast(a, pa.float64()), pc.cast(b, pa.float64()))
+
+
+def _v_len(x):
+    if pa.types.is_list(x.type) or pa.types.is_large_list(x.type):
+        return pc.cast(pc.list_value_length(x), pa.int64())
+    return pc.cast(pc.utf8_length(x), pa.int64())
+
+
+def _v_strptime(x, fmt):
+    if not isinstance(fmt, pa.Scalar):
+        raise TypeError("format must be a constant")
+    return pc.strptime(x, format=fmt.as_py(), unit="us")
+
+
+# checked kernels raise ArrowInvalid on overflow, division by zero and
+# domain errors where python raise, evaluation then fall back to rows
+_VECTOR_OPERATORS = {
+    "+": _null_to_zero(lambda a, b: pc.add_checked(a, b)),
+    "-": _null_to_zero(lambda a, b: pc.subtract_checked(a, b)),
+    "*": _null_to_zero(lambda a, b: pc.multiply_checked(a, b)),
+    "/": _null_to_zero(_v_divide),
+    "^": _null_to_zero(lambda a, b: pc.power_checked(a, b)),
+    "==": _v_equal,
+    "!=": lambda a, b: pc.invert(_v_equal(a, b)),
+    "<": _null_to_zero(lambda a, b: pc.less(a, b)),
+    "<=": _null_to_zero(lambda a, b: pc.less_equal(a, b)),
+    ">": _null_to_zero(lambda a, b: pc.greater(a, b)),
+    ">=": _null_to_zero(lambda a, b: pc.greater_equal(a, b)),
+    "&": _null_to_zero(lambda a, b: pc.and_(a, b)),
+    "|": _null_to_zero(lambda a, b: pc.or_(a, b)),
+}
+
+_VECTOR_F1 = {
+    "abs": lambda x: pc.abs_checked(x),
+    "capitalize": lambda x: pc.utf8_capitalize(x),
+    "cos": lambda x: pc.cos_checked(x),
+    "float": lambda x: pc.cast(x, pa.float64()),
+    "is_null": lambda x: pc.is_null(x),
+    "lower": lambda x: pc.utf8_lower(x),
+    "len": _v_len,
+    "int": lambda x: pc.cast(pc.trunc(pc.cast(x, pa.float64())), pa.int64()),
+    "not": lambda x: pc.invert(columnar.truthy(x)),
+    "round": lambda x: pc.cast(pc.round(x, round_mode="half_to_even"), pa.int64()),
+    "sin": lambda x: pc.sin_checked(x),
+    "sqrt": lambda x: pc.sqrt_checked(x),
+    "tan": lambda x: pc.tan_checked(x),
+    "title": lambda x: pc.utf8_title(x),
+    "trunc": lambda x: pc.cast(pc.trunc(x), pa.int64()),
+    "upper": lambda x: pc.utf8_upper(x),
+}
+
+_VECTOR_F2 = {
+    "replace_na": lambda x, y: pc.coalesce(x, y),
+    "strptime": _v_strptime,
+}
+
+# vectorised equivalent of functions, keyed on the python function
+_VECTOR_FUNCTIONS = {_F1_MAP[k]: v for k, v in _VECTOR_F1.items()}
+_VECTOR_FUNCTIONS.update({_F2_MAP[k]: v for k, v in _VECTOR_F2.items()})
+
+
 class InfixParser(object):
     """
     Implement an infix parser for floating point calculations that can be
@@ -135,74 +408,40 @@ class InfixParser(object):
 
     Arguments:
         expression: string parse expression
+        variables: dictionary of variables
+        functions: dictionary of additional one parameter functions
+        compiled: compile expression to python code (evaluated with
+            the stack based evaluator when False)
     """
-    def __init__(self, expression: str = "0", variables: dict = None, functions: dict = None):
+    def __init__(self, expression: str = "0", variables: dict = None, functions: dict = None,
+                 compiled: bool = True):
         #   epsilon = 1e-12
         self._parse_stack: list = []
         self._evaluation_stack: list = []
+        # program in reverse polish notation, used to compile
+        self._program: list = []
+        self._compiled_fn = None
+        self._vectorised = None
+        self.compiled = compiled
 
         # store names of variables parsed
         self.parsed_variable_names = []
 
-        self._operations_map = {
-            "+": operator.add,
-            "-": operator.sub,
-            "*": operator.mul,
-            "/": operator.truediv,
-            "^": operator.pow,
-            "!=": operator.ne,
-            "==": operator.eq,
-            "<": operator.lt,
-            "<=": operator.le,
-            ">": operator.gt,
-            ">=": operator.ge,
-            "&": operator.and_,
-            "|": operator.or_,
-            }
+        self._operations_map = dict(_OPERATORS)
 
         self._constants_map = {
             "PI": math.pi,
             "E": math.e,
         }
 
-        self._f1_map = {
-            "abs": abs,
-            "bool": helpers.to_boolean,
-            "capitalize": lambda x: x.capitalize(),
-            "cos": math.cos,
-            "float": float,
-            "is_null": lambda x: x is None,
-            "lower": lambda x: x.lower(),
-            "len": lambda x: len(x),
-            "int": lambda x: int(float(x)),
-            "not": lambda x: not x,
-            "round": round,
-            "sin": math.sin,
-            # "sgn": lambda a: abs(a) > epsilon and cmp(a, 0) or 0,
-            "sqrt": math.sqrt,
-            "str": str,
-            "tan": math.tan,
-            "title": lambda x: x.title(),
-            "trunc": math.trunc,
-            "upper": lambda x: x.upper(),
-            "from_unixtime": time_helper.from_unixtime,  # include TZ
-            "from_timestamp": datetime.fromtimestamp,
-        }
-        if functions is not None:
-            self._f1_map.update(functions)
-
-        self._f2_map = {
-            "randint": lambda x, y: float(randint(x, y)),
-            "uniform": uniform,
-            "replace_na": replace_na,
-            "strftime": lambda d, f: d.strftime(f),
-            "strptime": datetime.strptime,
-        }
+        self._f1_map = dict(_F1_MAP)
+        self._f2_map = dict(_F2_MAP)
 
         # add 1 parameter and 2 parameter functions
-        self._functions = {k: f1_closure(v) for k, v in self._f1_map.items()}
-        self._functions.update({k: f2_closure(v) for k, v in self._f2_map.items()})
-        self._functions["match"] = rex_match_closure()
+        self._functions = dict(_FUNCTIONS)
+        if functions is not None:
+            self._f1_map.update(functions)
+            self._functions.update({k: f1_closure(v) for k, v in functions.items()})
         self.variables = {} if variables is None else variables
         if (expression is None) or (len(expression) == 0):
             expression = "0"
@@ -211,11 +450,24 @@ class InfixParser(object):
     #
     # Private methods
     #
-    def __parse_definition(self):
+    _grammar = None
+
+    @classmethod
+    def __grammar(cls):
         """
         Initialize pyparsing machinery.
+
+        The grammar is built once and shared by all instances.
         """
-        self._parse_stack = []
+        if InfixParser._grammar is not None:
+            return InfixParser._grammar
+
+        def action(method):
+            def dispatch(strg, loc, toks):
+                return method(_active.parser, strg, loc, toks)
+            return dispatch
+
+        push_op = action(InfixParser.__push_op)
         point = Literal(".")
 
         # constants
@@ -242,33 +494,42 @@ class InfixParser(object):
         compare_op = oneOf(["!=", "==", "<", "<=", ">", ">="])
         logical_op = oneOf(["|", "&"])
         expr = Forward()
-        quoted_string = QuotedString('"').setParseAction(self.__push_op)
-        _function = oneOf(self._functions.keys()) \
+        quoted_string = QuotedString('"').setParseAction(push_op)
+        function_name = Word(alphas, alphanums + "_").setParseAction(
+            action(InfixParser.__validate_function)
+        )
+        _function = function_name \
             + lpar \
             + delimitedList(originalTextFor(expr) | quoted_string) \
             + rpar
         atom = (
             Optional("-") + (
-                float_number.setParseAction(self.__push_value)
-                | constants.setParseAction(self.__push_constant)
-                | variable.setParseAction(self.__push_variable)
-                | _function.setParseAction(self.__push_function)
+                float_number.setParseAction(action(InfixParser.__push_value))
+                | constants.setParseAction(action(InfixParser.__push_constant))
+                | variable.setParseAction(action(InfixParser.__push_variable))
+                | _function.setParseAction(action(InfixParser.__push_function))
             ) | (lpar + expr.suppress() + rpar)
-        ).setParseAction(self.__push_uminus)
+        ).setParseAction(action(InfixParser.__push_uminus))
 
         # by defining exponentiation as "atom [ ^ factor ]..." instead of "atom [ ^ atom ]...",
         # we get right-to-left exponents, instead of left-to-righ
         # that is, 2^3^2 = 2^(3^2), not (2^3)^2.
         factor = Forward()
-        factor << atom + ZeroOrMore((exp_op + factor).setParseAction(self.__push_op))
-        term = factor + ZeroOrMore((multiplication_op + factor).setParseAction(self.__push_op))
-        expr << term + ZeroOrMore((add_op + term).setParseAction(self.__push_op))
+        factor << atom + ZeroOrMore((exp_op + factor).setParseAction(push_op))
+        term = factor + ZeroOrMore((multiplication_op + factor).setParseAction(push_op))
+        expr << term + ZeroOrMore((add_op + term).setParseAction(push_op))
         c_expr = (expr | quoted_string) + ZeroOrMore(
-            (compare_op + (expr | quoted_string)).setParseAction(self.__push_op)
+            (compare_op + (expr | quoted_string)).setParseAction(push_op)
         )
-        l_expr = c_expr + ZeroOrMore((logical_op + c_expr).setParseAction(self.__push_op))
+        l_expr = c_expr + ZeroOrMore((logical_op + c_expr).setParseAction(push_op))
+        InfixParser._grammar = l_expr
         return l_expr
 
+    def __validate_function(self, strg, loc, toks):
+        """function names are validated against the current function map"""
+        if toks[0] not in self._functions:
+            raise ParseException(strg, loc, f"unknown function: {toks[0]}")
+
     @staticmethod
     def __operation_wrapper(cls, op):
         par2 = cls._internal_eval()
@@ -288,6 +549,7 @@ class InfixParser(object):
         token = toks[0]
         constant = self._constants_map[token]
         self._parse_stack.append(lambda x: constant)
+        self._program.append(("value", constant))
 
     def __push_variable(self, strg, loc, toks):
         """
@@ -297,6 +559,7 @@ class InfixParser(object):
         if token.startswith("${"):
             self.parsed_variable_names.append(token[2:-1])
             self._parse_stack.append(lambda x: x._get_variable(token[2:-1]))
+            self._program.append(("variable", token[2:-1]))
 
     def __push_op(self, strg, loc, toks):
         """
@@ -305,16 +568,29 @@ class InfixParser(object):
         token = toks[0]
         if token in self._operations_map:
             operation = self._operations_map[token]
-            self._parse_stack.append(lambda x: self.__operation_wrapper(x, operation))
+            wrapper = self.__operation_wrapper
+            self._parse_stack.append(lambda x: wrapper(x, operation))
+            self._program.append(("operator", token))
         # else, just add a string value
         else:
             # this is string value
             self._parse_stack.append(lambda x: token)
+            self._program.append(("value", token))
 
     def __push_function(self, strg, loc, toks):
         the_function = toks[0]
-        fn_compiled = self._functions[the_function](self, strg, toks)
+        factory = self._functions[the_function]
+        fn_compiled = factory(self, strg, toks)
+        # some functions (e.g. match) remove parameters from the stack
+        del self._program[len(self._parse_stack):]
         self._parse_stack.append(fn_compiled)
+        if getattr(factory, "regex", False):
+            self._program.append(("regex", re.compile(toks[2])))
+        elif hasattr(factory, "function"):
+            self._program.append(("function", (factory.function, factory.n_args)))
+        else:
+            # cannot be compiled
+            self._program.append(("closure", the_function))
 
     def _get_variable(self, x):
         """
@@ -329,6 +605,7 @@ class InfixParser(object):
         push value onto stack
         """
         self._parse_stack.append(lambda x: float(toks[0]))
+        self._program.append(("number", toks[0]))
 
     def __push_uminus(self, strg, loc, toks):
         """
@@ -336,24 +613,286 @@ class InfixParser(object):
         """
         if toks and toks[0] == '-':
             self._parse_stack.append(lambda x: x._internal_eval() * -1.0)
+            self._program.append(("negate", None))
+
+    def _expression_source(self, add_name):
+        """
+        python expressions that evaluate the program for the
+        variable `row`
+
+        Used to compile the expression and to fuse expressions into
+        larger generated functions.
+
+        Args:
+            add_name: callable that register an object referenced by
+                the expression and return its name
+
+        Returns:
+            tuple of (fast, None safe) expressions or None if the
+            program cannot be compiled
+        """
+        if type(self)._get_variable is InfixParser._get_variable:
+            get = None
+        else:
+            get = add_name(self._get_variable)
+        program = self._program
+        index = len(program)
+
+        def emit():
+            """
+            fast and None safe versions of the next item, visited in the
+            same order as the stack based evaluator
+            """
+            nonlocal index
+            index -= 1
+            kind, value = program[index]
+            if kind == "number":
+                try:
+                    number = float(value)
+                    code = repr(number) if math.isfinite(number) else add_name(number)
+                except ValueError:
+                    code = f"float({value!r})"
+                return code, code
+            elif kind == "value":
+                if isinstance(value, str) or \
+                        (isinstance(value, float) and math.isfinite(value)):
+                    code = repr(value)
+                else:
+                    code = add_name(value)
+                return code, code
+            elif kind == "variable":
+                code = f"row[{value!r}]" if get is None else f"{get}({value!r})"
+                return code, code
+            elif kind == "negate":
+                fa, sa = emit()
+                return f"({fa} * -1.0)", f"({sa} * -1.0)"
+            elif kind == "operator":
+                operation = self._operations_map[value]
+                fb, sb = emit()
+                fa, sa = emit()
+                if operation is _OPERATORS.get(value):
+                    fast = f"({fa} {_PY_OPERATORS[value]} {fb})"
+                else:
+                    fast = f"{add_name(operation)}({fa}, {fb})"
+                return fast, f"{add_name(none_safe(operation))}({sa}, {sb})"
+            elif kind == "function":
+                fn, n_args = value
+                name = add_name(fn)
+                args = [emit() for _ in range(n_args)][::-1]
+                return (
+                    f"{name}({', '.join(a[0] for a in args)})",
+                    f"{name}({', '.join(a[1] for a in args)})",
+                )
+            elif kind == "regex":
+                name = add_name(value)
+                fa, sa = emit()
+                return f"({name}.search({fa}) is not None)", f"({name}.search({sa}) is not None)"
+            else:
+                raise _NotCompilable(value)
+
+        try:
+            return emit()
+        except (_NotCompilable, IndexError):
+            return None
+
+    def __generate(self):
+        """
+        generate python source from the program
+
+        Returns:
+            tuple of (source, namespace) or None if the program
+            cannot be compiled
+        """
+        namespace = {}
+
+        def add_name(obj):
+            name = f"_n{len(namespace)}"
+            namespace[name] = obj
+            return name
+
+        expressions = self._expression_source(add_name)
+        if expressions is None:
+            return None
+        fast, safe = expressions
+        if fast == safe:
+            body = f"    return {fast}\n"
+        else:
+            body = (
+                f"    try:\n"
+                f"        return {fast}\n"
+                f"    except TypeError:\n"
+                f"        return {safe}\n"
+            )
+        return f"def _expression(row):\n{body}", namespace
+
+    def __compile(self):
+        """compile program to python function"""
+        generated = self.__generate()
+        if generated is None:
+            return None
+        source, namespace = generated
+        exec(_compile_source(source), namespace)
+        return namespace["_expression"]
+
+    def __cache_key(self, str_expression):
+        """
+        key for the parse cache, None if the functions or operators
+        are not hashable
+        """
+        key = (
+            str_expression,
+            tuple((k, *_factory_key(v)) for k, v in self._functions.items()),
+            tuple(self._operations_map.items()),
+            tuple(self._constants_map.items()),
+        )
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def __parse(self, str_expression):
+        """
+        parse expression with the shared grammar
+
+        Returns:
+            tuple of parse stack, program and variable names
+        """
+        n_names = len(self.parsed_variable_names)
+        self._parse_stack = []
+        self._program = []
+        previous = getattr(_active, "parser", None)
+        _active.parser = self
+        try:
+            self.__grammar().parseString(str_expression, parseAll=True)
+        except ParseException as E:
+            raise DKitParseException(E)
+        finally:
+            _active.parser = previous
+        variable_names = tuple(self.parsed_variable_names[n_names:])
+        del self.parsed_variable_names[n_names:]
+        return tuple(self._parse_stack), tuple(self._program), variable_names
 
     def parse(self, str_expression):
         """
         Parse expression and update internal parse stack.
 
+        Parsed programs are cached (keyed on the expression and the
+        functions available).
+
         Args:
             str_expression: expression to parse
 
         Returns:
             self
         """
-        try:
-            self.__parse_definition().parseString(str_expression, parseAll=True)
-        except ParseException as E:
-            raise DKitParseException(E)
+        key = self.__cache_key(str_expression)
+        with _PARSE_LOCK:
+            program = _PARSE_CACHE.get(key) if key is not None else None
+            if program is None:
+                program = self.__parse(str_expression)
+                if key is not None:
+                    _PARSE_CACHE.put(key, program)
+        parse_stack, self._program, variable_names = program
+        self._parse_stack = list(parse_stack)
+        self.parsed_variable_names.extend(variable_names)
         self._evaluation_stack = ReusableStack(self._parse_stack)
+        self._compiled_fn = self.__compile() if self.compiled else None
+        self._vectorised = None
         return self
 
+    def compile(self):
+        """
+        function that evaluate the expression given a dictionary
+        of variables
+
+        >>> fn = InfixParser("${x} * 10 > 5").compile()
+        >>> fn({"x": 1})
+        True
+
+        Returns:
+            callable
+        """
+        if self._compiled_fn is not None \
+                and type(self)._get_variable is InfixParser._get_variable:
+            return self._compiled_fn
+        return self.eval_vars
+
+    def __is_vectorised(self) -> bool:
+        """True if all elements of the program can be vectorised"""
+        if type(self)._get_variable is not InfixParser._get_variable:
+            return False
+        for kind, value in self._program:
+            if kind == "operator":
+                if self._operations_map[value] is not _OPERATORS.get(value):
+                    return False
+            elif kind == "function":
+                try:
+                    if value[0] not in _VECTOR_FUNCTIONS:
+                        return False
+                except TypeError:
+                    # not hashable
+                    return False
+            elif kind not in ("number", "value", "variable", "negate", "regex"):
+                return False
+        return True
+
+    def __eval_columns(self, batch):
+        """evaluate the program with pyarrow.compute kernels"""
+        program = self._program
+        index = len(program)
+
+        def evaluate():
+            nonlocal index
+            index -= 1
+            kind, value = program[index]
+            if kind == "number":
+                return pa.scalar(float(value))
+            elif kind == "value":
+                return pa.scalar(value)
+            elif kind == "variable":
+                return columnar.column(batch, value)
+            elif kind == "negate":
+                return pc.multiply(evaluate(), -1.0)
+            elif kind == "operator":
+                b = evaluate()
+                a = evaluate()
+                return _VECTOR_OPERATORS[value](a, b)
+            elif kind == "function":
+                fn, n_args = value
+                args = [evaluate() for _ in range(n_args)][::-1]
+                return _VECTOR_FUNCTIONS[fn](*args)
+            else:
+                return pc.match_substring_regex(evaluate(), pattern=value.pattern)
+
+        return evaluate()
+
+    def eval_batch(self, batch):
+        """
+        evaluate expression for each row of a columnar batch
+
+        >>> InfixParser("${x} * 10 > 15").eval_batch({"x": [1, 2, None]}).to_pylist()
+        [False, True, False]
+
+        Args:
+            batch: pyarrow RecordBatch or Table, NumPy structured array
+                or mapping of column names to arrays
+
+        Returns:
+            pyarrow array with one value per row
+        """
+        n_rows = columnar.num_rows(batch)
+        if self._vectorised is None:
+            self._vectorised = self.__is_vectorised()
+        if self._vectorised:
+            try:
+                return columnar.broadcast(self.__eval_columns(batch), n_rows)
+            except (pa.ArrowException, TypeError, ValueError):
+                # e.g. types not supported by the kernel
+                pass
+        fn = self.compile()
+        return columnar.from_values([fn(row) for row in columnar.to_rows(batch)])
+
     def _internal_eval(self):
         """
         Returns evaluated expression
@@ -374,6 +913,8 @@ class InfixParser(object):
         Returns:
             (float) evaluated expression
         """
+        if self._compiled_fn is not None:
+            return self._compiled_fn(self.variables)
         self._evaluation_stack.reset()
         return self._evaluation_stack.pop()(self)
 
@@ -389,6 +930,8 @@ class InfixParser(object):
         """
         # if variables is not None:
         self.variables = variables
+        if self._compiled_fn is not None:
+            return self._compiled_fn(variables)
         self._evaluation_stack.reset()
         return self._evaluation_stack.pop()(self)
 
@@ -396,6 +939,8 @@ class InfixParser(object):
         """
         evaluate expression
         """
+        if self._compiled_fn is not None:
+            return self._compiled_fn(self.variables)
         self._evaluation_stack.reset()
         return self._evaluation_stack.pop()(self)
 
@@ -421,5 +966,7 @@ class ExpressionParser(AbstractFieldParser):
         evaluate expression
         """
         self.variables = row
+        if self._compiled_fn is not None:
+            return self._compiled_fn(row)
         self._evaluation_stack.reset()
         return self._evaluation_stack.pop()(self)
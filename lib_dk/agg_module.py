@@ -26,7 +26,11 @@ class AggModule(module.UniCommandModule):
 
     def get_aggregator(self):
         """build dkit.data.aggregator.Aggregate object from options"""
-        aggregator = agg.Aggregate()
+        aggregator = agg.Aggregate(
+            batch_size=self.args.batch_size,
+            processes=self.args.processes,
+            max_groups=self.args.max_groups
+        )
 
         # Check that at least one operation has been specified
         if not hasattr(self.args, "group_by_operations"):
@@ -36,6 +40,8 @@ class AggModule(module.UniCommandModule):
         aggregator = aggregator + agg.GroupBy(*self.args.group_by)
 
         for operation in self.args.group_by_operations:
+            if isinstance(operation, agg.TopK):
+                operation.k = self.args.top_k
             aggregator = aggregator + operation
 
         return aggregator
@@ -71,5 +77,9 @@ class AggModule(module.UniCommandModule):
                 action=GroupByAction,
                 help=class_obj.__doc__
             )
+        options.add_option_batch_size(self.parser)
+        options.add_option_processes(self.parser)
+        options.add_option_max_groups(self.parser)
+        options.add_option_top_k(self.parser)
         options.add_option_tabulate(self.parser)
         self.parse_args()
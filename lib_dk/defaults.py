@@ -23,6 +23,7 @@ DEFAULT_N = 0
 DEFAULT_PROBABILITY = 1
 DEFAULT_SAMPLE_SIZE = 1000
 DEFAULT_LOG_TRIGGER = 100000
+DEFAULT_BATCH_SIZE = 0
 DEFAULT_MODEL_FILE = model.DEFAULT_MODEL_FILE
 GLOBAL_CONFIG_FILE = model.GLOBAL_CONFIG_FILE
 LOCAL_CONFIG_FILE = model.LOCAL_CONFIG_FILE
@@ -45,7 +45,8 @@ class DiffModule(module.MultiCommandModule):
         """records in B but not in A"""
         a = self.input_stream([self.args.a])
         b = self.input_stream([self.args.b])
-        c = Compare(a, b, keys=self._keys, huge=self.args.huge)
+        c = Compare(a, b, keys=self._keys, huge=self.args.huge,
+                    processes=self.args.processes)
         result = c.added()
         self.__output(result)
 
@@ -53,7 +54,8 @@ class DiffModule(module.MultiCommandModule):
         """records in A but not in B"""
         a = self.input_stream([self.args.a])
         b = self.input_stream([self.args.b])
-        c = Compare(a, b, keys=self._keys, huge=self.args.huge)
+        c = Compare(a, b, keys=self._keys, huge=self.args.huge,
+                    processes=self.args.processes)
         result = c.deleted()
         self.__output(result)
 
@@ -61,7 +63,8 @@ class DiffModule(module.MultiCommandModule):
         """records with changed values in specified fields"""
         a = self.input_stream([self.args.a])
         b = self.input_stream([self.args.b])
-        c = Compare(a, b, keys=self._keys, huge=self.args.huge)
+        c = Compare(a, b, keys=self._keys, huge=self.args.huge,
+                    processes=self.args.processes)
 
         result = c.changed(*self.args.values)
         self.__output(result)
@@ -70,7 +73,8 @@ class DiffModule(module.MultiCommandModule):
         """deltas for records with changed numerical values in specified fields"""
         a = self.input_stream([self.args.a])
         b = self.input_stream([self.args.b])
-        c = Compare(a, b, keys=self._keys, huge=self.args.huge)
+        c = Compare(a, b, keys=self._keys, huge=self.args.huge,
+                    processes=self.args.processes)
 
         result = c.deltas(*self.args.values)
         self.__output(result)
@@ -82,6 +86,7 @@ class DiffModule(module.MultiCommandModule):
         parser_added = self.sub_parser.add_parser("added", help=self.do_added.__doc__)
         options.add_option_defaults(parser_added)
         options.add_options_diff(parser_added)
+        options.add_option_processes(parser_added)
         options.add_option_output_uri(parser_added)
         options.add_option_tabulate(parser_added)
 
@@ -89,6 +94,7 @@ class DiffModule(module.MultiCommandModule):
         parser_changed = self.sub_parser.add_parser("changed", help=self.do_changed.__doc__)
         options.add_option_defaults(parser_changed)
         options.add_options_diff(parser_changed)
+        options.add_option_processes(parser_changed)
         options.add_options_diff_fields(parser_changed)
         options.add_option_output_uri(parser_changed)
         options.add_option_tabulate(parser_changed)
@@ -97,6 +103,7 @@ class DiffModule(module.MultiCommandModule):
         parser_deleted = self.sub_parser.add_parser("deleted", help=self.do_deleted.__doc__)
         options.add_option_defaults(parser_deleted)
         options.add_options_diff(parser_deleted)
+        options.add_option_processes(parser_deleted)
         options.add_option_output_uri(parser_deleted)
         options.add_option_tabulate(parser_deleted)
 
@@ -104,6 +111,7 @@ class DiffModule(module.MultiCommandModule):
         parser_deltas = self.sub_parser.add_parser("deltas", help=self.do_deltas.__doc__)
         options.add_option_defaults(parser_deltas)
         options.add_options_diff(parser_deltas)
+        options.add_option_processes(parser_deltas)
         options.add_options_diff_fields(parser_deltas)
         options.add_option_output_uri(parser_deltas)
         options.add_option_tabulate(parser_deltas)
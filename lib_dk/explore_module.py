@@ -64,7 +64,9 @@ class ExploreModule(module.MultiCommandModule):
         """print distinct values for keys specified"""
         distinct_rows = mp.distinct(
             self.input_stream(self.args.input),
-            *self.args.select_fields
+            *self.args.select_fields,
+            approximate=self.args.approximate,
+            error_rate=self.args.error_rate
         )
 
         if self.args.sort_output is True:
@@ -85,7 +87,9 @@ class ExploreModule(module.MultiCommandModule):
         """print duplicate values for keys specified (each only once)"""
         duplicate_rows = mp.duplicates(
             self.input_stream(self.args.input),
-            *self.args.select_fields
+            *self.args.select_fields,
+            approximate=self.args.approximate,
+            error_rate=self.args.error_rate
         )
 
         if self.args.sort_output is True:
@@ -143,14 +147,17 @@ class ExploreModule(module.MultiCommandModule):
     def do_histogram(self):
         """generate histogram for field"""
         from dkit.data.stats import Accumulator
-        from dkit.data.histogram import Histogram
+        from dkit.data.histogram import HistogramBuilder
 
         # hack to extract only required field
         self.args.fields = [self.args.field]
         field_name = self.args.field
 
+        # first pass to determine bins, second pass to count
         a = Accumulator((i[field_name] for i in self.input_stream(self.args.input)))
-        h = Histogram.from_accumulator(a, precision=2)
+        builder = HistogramBuilder.from_accumulator(a, self.args.bins, precision=2)
+        builder.update_rows(self.input_stream(self.args.input), field_name)
+        h = builder.histogram(clip=True)
 
         p = ggrammar.Plot(h) \
             + ggrammar.GeomHistogram(field_name, color="#FF0000", alpha=0.9) \
@@ -334,6 +341,7 @@ class ExploreModule(module.MultiCommandModule):
         options.add_option_defaults(parser_distinct)
         options.add_options_minimal_inputs(parser_distinct)
         options.add_option_field_names(parser_distinct)
+        options.add_option_approximate(parser_distinct)
         options.add_option_sort_output(parser_distinct)
         options.add_option_reversed(parser_distinct)
         options.add_option_tabulate(parser_distinct)
@@ -348,6 +356,7 @@ class ExploreModule(module.MultiCommandModule):
         options.add_option_defaults(parser_duplicates)
         options.add_options_minimal_inputs(parser_duplicates)
         options.add_option_field_names(parser_duplicates)
+        options.add_option_approximate(parser_duplicates)
         options.add_option_sort_output(parser_duplicates)
         options.add_option_reversed(parser_duplicates)
         options.add_option_tabulate(parser_duplicates)
@@ -385,6 +394,8 @@ class ExploreModule(module.MultiCommandModule):
         options.add_options_inputs(parser_histogram)
         options.add_option_field_name(parser_histogram)
         options.add_option_tabulate(parser_histogram)
+        parser_histogram.add_argument("--bins", default=10, type=int,
+                                      help="number of bins")
         parser_histogram.add_argument("-o", "--output", help="output to file", default=None)
         parser_histogram.add_argument("--script", help="gnuplot script file (optional)",
                                       default=None)
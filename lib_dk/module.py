@@ -24,7 +24,6 @@ import configparser
 import getpass
 import itertools
 import logging
-import operator
 import os
 import textwrap
 from typing import Dict, List, Iterable
@@ -33,7 +32,7 @@ import tabulate
 
 from . import defaults
 from dkit import exceptions
-from dkit.data import iteration, filters
+from dkit.data import iteration, filters, manipulate
 from dkit.etl import transform, model
 from dkit.shell import console
 from dkit.utilities import cmd_helper, log_helper
@@ -228,6 +227,7 @@ class Module(object):
 
         # if a filter is defined we need to make sure the filter fields
         # are added to the fields extracted.
+        exp_filter = None
         if hasattr(self.args, "filter") and self.args.filter is not None:
             exp_filter = filters.ExpressionFilter(self.args.filter)
             # ensure we extract filter fields
@@ -237,28 +237,28 @@ class Module(object):
         _iter_in = self.input_stream_raw(uri_list, fields)
         services = self.load_services()
 
-        # apply schema
+        # schema, filter and transform are fused in one pass
+        validator = None
         if hasattr(self.args, "entity") and self.args.entity is not None:
-            _schema = services.model.entities[self.args.entity]
-            _iter_in = _schema(_iter_in)
+            validator = services.model.entities[self.args.entity].as_entity_validator()
 
-        # apply filter
-        if hasattr(self.args, "filter") and self.args.filter is not None:
-            # exp_filter should already be instantiated above..
-            _iter_in = filter(exp_filter, _iter_in)
-
-        # apply transform
+        rule_map = None
         if hasattr(self.args, "transform") and self.args.transform is not None:
-            dict_transform = services.model.transforms[self.args.transform]
-            t = transform.FormulaTransform(dict_transform)
-            _iter_in = t(_iter_in)
+            rule_map = services.model.transforms[self.args.transform]
+
+        if any(i is not None for i in (validator, exp_filter, rule_map)):
+            pipeline = transform.FusedPipeline(
+                validator=validator,
+                row_filter=exp_filter,
+                rule_map=rule_map
+            )
+            _iter_in = pipeline(_iter_in)
 
         # sort
         if hasattr(self.args, "sort") and self.args.sort is not None:
-            getter = operator.itemgetter(*self.args.sort)
-            _iter_in = sorted(
+            _iter_in = manipulate.external_sort(
                 _iter_in,
-                key=getter,
+                *self.args.sort,
                 reverse=self.args.reversed
             )
 
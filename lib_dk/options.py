@@ -60,10 +60,28 @@ def add_option_append(parser):
                         help=add_option_append.__doc__)
 
 
+def add_option_approximate(parser):
+    """track rows with Bloom filters in fixed memory (approximate)"""
+    parser.add_argument("--approximate", action="store_true", default=False,
+                        help=add_option_approximate.__doc__)
+    parser.add_argument("--error-rate", dest="error_rate", default=0.001, type=float,
+                        help="false positive rate for --approximate (default 0.001)")
+
+
 def add_option_backend_map(parser):
-    """backend for intermediate storage"""
+    """backend file for intermediate storage"""
     parser.add_argument("--backend", default=None, type=str,
                         help=add_option_backend_map.__doc__)
+    parser.add_argument("--backend-type", dest="backend_type", default="shelve",
+                        choices=["shelve", "sqlite"],
+                        help="backend storage type: shelve (default) or sqlite, "
+                             "an append only index for large datasets")
+
+
+def add_option_batch_size(parser, default=defaults.DEFAULT_BATCH_SIZE):
+    """rows per vectorised batch (0 to process row by row)"""
+    parser.add_argument("--batch-size", dest="batch_size", default=default, type=int,
+                        help=add_option_batch_size.__doc__)
 
 
 def add_option_config(parser):
@@ -158,6 +176,24 @@ def add_option_filter(parser):
     )
 
 
+def add_option_max_groups(parser):
+    """groups held in memory before spilling to disk (0 for no limit)"""
+    parser.add_argument("--max-groups", dest="max_groups", default=0, type=int,
+                        help=add_option_max_groups.__doc__)
+
+
+def add_option_top_k(parser):
+    """number of values reported by --top (default 10)"""
+    parser.add_argument("--top-k", dest="top_k", default=10, type=int,
+                        help=add_option_top_k.__doc__)
+
+
+def add_option_processes(parser):
+    """number of worker processes (0 to process in the current process)"""
+    parser.add_argument("--processes", dest="processes", default=0, type=int,
+                        help=add_option_processes.__doc__)
+
+
 def add_option_pattern(parser):
     """regualar expression pattern"""
     parser.add_argument("pattern", default=".*",
@@ -306,6 +342,15 @@ def add_options_join(parser):
                         help="append referred column")
     parser.add_argument("--all.left", action="store_true", dest="all_left", default=False,
                         help="include all left rows")
+    parser.add_argument("--all.right", action="store_true", dest="all_right", default=False,
+                        help="include all right rows")
+    parser.add_argument("--strategy", default="hash",
+                        choices=["hash", "sort_merge", "grace_hash"],
+                        help="join strategy (default hash)")
+    parser.add_argument("--presorted", action="store_true", default=False,
+                        help="inputs are sorted on join keys (sort_merge)")
+    parser.add_argument("--max-rows", dest="max_rows", default=1_000_000, type=int,
+                        help="right rows held in memory (grace_hash)")
 
 
 def add_option_relation_add(parser):
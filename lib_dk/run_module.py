@@ -78,7 +78,11 @@ class RunModule(module.MultiCommandModule):
 
         def get_aggregator():
             """build dkit.data.aggregator.Aggregate object from options"""
-            aggregator = agg.Aggregate()
+            aggregator = agg.Aggregate(
+                batch_size=self.args.batch_size,
+                processes=self.args.processes,
+                max_groups=self.args.max_groups
+            )
 
             # Check that at least one operation has been specified
             if not hasattr(self.args, "group_by_operations"):
@@ -88,6 +92,8 @@ class RunModule(module.MultiCommandModule):
             aggregator = aggregator + agg.GroupBy(*self.args.group_by)
 
             for operation in self.args.group_by_operations:
+                if isinstance(operation, agg.TopK):
+                    operation.k = self.args.top_k
                 aggregator = aggregator + operation
 
             return aggregator
@@ -246,18 +252,27 @@ class RunModule(module.MultiCommandModule):
         left = self.input_stream([self.args.left])
         right = self.input_stream([self.args.right])
 
-        if self.args.backend:
+        if self.args.backend and self.args.backend_type == "sqlite":
+            backend = containers.SQLiteMultiMap(self.args.backend)
+        elif self.args.backend:
             backend = containers.FlexShelve(self.args.backend)
         else:
             backend = None
 
+        if self.args.strategy == "sort_merge" and not self.args.presorted:
+            left = mp.external_sort(left, *self.args.const_cols)
+            right = mp.external_sort(right, *self.args.ref_cols)
+
         m = mp.merge(
             left,
             right,
             self.args.const_cols,
             self.args.ref_cols,
             self.args.all_left,
-            backend=backend
+            self.args.all_right,
+            backend=backend,
+            strategy=self.args.strategy,
+            max_rows=self.args.max_rows
         )
         self.push_to_uri(self.args.output, m)
 
@@ -284,6 +299,7 @@ class RunModule(module.MultiCommandModule):
             self.args.pivot,
             self.args.value_field,
             self.args.function,
+            processes=self.args.processes
         )
         if self.args.table:
             self.tabulate(list(p))
@@ -316,6 +332,10 @@ class RunModule(module.MultiCommandModule):
                 dest=name,
                 action=GroupByAction
             )
+        options.add_option_batch_size(parser_agg)
+        options.add_option_processes(parser_agg)
+        options.add_option_max_groups(parser_agg)
+        options.add_option_top_k(parser_agg)
         options.add_option_tabulate(parser_agg)
 
         # etl
@@ -366,6 +386,7 @@ class RunModule(module.MultiCommandModule):
                 dest=name,
                 action=PivotFunctionAction
             )
+        options.add_option_processes(parser_pivot)
         options.add_option_tabulate(parser_pivot)
 
         # execute
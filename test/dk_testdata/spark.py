@@ -0,0 +1,50 @@
+from pyspark.sql import types
+from pyspark.sql.types import (
+    StructType,
+    StringType,
+    IntegerType,
+    FloatType
+    )
+
+
+
+# mpg
+schema_mpg = StructType(
+    [
+        types.StructField("class", StringType(), True),
+        types.StructField("cty", IntegerType(), True),
+        types.StructField("cyl", IntegerType(), True),
+        types.StructField("displ", FloatType(), True),
+        types.StructField("drv", StringType(), True),
+        types.StructField("fl", StringType(), True),
+        types.StructField("hwy", IntegerType(), True),
+        types.StructField("index", IntegerType(), True),
+        types.StructField("manufacturer", StringType(), True),
+        types.StructField("model", StringType(), True),
+        types.StructField("trans", StringType(), True),
+        types.StructField("year", IntegerType(), True),
+        ]
+)
+
+# mtcars
+schema_mtcars = StructType(
+    [
+        types.StructField("am", IntegerType(), True),
+        types.StructField("car", StringType(), True),
+        types.StructField("carb", IntegerType(), True),
+        types.StructField("cyl", IntegerType(), True),
+        types.StructField("disp", FloatType(), True),
+        types.StructField("drat", FloatType(), True),
+        types.StructField("gear", IntegerType(), True),
+        types.StructField("hp", IntegerType(), True),
+        types.StructField("mpg", FloatType(), True),
+        types.StructField("qsec", FloatType(), True),
+        types.StructField("vs", IntegerType(), True),
+        types.StructField("wt", FloatType(), True),
+        ]
+)
+
+entity_map = {
+    "mpg": schema_mpg,
+    "mtcars": schema_mtcars,
+}
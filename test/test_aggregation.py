@@ -0,0 +1,455 @@
+#
+# Copyright (C) 2014  Cobus Nel
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+
+"""
+test dkit.data.aggregation
+
+=========== =============== =================================================
+19 Oct 2026 Cobus Nel       Created
+=========== =============== =================================================
+"""
+import glob
+import os
+import random
+import sys; sys.path.insert(0, "..")  # noqa
+import unittest
+from operator import itemgetter
+
+import numpy as np
+import pyarrow as pa
+
+from dkit.data import aggregation as agg
+from dkit.data.manipulate import iter_partials
+from dkit.exceptions import DKitDataException
+from dkit.data.stats import (
+    Accumulator, CountAccumulator, MomentAccumulator, SumAccumulator
+)
+
+
+def make_data(n=5000):
+    rnd = random.Random(42)
+    return [
+        {
+            "region": rnd.choice(["north", "south", "east", "west"]),
+            "product": rnd.choice(["product 1", "product 2", "product 3"]),
+            "amount": rnd.triangular(100, 250, 500),
+            "units": rnd.randint(0, 10),
+        }
+        for _ in range(n)
+    ]
+
+
+class Crash(object):
+    """worker template that exit the process without a result"""
+
+    def _feed_data(self, chunk):
+        os._exit(1)
+
+
+class TestAggregate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_data()
+
+    def accumulator_type(self, aggregator, target):
+        return type(next(iter(aggregator.accumulators[target].values())))
+
+    def reference(self, keys, target):
+        """aggregate with the full Accumulator"""
+        retval = {}
+        for row in self.data:
+            key = tuple(row[k] for k in keys)
+            retval.setdefault(key, Accumulator()).push(row[target])
+        return retval
+
+    def test_count_accumulator(self):
+        """count only use the CountAccumulator"""
+        a = agg.Aggregate() + agg.GroupBy("region") + agg.Count("amount")
+        result = list(a(self.data))
+        self.assertEqual(self.accumulator_type(a, "amount"), CountAccumulator)
+        ref = self.reference(["region"], "amount")
+        for row in result:
+            self.assertEqual(row["count_amount"], ref[(row["region"],)].observations)
+
+    def test_sum_accumulator(self):
+        """sum, min and max use the SumAccumulator"""
+        a = agg.Aggregate() + agg.GroupBy("region", "product") \
+            + agg.Sum("amount") + agg.Min("amount") + agg.Max("amount") \
+            + agg.Count("amount")
+        result = list(a(self.data))
+        self.assertEqual(self.accumulator_type(a, "amount"), SumAccumulator)
+        ref = self.reference(["region", "product"], "amount")
+        for row in result:
+            acc = ref[(row["region"], row["product"])]
+            self.assertAlmostEqual(row["sum_amount"], acc.sum, 2)
+            self.assertEqual(row["min_amount"], acc.min)
+            self.assertEqual(row["max_amount"], acc.max)
+            self.assertEqual(row["count_amount"], acc.observations)
+
+    def test_moment_accumulator(self):
+        """mean and variance use the MomentAccumulator"""
+        a = agg.Aggregate() + agg.GroupBy("region") + agg.Sum("amount") \
+            + agg.Mean("amount") + agg.Std("amount") + agg.Var("amount")
+        result = list(a(self.data))
+        self.assertEqual(self.accumulator_type(a, "amount"), MomentAccumulator)
+        ref = self.reference(["region"], "amount")
+        for row in result:
+            acc = ref[(row["region"],)]
+            self.assertAlmostEqual(row["avg_amount"], acc.mean, 4)
+            self.assertAlmostEqual(row["std_amount"], acc.stdev, 4)
+            self.assertAlmostEqual(row["var_amount"], acc.variance, 2)
+
+    def test_full_accumulator(self):
+        """quantiles upgrade to the full Accumulator"""
+        a = agg.Aggregate() + agg.GroupBy("region") + agg.Count("amount") \
+            + agg.Median("amount") + agg.Sum("units") \
+            + agg.Quantile("units", 0.9)
+        list(a(self.data))
+        self.assertEqual(self.accumulator_type(a, "amount"), Accumulator)
+        self.assertEqual(self.accumulator_type(a, "units"), Accumulator)
+
+    def test_order_by(self):
+        """order output by key"""
+        a = agg.Aggregate() + agg.GroupBy("region") + agg.Sum("units") \
+            + agg.OrderBy("region").reverse()
+        regions = [row["region"] for row in a(self.data)]
+        self.assertEqual(regions, sorted(regions, reverse=True))
+
+
+class TestSketchAggregations(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(5)
+        cls.data = [
+            {
+                "region": rnd.choice(["north", "south"]),
+                "customer": rnd.randint(0, 2000),
+                "product": rnd.choice(["a"] * 6 + ["b"] * 3 + ["c", "d", "e", "f"]),
+                "amount": rnd.random(),
+            }
+            for _ in range(20_000)
+        ]
+
+    def build(self, **kwargs):
+        return agg.Aggregate(**kwargs) + agg.GroupBy("region") \
+            + agg.CountDistinct("customer") + agg.TopK("product", 2) \
+            + agg.Sum("customer") + agg.Count("product") + agg.OrderBy("region")
+
+    def test_sketches(self):
+        """count distinct and top k share targets with other aggregations"""
+        result = list(self.build()(self.data))
+        for row in result:
+            rows = [r for r in self.data if r["region"] == row["region"]]
+            distinct = len(set(r["customer"] for r in rows))
+            self.assertAlmostEqual(row["distinct_customer"], distinct, delta=distinct * 0.03)
+            self.assertEqual([v for v, _ in row["top2_product"]], ["a", "b"])
+            self.assertEqual(row["count_product"], len(rows))
+            self.assertAlmostEqual(row["sum_customer"], sum(r["customer"] for r in rows))
+
+    def test_batches(self):
+        """sketches on batches, spilled and parallel aggregations"""
+        expected = list(self.build()(self.data))
+        for kwargs in [{"batch_size": 1000}, {"max_groups": 1}, {"processes": 2}]:
+            self.assertEqual(list(self.build(**kwargs)(self.data)), expected)
+        table = pa.Table.from_pylist(self.data)
+        self.assertEqual(list(self.build()([table])), expected)
+
+
+class TestVectorisedAggregate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_data()
+        for i, row in enumerate(cls.data):
+            if i % 7 == 0:
+                row["units"] = None
+
+    def build(self, batch_size=0, *extra):
+        a = agg.Aggregate(batch_size=batch_size) + agg.GroupBy("region", "product") \
+            + agg.Sum("amount") + agg.Count("units") + agg.Min("amount") \
+            + agg.Max("units") + agg.Mean("units") + agg.Std("amount")
+        for modifier in extra:
+            a = a + modifier
+        return a + agg.OrderBy("region", "product")
+
+    def assertResultsEqual(self, result, expected):
+        self.assertEqual(len(result), len(expected))
+        for row, expected_row in zip(result, expected):
+            self.assertEqual(row.keys(), expected_row.keys())
+            for k, v in expected_row.items():
+                if isinstance(v, float):
+                    self.assertAlmostEqual(row[k], v, 4)
+                else:
+                    self.assertEqual(row[k], v)
+
+    def test_batched_rows(self):
+        """aggregate rows in vectorised batches"""
+        expected = list(self.build()(self.data))
+        result = list(self.build(batch_size=999)(self.data))
+        self.assertResultsEqual(result, expected)
+
+    def test_batch_order(self):
+        """batches produce groups in order of first appearance with key types"""
+        data = [
+            {"k": k, "j": j, "v": 1.0}
+            for k, j in [(3, "b"), ("a", "b"), (1, "a"), (3, "b"), (1.5, "c"), (1, "b")]
+        ]
+
+        def build(**kwargs):
+            return agg.Aggregate(**kwargs) + agg.GroupBy("k", "j") + agg.Sum("v")
+
+        expected = list(build()(data))
+        for batch_size in [2, 100]:
+            result = list(build(batch_size=batch_size)(data))
+            self.assertEqual(result, expected)
+            self.assertEqual([type(r["k"]) for r in result], [int, str, int, float, int])
+        table = pa.table({"k": [3, 2, 3, 1], "v": [1.0, 2.0, 3.0, 4.0]})
+        a = agg.Aggregate() + agg.GroupBy("k") + agg.Sum("v")
+        self.assertEqual([r["k"] for r in a([table])], [3, 2, 1])
+        array = np.array(
+            [(3, 1.0), (2, 2.0), (3, 3.0), (1, 4.0)], dtype=[("k", int), ("v", float)]
+        )
+        a = agg.Aggregate() + agg.GroupBy("k") + agg.Sum("v")
+        self.assertEqual([r["k"] for r in a([array])], [3, 2, 1])
+
+    def test_arrow_batches(self):
+        """aggregate pyarrow record batches and tables"""
+        expected = list(self.build()(self.data))
+        table = pa.Table.from_pylist(self.data)
+        self.assertResultsEqual(
+            list(self.build()(table.to_batches(max_chunksize=1000))),
+            expected
+        )
+        self.assertResultsEqual(list(self.build()([table])), expected)
+
+    def test_numpy_batches(self):
+        """aggregate NumPy structured arrays"""
+        data = [r for r in self.data if r["units"] is not None]
+        expected = list(self.build()(data))
+        dtype = [("region", "U5"), ("product", "U9"), ("amount", float), ("units", int)]
+        array = np.array([tuple(r.values()) for r in data], dtype=dtype)
+        result = list(self.build()([array[:2000], array[2000:]]))
+        self.assertResultsEqual(result, expected)
+
+    def test_feed_batch(self):
+        """feed mappings of column arrays"""
+        expected = list(self.build()(self.data))
+        a = self.build()
+        for i in range(0, len(self.data), 1500):
+            chunk = self.data[i:i + 1500]
+            a.feed_batch({k: [r[k] for r in chunk] for k in self.data[0]})
+        self.assertResultsEqual(list(a.results()), expected)
+
+    def test_quantiles(self):
+        """quantiles on batches use the full accumulator"""
+        extra = (agg.Median("amount"), agg.Quantile("units", 0.9))
+        expected = list(self.build(0, *extra)(self.data))
+        result = list(self.build(1000, *extra)(self.data))
+        self.assertResultsEqual(result, expected)
+
+    def test_null_group(self):
+        """groups with only null values in the first slot are retained"""
+        data = [dict(r) for r in self.data]
+        data.extend({"region": "z", "product": "z", "amount": 1.0, "units": None} for _ in range(3))
+        a = agg.Aggregate(batch_size=100) + agg.GroupBy("region", "product") \
+            + agg.Median("units") + agg.Sum("amount") + agg.OrderBy("region", "product")
+        result = list(a(data))
+        self.assertEqual(len(result), 13)
+        self.assertEqual(result[-1]["sum_amount"], 3.0)
+        self.assertTrue(np.isnan(result[-1]["median_units"]))
+
+    def test_no_groups(self):
+        """aggregate batches without group by keys"""
+        a = agg.Aggregate(batch_size=100) + agg.Sum("amount") + agg.Count("units")
+        row = list(a(self.data))[0]
+        self.assertAlmostEqual(row["sum_amount"], sum(r["amount"] for r in self.data), 2)
+        self.assertEqual(
+            row["count_units"],
+            len([r for r in self.data if r["units"] is not None])
+        )
+
+
+class TestParallelAggregate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_data(20_000)
+
+    def build(self, **kwargs):
+        return agg.Aggregate(**kwargs) + agg.GroupBy("region", "product") \
+            + agg.Sum("amount") + agg.Count("units") + agg.Std("amount") \
+            + agg.Median("amount") + agg.OrderBy("region", "product")
+
+    def test_parallel(self):
+        """merge worker results into the same result as a single process"""
+        expected = list(self.build()(self.data))
+        for kwargs in [{"batch_size": 0}, {"batch_size": 1000}]:
+            result = list(self.build(processes=2, **kwargs)(self.data))
+            self.assertEqual(len(result), len(expected))
+            for row, expected_row in zip(result, expected):
+                self.assertAlmostEqual(row["sum_amount"], expected_row["sum_amount"], 2)
+                self.assertEqual(row["count_units"], expected_row["count_units"])
+                self.assertAlmostEqual(row["std_amount"], expected_row["std_amount"], 4)
+                self.assertAlmostEqual(
+                    row["median_amount"], expected_row["median_amount"], delta=1.0
+                )
+
+    def test_parallel_batches(self):
+        """aggregate pyarrow batches in worker processes"""
+        expected = list(self.build()(self.data))
+        table = pa.Table.from_pylist(self.data)
+        for data in [table.to_batches(max_chunksize=3000), [table]]:
+            result = list(self.build(processes=2)(data))
+            self.assertEqual(len(result), len(expected))
+            for row, expected_row in zip(result, expected):
+                self.assertEqual(row["region"], expected_row["region"])
+                self.assertAlmostEqual(row["sum_amount"], expected_row["sum_amount"], 2)
+                self.assertEqual(row["count_units"], expected_row["count_units"])
+
+    def test_worker_exit(self):
+        """a worker that exit without a result raise instead of blocking"""
+        with self.assertRaises(DKitDataException):
+            list(iter_partials(Crash(), [[1], [2], [3]], 2))
+
+    def test_parallel_error(self):
+        """errors in workers are raised in the parent"""
+        a = agg.Aggregate(processes=2) + agg.GroupBy("k") + agg.Sum("v")
+        with self.assertRaises(ValueError):
+            list(a([{"k": 1, "v": "x"}]))
+
+
+class TestSpillAggregate(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = make_data(20_000)
+
+    def build(self, **kwargs):
+        return agg.Aggregate(**kwargs) + agg.GroupBy("region", "product") \
+            + agg.Sum("amount") + agg.Count("units") + agg.Std("amount") \
+            + agg.Median("amount") + agg.OrderBy("region", "product")
+
+    def test_spill(self):
+        """spilled aggregation equal in memory aggregation"""
+        expected = list(self.build()(self.data))
+        for kwargs in [{"batch_size": 0}, {"batch_size": 1000}]:
+            a = self.build(max_groups=5, partitions=4, **kwargs)
+            result = list(a(self.data))
+            self.assertIsNone(a._spill_dir)
+            self.assertEqual(len(result), len(expected))
+            for row, expected_row in zip(result, expected):
+                # merged t-digests approximate the median
+                self.assertAlmostEqual(
+                    row.pop("median_amount"), expected_row["median_amount"], delta=1.0
+                )
+                self.assertEqual(
+                    row, {k: v for k, v in expected_row.items() if k != "median_amount"}
+                )
+
+    def test_spill_workers(self):
+        """worker processes spill when the budget is exceeded"""
+        data = [{"k": i % 2000, "v": float(i)} for i in range(20_000)]
+        a = agg.Aggregate() + agg.GroupBy("k") + agg.Sum("v") + agg.OrderBy("k")
+        expected = list(a(data))
+        a = agg.Aggregate(processes=2, max_groups=100, batch_size=1000) + agg.GroupBy("k") \
+            + agg.Sum("v") + agg.OrderBy("k")
+        a._feed_data(data)
+        self.assertTrue(a._spilled)
+        writers = {
+            f.rsplit("_", 1)[1] for f in glob.glob(os.path.join(a._spill_path, "*.pkl"))
+        }
+        writers.discard(f"{os.getpid()}.pkl")
+        self.assertGreater(len(writers), 0)
+        self.assertEqual(list(a.results()), expected)
+        self.assertIsNone(a._spill_dir)
+
+    def test_repartition(self):
+        """partitions that exceed the budget are partitioned again"""
+        splits = []
+
+        class Aggregate(agg.Aggregate):
+            def _split_partition(self, partition, file_names, n, depth):
+                splits.append(n)
+                yield from super()._split_partition(partition, file_names, n, depth)
+
+        data = [{"k": i % 1000, "v": float(i)} for i in range(5000)]
+        a = agg.Aggregate() + agg.GroupBy("k") + agg.Sum("v") + agg.OrderBy("k")
+        expected = list(a(data))
+        a = Aggregate(max_groups=50, partitions=2) + agg.GroupBy("k") + agg.Sum("v") \
+            + agg.OrderBy("k")
+        self.assertEqual(list(a(data)), expected)
+        self.assertGreater(len(splits), 0)
+        self.assertGreaterEqual(max(splits), 5)
+
+    def test_spill_null_slot(self):
+        """groups held only by slots after a nullable first slot are spilled"""
+        data = [
+            {"k": i % 150, "u": float(i) if i % 150 < 10 else None, "v": float(i)}
+            for i in range(3000)
+        ]
+
+        def build(**kwargs):
+            return agg.Aggregate(**kwargs) + agg.GroupBy("k") + agg.Median("u") \
+                + agg.Sum("v") + agg.OrderBy("k")
+
+        expected = [r["sum_v"] for r in build()(data)]
+        a = build(batch_size=100, max_groups=20, partitions=4)
+        self.assertEqual([r["sum_v"] for r in a(data)], expected)
+
+        # first slot empty, second slot populated
+        a = build(max_groups=10)
+        a.accumulators["v"][(1,)].push(1.0)
+        self.assertEqual(a.n_groups, 1)
+        a._spill()
+        self.assertEqual(a.n_groups, 0)
+        result = list(a.results())
+        self.assertEqual([(r["k"], r["sum_v"]) for r in result], [(1, 1.0)])
+
+    def test_spill_equal_keys(self):
+        """keys that compare equal are merged into one group"""
+        data = [{"k": i % 40 if (i // 40) % 2 else float(i % 40), "v": 1.0} for i in range(400)]
+        a = agg.Aggregate() + agg.GroupBy("k") + agg.Sum("v") + agg.OrderBy("k")
+        expected = list(a(data))
+        a = agg.Aggregate(max_groups=5, partitions=8, batch_size=10) + agg.GroupBy("k") \
+            + agg.Sum("v") + agg.OrderBy("k")
+        self.assertEqual(list(a(data)), expected)
+
+    def test_spill_ordered_descending(self):
+        """spilled results are ordered with an external sort"""
+        a = agg.Aggregate() + agg.GroupBy("region", "product") + agg.Sum("amount") \
+            + agg.OrderBy("region", "product").reverse()
+        b = agg.Aggregate(max_groups=2, partitions=3) + agg.GroupBy("region", "product") \
+            + agg.Sum("amount") + agg.OrderBy("region", "product").reverse()
+        self.assertEqual(list(a(self.data)), list(b(self.data)))
+
+    def test_spill_unordered(self):
+        """same groups are produced without an order"""
+        a = agg.Aggregate() + agg.GroupBy("region") + agg.Sum("amount")
+        b = agg.Aggregate(max_groups=1, partitions=3) + agg.GroupBy("region") \
+            + agg.Sum("amount")
+        key = itemgetter("region")
+        self.assertEqual(
+            sorted(a(self.data), key=key),
+            sorted(b(self.data), key=key)
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -30,6 +30,7 @@ from dkit.data.containers import (
     ReusableStack,
     SizedMap,
     SortedCollection,
+    SQLiteMultiMap,
 )
 from random import shuffle
 from pathlib import Path
@@ -237,6 +238,57 @@ class TestFlexShelf(unittest.TestCase):
         path.unlink()
 
 
+class TestSQLiteMultiMap(unittest.TestCase):
+
+    def setUp(self):
+        self.path = Path.cwd() / "data" / "multimap.sqlite"
+        if self.path.exists():
+            self.path.unlink()
+        self.db = SQLiteMultiMap(str(self.path), batch_size=100, cache_size=10)
+
+    def tearDown(self):
+        self.db.close()
+        self.path.unlink()
+
+    def test_append(self):
+        for i in range(1000):
+            self.db.append((i % 7, "a"), {"i": i})
+        self.assertEqual(len(self.db), 7)
+        self.assertEqual(list(self.db), [(i, "a") for i in range(7)])
+        self.assertEqual(
+            self.db[(3, "a")],
+            [{"i": i} for i in range(1000) if i % 7 == 3]
+        )
+        # cached values are invalidated by appends
+        self.db.append((3, "a"), {"i": -1})
+        self.assertEqual(self.db[(3, "a")][-1], {"i": -1})
+
+    def test_mapping(self):
+        self.db["a"] = [1, 2]
+        self.db["a"] = [3]
+        self.assertEqual(self.db["a"], [3])
+        self.assertIn("a", self.db)
+        self.assertEqual(self.db.get("b", []), [])
+        del self.db["a"]
+        self.assertNotIn("a", self.db)
+        with self.assertRaises(KeyError):
+            self.db["a"]
+
+    def test_reopen(self):
+        self.db.append(1, "x")
+        self.db.close()
+        self.db = SQLiteMultiMap(str(self.path), reuse=True)
+        self.assertEqual(self.db[1], ["x"])
+
+    def test_reopen_truncate(self):
+        """values in an existing file are removed by default"""
+        self.db.append(1, "x")
+        self.db.close()
+        self.db = SQLiteMultiMap(str(self.path))
+        self.assertNotIn(1, self.db)
+        self.assertEqual(len(self.db), 0)
+
+
 class TestOrderedSet(unittest.TestCase):
 
     def setUp(self):
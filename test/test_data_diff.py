@@ -25,6 +25,7 @@ from dkit.data.diff import Compare
 from dkit.etl import source
 from dkit import NA_VALUE
 import random
+from decimal import Decimal
 
 
 N = 5  # Number of samples to modify
@@ -144,6 +145,37 @@ class TestDataDiff(unittest.TestCase):
         for row in l_modified:
             self.assertEqual(row["score.delta"], -10)
 
+    def test_changed_huge(self):
+        a, b = self.sample_changed(N)
+        c = Compare(a, b, keys=["id"], huge=True, partitions=8)
+        self.assertEqual(
+            sorted(r["id"] for r in c.changed("name")),
+            sorted(r["id"] for r in Compare(a, b, keys=["id"]).changed("name"))
+        )
+        # all fields compared if no fields specified
+        self.assertEqual(len(list(c.changed())), N)
+
+    def test_huge_equal_keys(self):
+        """keys that compare equal match in partitions"""
+        a = [{"id": i, "score": 1} for i in range(100)]
+        b = [{"id": k, "score": 1} for k in [float(i) for i in range(50)]
+             + [Decimal(i) for i in range(50, 100)]]
+        for huge in [False, True]:
+            c = Compare(a, b, keys=["id"], huge=huge, partitions=16)
+            self.assertEqual(list(c.added()), [])
+            self.assertEqual(list(c.deleted()), [])
+
+    def test_huge_processes(self):
+        """partitions compared in worker processes"""
+        a, b = self.sample_delta(N)
+        del b[0]
+        b.append({"id": "new", "name": "new", "score": 1})
+        c = Compare(a, b, keys=["id"], huge=True, partitions=4, processes=2)
+        l_modified = list(c.deltas("score"))
+        self.assertEqual(len(l_modified), len([i for i in l_modified if i["score.delta"] == -10]))
+        self.assertEqual([i["id"] for i in c.added()], ["new"])
+        self.assertEqual([i["id"] for i in c.deleted()], [a[0]["id"]])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,85 @@
+#
+# Copyright (C) 2026  Cobus Nel
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+test dkit.etl.transform
+
+=========== =============== =================================================
+19 Oct 2026 Cobus Nel       Created
+=========== =============== =================================================
+"""
+import sys; sys.path.insert(0, "..")  # noqa
+import unittest
+
+from dkit.data.filters import ExpressionFilter, Proxy
+from dkit.etl import reader, schema, source, transform
+
+
+class TestFusedPipeline(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        src = source.JsonlSource([reader.FileReader("input_files/sample.jsonl")])
+        cls.data = list(src)
+        cls.validator = schema.EntityValidator.from_iterable(cls.data)
+        cls.rules = {"name": "upper(${name})", "double": "${score} * 2"}
+
+    def layered(self, row_filter):
+        """reference implementation with separate generators"""
+        rows = transform.CoerceTransform(self.validator)(self.data)
+        rows = filter(row_filter, rows)
+        return list(transform.FormulaTransform(self.rules)(rows))
+
+    def test_fused(self):
+        row_filter = ExpressionFilter("${score} > 50 & ${year} < 2000")
+        pipeline = transform.FusedPipeline(
+            validator=self.validator,
+            row_filter=row_filter,
+            rule_map=self.rules,
+        )
+        self.assertEqual(list(pipeline(self.data)), self.layered(row_filter))
+        # expressions are inlined
+        self.assertIn("row['score']", pipeline.source)
+
+    def test_proxy_filter(self):
+        row_filter = Proxy().score > 50
+        pipeline = transform.FusedPipeline(row_filter=row_filter, fields=["id"])
+        self.assertEqual(
+            list(pipeline(self.data)),
+            [{"id": row["id"]} for row in self.data if row["score"] > 50]
+        )
+
+    def test_none(self):
+        """None semantics of expressions are preserved"""
+        pipeline = transform.FusedPipeline(rule_map={"a": "${x} + 1"})
+        self.assertEqual(list(pipeline([{"x": None}, {"x": 1}])), [{"a": 0}, {"a": 2}])
+
+    def test_batch(self):
+        import pyarrow as pa
+        pipeline = transform.FusedPipeline(
+            row_filter=ExpressionFilter("${score} > 50"),
+            rule_map={"double": "${score} * 2"},
+        )
+        batch = pa.Table.from_pylist(self.data)
+        self.assertEqual(
+            pipeline.process_batch(batch).to_pylist(),
+            list(pipeline(self.data))
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
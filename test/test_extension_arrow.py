@@ -1,4 +1,5 @@
 import datetime
+from decimal import Decimal
 import os
 import sys; sys.path.insert(0, "..")  # noqa
 import unittest
@@ -14,14 +15,16 @@ from dkit.data.fake_helper import (
 from dkit.etl import source
 from dkit.etl.extensions.ext_arrow import (
     ArrowSchemaGenerator, ParquetSink, ParquetSource, build_table,
-    infer_arrow_schema, infer_and_coerce_arrow_schema,
-    auto_write_parquet, make_arrow_schema, make_partition_path,
-    write_chunked_datasets, clear_partition_data
+    build_columnar_table, infer_arrow_schema, infer_and_coerce_arrow_schema,
+    infer_native_arrow_schema, auto_write_parquet, make_arrow_schema,
+    make_partition_path, write_chunked_datasets, clear_partition_data
 )
 from dkit.etl.model import Entity
 from dkit.etl.reader import FileReader
 from dkit.etl.schema import EntityValidator
 from dkit.etl.writer import FileWriter
+from dkit.utilities.benchmarking import benchmark
+from tabulate import tabulate
 
 
 TEST_DIR = Path(__file__).resolve().parent
@@ -34,6 +37,7 @@ AUTO_WRITE_TYPED_FILE = str(DATA_DIR / "auto_write_typed.parquet")
 COERCE_INFER_FILE = str(DATA_DIR / "coerce_infer.parquet")
 COERCE_SCHEMA_FILE = str(DATA_DIR / "coerce_schema.parquet")
 OPEN_WRITER_FILE = str(OUTPUT_DIR / "open_writer.parquet")
+COLUMNAR_FILE = str(OUTPUT_DIR / "columnar.parquet")
 
 
 class OpenBinaryReader:
@@ -239,6 +243,80 @@ class TestPyArrowExtension(unittest.TestCase):
         self.assertEqual(type(row["created_at"]), datetime.datetime)
 
 
+class TestColumnarArrow(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = list(generate_data_rows(1000))
+        cls.schema = make_arrow_schema(Entity(CANNONICAL_ROW_SCHEMA))
+
+    def test_native_schema_matches_entity_inference(self):
+        """native inference produce the same schema as entity inference"""
+        for rows in (self.data, list(persons(100))):
+            expected, _ = infer_arrow_schema(rows)
+            inferred, data = infer_native_arrow_schema(rows)
+            self.assertEqual(inferred, expected)
+            self.assertEqual(list(data), rows)
+
+    def test_native_schema_unify(self):
+        """unify types over the sample and widen where required"""
+        rows = [
+            {"amount": 10, "big": 2 ** 40, "mixed": 1, "text": "a"},
+            {"amount": None, "big": 1, "mixed": 2.5, "text": 1, "extra": None},
+        ]
+        schema, _ = infer_native_arrow_schema(rows)
+        self.assertEqual(schema.field("amount").type, pa.int32())
+        self.assertEqual(schema.field("big").type, pa.int64())
+        self.assertEqual(schema.field("mixed").type, pa.float32())
+        self.assertEqual(schema.field("text").type, pa.string())
+        self.assertEqual(schema.field("extra").type, pa.string())
+
+    def test_native_schema_decimal(self):
+        """widen decimal precision and scale from make_decimal defaults"""
+        rows = [
+            {"small": Decimal("1.5"), "wide": Decimal("123456789012345.12345")},
+        ]
+        schema, _ = infer_native_arrow_schema(rows)
+        self.assertEqual(schema.field("small").type, pa.decimal128(12, 2))
+        self.assertEqual(schema.field("wide").type, pa.decimal128(20, 5))
+
+    def test_columnar_table(self):
+        """columnar and row based table building produce identical tables"""
+        expected = build_table(self.data, schema=self.schema, micro_batch_size=100)
+        table = build_columnar_table(self.data, schema=self.schema, micro_batch_size=100)
+        self.assertEqual(table, expected)
+
+    def test_columnar_table_noschema(self):
+        """build a columnar table with a natively inferred schema"""
+        table = build_columnar_table(persons(1001), micro_batch_size=100)
+        self.assertEqual(len(table), 1001)
+        self.assertEqual(table.schema.field("birthday").type, pa.timestamp("us"))
+
+    def test_columnar_sink(self):
+        """write parquet through the columnar sink path"""
+        ParquetSink(FileWriter(COLUMNAR_FILE, "wb"), columnar=True).process(self.data)
+        with source.load(COLUMNAR_FILE) as infile:
+            retrieved = list(infile)
+        self.assertEqual(len(retrieved), len(self.data))
+        self.assertEqual(retrieved[0]["date"], self.data[0]["date"])
+
+    def test_benchmark(self):
+        """benchmark row based against columnar table building"""
+        data = list(persons(5_000))
+        schema, _ = infer_arrow_schema(data)
+
+        def row_based():
+            infer_arrow_schema(data, 1_000)
+            build_table(data, schema, 1_000)
+
+        def columnar():
+            infer_native_arrow_schema(data, 1_000)
+            build_columnar_table(data, schema, 1_000)
+
+        results = benchmark((row_based, columnar), 5, 2)
+        print(tabulate(results.table(), floatfmt=",.2f", headers="keys"))
+
+
 class TestDataTypesCoverage(unittest.TestCase):
     """make sure all data types are written and read correctly"""
 
@@ -7,6 +7,7 @@ from re import RegexFlag
 
 sys.path.insert(0, "..")  # noqa
 from dkit.data.filters import Proxy, ExpressionFilter, search_filter, match_filter
+from dkit.exceptions import DKitDataException
 from dkit.etl.utilities import source_factory
 from dkit.parsers import uri_parser
 
@@ -228,5 +229,117 @@ class TestFilter(unittest.TestCase):
         self.assertEqual(len(result), 2)
 
 
+class TestBatchFilter(unittest.TestCase):
+    """vectorised evaluation of filters"""
+
+    @classmethod
+    def setUpClass(cls):
+        import pyarrow as pa
+        cls.data = TestFilter.data
+        cls.table = pa.Table.from_pylist(cls.data)
+
+    def test_proxy(self):
+        """mask agree with row evaluation"""
+        tests = [
+            expr.address.prefix.exists(),
+            ~ expr.address.prefix.exists(),
+            (expr.address.prefix.exists()) & (expr.name == 'james'),
+            ~ (expr.address.city == 'London'),
+            (expr.name == 'james') | (expr.name == 'peter'),
+            expr.score != 45,
+            expr.score < 55,
+            expr.score >= 55,
+            expr.name.isin("james", "Jane", "Tarzan"),
+            expr.name.match(r"ja"),
+            expr.name.search(r"e"),
+            expr.score.filter(lambda x: x >= 55),
+        ]
+        for test in tests:
+            self.assertEqual(
+                test.mask(self.table).to_pylist(),
+                [test(row) for row in self.data]
+            )
+
+    def test_filter_batch(self):
+        test = expr.address.city == "New York"
+        self.assertEqual(test.filter_batch(self.table).num_rows, 2)
+
+    def test_expression(self):
+        """expression filter agree with row evaluation"""
+        expressions = [
+            "${score} > 50",
+            '${name} == "james" | ${score} < 40',
+            'match(${name}, "^[jp]")',
+            "upper(${name}) == \"PETER\"",
+            "str(${score}) == \"45\"",
+        ]
+        for expression in expressions:
+            f = ExpressionFilter(expression)
+            self.assertEqual(
+                f.mask(self.table).to_pylist(),
+                [bool(f(row)) for row in self.data],
+                expression
+            )
+
+    def test_numpy(self):
+        import numpy as np
+        batch = np.array(
+            [(1, 2.0), (2, 1.0)],
+            dtype=[("a", "i8"), ("b", "f8")]
+        )
+        f = ExpressionFilter("${a} * 2 > ${b}")
+        self.assertEqual(f.mask(batch).to_pylist(), [False, True])
+        self.assertEqual(f.filter_batch(batch).num_rows, 1)
+
+
+class TestCompiledProxy(unittest.TestCase):
+    """compiled Proxy tests"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = TestFilter.data
+        cls.tests = [
+            expr.address.prefix.exists(),
+            ~ expr.address.prefix.exists(),
+            (expr.address.prefix.exists()) & (expr.name == 'james'),
+            ~ (expr.address.city == 'London'),
+            (expr.name == 'james') | (expr.name == 'peter'),
+            (expr.name == 'james') & (expr.score <= 55),
+            expr.score != 45,
+            expr.score < 55,
+            expr.score >= 55,
+            expr.name.isin("james", "Jane", "Tarzan"),
+            ~ expr.name.isin("james", "Jane", "Tarzan"),
+            expr.name.match(r"ja"),
+            expr.name.search(r"e"),
+            expr.score.filter(lambda x: x >= 55),
+            expr["address"]["country"] == "US",
+        ]
+
+    def test_compile(self):
+        """compiled tests agree with the tree"""
+        for test in self.tests:
+            fn = test.compile()
+            self.assertEqual(
+                [fn(row) for row in self.data],
+                [test(row) for row in self.data]
+            )
+
+    def test_short_circuit(self):
+        test = (expr.address.prefix.exists()) & (expr.address.prefix > 5)
+        self.assertEqual(len(list(filter(test.compile(), self.data))), 1)
+
+    def test_to_arrow(self):
+        import pyarrow as pa
+        table = pa.Table.from_pylist(self.data)
+        for test in self.tests[:-2]:
+            self.assertEqual(
+                table.filter(test.to_arrow()).num_rows,
+                sum(1 for row in self.data if test(row)),
+            )
+        with self.assertRaises(DKitDataException):
+            expr.score.filter(lambda x: x >= 55).to_arrow()
+
+
 if __name__ == "__main__":
     unittest.main()
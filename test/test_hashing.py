@@ -0,0 +1,144 @@
+#
+# Copyright (C) 2026  Cobus Nel
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+test dkit.data.hashing
+
+=========== =============== =================================================
+19 Oct 2026 Cobus Nel       Created
+=========== =============== =================================================
+"""
+import sys; sys.path.insert(0, "..")  # noqa
+import datetime
+import unittest
+from collections import OrderedDict
+from decimal import Decimal
+
+import numpy as np
+
+from dkit.data.hashing import (
+    canonical, encode, encode_key, get_hasher, hash_rows, row_hash
+)
+
+
+class TestHashing(unittest.TestCase):
+
+    def setUp(self):
+        self.row = {
+            "id": 1,
+            "name": "john",
+            "amount": Decimal("10.50"),
+            "birthday": datetime.date(2000, 1, 31),
+            "created": datetime.datetime(2020, 5, 1, 12, 30),
+            "tags": ["a", "b"],
+            "missing": None,
+        }
+
+    def test_key_order(self):
+        """order of fields do not affect the hash"""
+        reordered = dict(reversed(list(self.row.items())))
+        self.assertEqual(row_hash(self.row), row_hash(reordered))
+        self.assertEqual(row_hash(self.row), row_hash(OrderedDict(reordered)))
+
+    def test_typed(self):
+        """values of different types hash differently"""
+        hashes = {row_hash({"a": v}) for v in [1, 1.0, "1", True, b"1", None]}
+        self.assertEqual(len(hashes), 6)
+        self.assertNotEqual(
+            row_hash({"a": datetime.date(2020, 1, 1)}),
+            row_hash({"a": datetime.datetime(2020, 1, 1)})
+        )
+        self.assertNotEqual(row_hash({"a": [1]}), row_hash({"a": (1,)}))
+
+    def test_decimal(self):
+        """decimals are normalised"""
+        self.assertEqual(
+            row_hash({"a": Decimal("1.0")}),
+            row_hash({"a": Decimal("1.00")})
+        )
+        self.assertNotEqual(
+            row_hash({"a": Decimal("1")}),
+            row_hash({"a": 1})
+        )
+
+    def test_numpy(self):
+        """numpy scalars hash as the equivalent python value"""
+        self.assertEqual(row_hash({"a": np.int64(5)}), row_hash({"a": 5}))
+        self.assertEqual(row_hash({"a": np.float64(1.5)}), row_hash({"a": 1.5}))
+
+    def test_nested(self):
+        self.assertEqual(
+            encode({"a": {"y": 1, "x": {2, 1}}}),
+            encode({"a": {"x": {1, 2}, "y": 1}})
+        )
+
+    def test_encode_key(self):
+        """values that compare equal encode the same"""
+        for a, b in [(1, 1.0), (1, True), (1, Decimal("1.00")), (0.5, Decimal("0.5")),
+                     (np.int64(2), 2.0), ((1, "a"), (1.0, "a")),
+                     ({"x": 1, "y": 2}, {"y": 2.0, "x": 1}), ({1, 2}, frozenset([2.0, 1]))]:
+            self.assertEqual(a, b)
+            self.assertEqual(encode_key(a), encode_key(b))
+        for a, b in [(1, "1"), (1, 1.5), ([1], (1,)), (0.1, Decimal("0.1"))]:
+            self.assertNotEqual(a, b)
+            self.assertNotEqual(encode_key(a), encode_key(b))
+
+    def test_unsupported(self):
+        with self.assertRaises(TypeError):
+            canonical(object())
+
+    def test_keys(self):
+        """only key fields are hashed"""
+        other = dict(self.row, name="peter")
+        self.assertEqual(
+            row_hash(self.row, keys=["id", "birthday"]),
+            row_hash(other, keys=["id", "birthday"]),
+        )
+        self.assertNotEqual(row_hash(self.row), row_hash(other))
+        self.assertNotEqual(
+            row_hash(self.row, keys=["id", "name"]),
+            row_hash(other, keys=["id", "name"]),
+        )
+
+    def test_algorithms(self):
+        self.assertLess(row_hash(self.row, algorithm="xxh3_64"), 2**64)
+        self.assertGreaterEqual(row_hash(self.row, algorithm="xxh3_128"), 2**64)
+        h = row_hash(self.row, algorithm="md5")
+        self.assertEqual(len(h), 32)
+        with self.assertRaises(ValueError):
+            get_hasher(algorithm="sha0")
+
+    def test_stable(self):
+        """hash is deterministic"""
+        self.assertEqual(
+            row_hash({"a": 1, "b": "x"}, algorithm="md5"),
+            "23fdf419c9cda1bafe030d2b419d7d27"
+        )
+
+    def test_hash_rows(self):
+        rows = [dict(self.row, id=i) for i in range(10)]
+        hashes = hash_rows(rows, algorithm="xxh3_128")
+        self.assertEqual(len(set(hashes)), 10)
+        self.assertEqual(hashes, [row_hash(r, algorithm="xxh3_128") for r in rows])
+        self.assertEqual(
+            hash_rows(rows, keys=["id"]),
+            [row_hash(r, keys=["id"]) for r in rows]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
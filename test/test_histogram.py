@@ -22,9 +22,11 @@ Created on 16 Feb 2015
 '''
 import unittest
 import sys; sys.path.insert(0, "..") # noqa
+import pickle
 import random
 from math import exp
-from dkit.data.histogram import Histogram, LegacyHistogram
+import numpy as np
+from dkit.data.histogram import Histogram, HistogramBuilder, LegacyHistogram
 from dkit.data.helpers import frange
 from dkit.plot import ggrammar
 from dkit.plot.gnuplot import BackendGnuPlot
@@ -68,6 +70,50 @@ class TestHistogram(unittest.TestCase):
             print(str(h_data))
 
 
+class TestHistogramBuilder(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(3)
+        self.data = [rnd.gauss(0, 1) for _ in range(10_000)]
+
+    def test_numpy(self):
+        """counts agree with numpy.histogram"""
+        b = HistogramBuilder.from_range(-2, 2, 8)
+        for i in range(0, len(self.data), 999):
+            b.update(self.data[i:i + 999])
+        counts, _ = np.histogram(self.data, bins=8, range=(-2, 2))
+        self.assertEqual([i.count for i in b.histogram().bins], list(counts))
+        self.assertEqual(b.underflow, sum(1 for i in self.data if i < -2))
+        self.assertEqual(b.overflow, sum(1 for i in self.data if i > 2))
+        self.assertEqual(b.observations, len(self.data))
+        self.assertEqual(
+            sum(i.count for i in b.histogram(clip=True).bins),
+            len(self.data)
+        )
+
+    def test_merge(self):
+        """partial histograms merge and pickle"""
+        a = HistogramBuilder.from_range(-2, 2, 8)
+        b = pickle.loads(pickle.dumps(HistogramBuilder.from_range(-2, 2, 8)))
+        a.update(self.data[:5000])
+        b.update_rows(({"v": i} for i in self.data[5000:]), "v", batch_size=100)
+        c = HistogramBuilder.from_range(-2, 2, 8)
+        c.update(self.data)
+        self.assertEqual(list((a + b).counts), list(c.counts))
+        with self.assertRaises(ValueError):
+            a.merge(HistogramBuilder.from_range(-2, 2, 4))
+
+    def test_adaptive(self):
+        """edges from first pass accumulator"""
+        data = self.data + [1000]
+        b = HistogramBuilder.from_accumulator(Accumulator(data), 10, precision=2)
+        self.assertLess(b.edges[-1], 5)
+        self.assertGreater(b.edges[0], -5)
+        b.update(data + [None, float("nan")])
+        self.assertEqual(b.observations, len(data))
+        self.assertIsInstance(b.histogram(), Histogram)
+
+
 class TestLegacyHistogram(unittest.TestCase):
 
     def setUp(self):
@@ -25,7 +25,10 @@ import unittest
 from math import sin, cos, tan, trunc, sqrt, pi, e
 import sys
 sys.path.insert(0, "..")
-from dkit.parsers.infix_parser import InfixParser, f2_closure, f1_closure
+from dkit.parsers import infix_parser
+from dkit.parsers.infix_parser import (
+    InfixParser, ExpressionParser, f2_closure, f1_closure
+)
 
 from dkit.exceptions import DKitParseException
 
@@ -270,5 +273,162 @@ class TestInfixParser(unittest.TestCase):
             self.assertEqual(y, sin(i))
 
 
+class TestCompiledParser(unittest.TestCase):
+    """compiled expressions"""
+
+    expressions = [
+        "${x} * 10 > 5",
+        "${x} + ${y}",
+        "(${x} + ${y}) * 2 == 0",
+        "-${x} * -1",
+        "3^2^3",
+        "upper(${s})",
+        'match(${s}, "^a")',
+        "replace_na(${y}, 5) + 1",
+        "${y} < 3 & ${x} > 0",
+        '"abc" == ${s}',
+        "is_null(${y})",
+        "E * PI",
+    ]
+
+    rows = [
+        {"x": 1.5, "y": None, "s": "abc"},
+        {"x": -2, "y": 3, "s": "xbc"},
+    ]
+
+    def test_equivalence(self):
+        """compiled and stack evaluation produce the same result"""
+        for expression in self.expressions:
+            compiled = ExpressionParser(expression)
+            stack = ExpressionParser()
+            stack.compiled = False
+            stack.parse(expression)
+            self.assertIsNotNone(compiled._compiled_fn, expression)
+            self.assertIsNone(stack._compiled_fn)
+            for row in self.rows:
+                self.assertEqual(compiled(row), stack(row), expression)
+                self.assertEqual(compiled.compile()(row), stack(row), expression)
+
+    def test_none(self):
+        """operations on None evaluate to 0"""
+        fn = ExpressionParser("(${y} + 1) * 2 == 0").compile()
+        self.assertEqual(fn({"y": None}), True)
+        with self.assertRaises(TypeError):
+            ExpressionParser("${s} + 1").compile()({"s": "a"})
+
+    def test_closure_fallback(self):
+        """functions that cannot be compiled use the stack"""
+        parser = InfixParser()
+        parser._functions["double"] = lambda p, strg, toks: (
+            lambda x: 2 * x._internal_eval()
+        )
+        parser.parse("double(${x}) + 1")
+        self.assertIsNone(parser._compiled_fn)
+        self.assertEqual(parser.eval_vars({"x": 2}), 5)
+        self.assertEqual(parser.compile()({"x": 3}), 7)
+
+
+class TestVectorised(unittest.TestCase):
+    """evaluation over columnar batches"""
+
+    expressions = [
+        "${x} * 10 > 5",
+        "${x} + ${y}",
+        "(${x} + ${y}) * 2 == 0",
+        "${x} / 4",
+        "-${x} * -1",
+        "round(${x}) + trunc(${x})",
+        "int(${x}) ^ 2",
+        "upper(${s})",
+        "len(${s})",
+        'match(${s}, "^a")',
+        "replace_na(${y}, 5.0) + 1",
+        "${y} < 3 & ${x} > 0",
+        '"abc" == ${s}',
+        "is_null(${y})",
+        "not(is_null(${y}))",
+        "E * PI",
+        "str(${x})",
+    ]
+
+    rows = [
+        {"x": 1.5, "y": None, "s": "abc"},
+        {"x": -2.0, "y": 3.0, "s": "xbc"},
+        {"x": 2.5, "y": 1.0, "s": "ab"},
+    ]
+
+    def test_equivalence(self):
+        """batch and row evaluation produce the same result"""
+        import pyarrow as pa
+        table = pa.Table.from_pylist(self.rows)
+        for expression in self.expressions:
+            parser = ExpressionParser(expression)
+            self.assertEqual(
+                parser.eval_batch(table).to_pylist(),
+                [parser(row) for row in self.rows],
+                expression
+            )
+
+    def test_vectorised(self):
+        parser = ExpressionParser("${x} * 10 > 5")
+        parser.eval_batch({"x": [1.0]})
+        self.assertTrue(parser._vectorised)
+        parser = ExpressionParser("str(${x})")
+        parser.eval_batch({"x": [1.0]})
+        self.assertFalse(parser._vectorised)
+
+    def test_overflow(self):
+        """integer overflow fall back to exact row evaluation"""
+        parser = ExpressionParser("${i} * ${i}")
+        self.assertEqual(parser.eval_batch({"i": [2**62, 3]}).to_pylist(), [2**124, 9])
+        parser = ExpressionParser("${i} + ${i}")
+        self.assertEqual(parser.eval_batch({"i": [2**62]}).to_pylist(), [2**63])
+
+    def test_domain_errors(self):
+        """errors raised in row mode are raised for batches"""
+        with self.assertRaises(ZeroDivisionError):
+            ExpressionParser("${x} / ${y}").eval_batch({"x": [1.0], "y": [0.0]})
+        with self.assertRaises(ValueError):
+            ExpressionParser("sqrt(${x})").eval_batch({"x": [-1.0]})
+
+    def test_transform_batch(self):
+        import pyarrow as pa
+        from dkit.etl.transform import FormulaTransform
+        t = FormulaTransform({"a": "${x} * 2", "b": "upper(${s})"})
+        batch = pa.RecordBatch.from_pylist(self.rows)
+        result = t.transform_batch(batch)
+        self.assertIsInstance(result, pa.RecordBatch)
+        self.assertEqual(result.to_pylist(), list(t(self.rows)))
+
+
+class TestParseCache(unittest.TestCase):
+    """grammar and parse cache"""
+
+    def setUp(self):
+        infix_parser._PARSE_CACHE.clear()
+
+    def test_cache_hit(self):
+        a = ExpressionParser("${x} * 2 + sin(${y})")
+        b = ExpressionParser("${x} * 2 + sin(${y})")
+        self.assertEqual(infix_parser._PARSE_CACHE.hits, 1)
+        self.assertEqual(b.parsed_variable_names, ["x", "y"])
+        self.assertEqual(a({"x": 1, "y": 0}), b({"x": 1, "y": 0}))
+
+    def test_function_set(self):
+        """programs are cached per function set"""
+        a = InfixParser("double(2)", functions={"double": lambda x: 2 * x})
+        b = InfixParser("double(2)", functions={"double": lambda x: 3 * x})
+        self.assertEqual(a(), 4)
+        self.assertEqual(b(), 6)
+        with self.assertRaises(DKitParseException):
+            InfixParser("double(2)")
+
+    def test_shared_grammar(self):
+        InfixParser("1 + 1")
+        grammar = InfixParser._grammar
+        InfixParser("2 + 2")
+        self.assertIs(InfixParser._grammar, grammar)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -22,12 +22,14 @@ test data manipulation routines.
 =========== =============== =================================================
 01 Dec 2016 Cobus Nel       Created
 27 Jun 2019 Cobus Nel       Merged all manipulate tests
+19 Oct 2026 Cobus Nel       Added external sort tests
 =========== =============== =================================================
 """
 
 import os
 import random
 import sys; sys.path.insert(0, "..")  # noqa
+import tempfile
 import unittest
 from statistics import mean
 import shelve
@@ -36,8 +38,10 @@ from dkit.data.manipulate import (
     KeyIndexer,
     aggregate,
     aggregates,
+    count_distinct,
     distinct,
     duplicates,
+    external_sort,
     merge,
     reduce_aggregate,
     melt
@@ -45,7 +49,8 @@ from dkit.data.manipulate import (
 from dkit.data.iteration import iter_sample
 from dkit.etl.reader import FileReader
 from dkit.etl.source import CsvDictSource
-from dkit.data.containers import FlexShelve
+from dkit.data.containers import FlexShelve, SQLiteMultiMap
+from dkit.exceptions import DKitDataException
 
 
 class TestDistinct(unittest.TestCase):
@@ -96,6 +101,20 @@ class TestDistinct(unittest.TestCase):
         )
 
 
+    def test_approximate(self):
+        """approximate mode yield the same rows"""
+        key = lambda r: tuple(r.items())  # noqa
+        for keys in [("Year",), ("Year", "Month"), ()]:
+            self.assertEqual(
+                sorted(distinct(self.data, *keys, approximate=True), key=key),
+                sorted(distinct(self.data, *keys), key=key)
+            )
+
+    def test_count_distinct(self):
+        self.assertEqual(count_distinct(self.data, "Month"), 12)
+        self.assertEqual(count_distinct(self.data, "Month", approximate=True), 12)
+
+
 class TestDuplicates(unittest.TestCase):
 
     def setUp(self):
@@ -139,6 +158,61 @@ class TestDuplicates(unittest.TestCase):
             [{'Year': '1920', 'Month': 'Jan', 'Temp': '40.6'}]
         )
 
+    def test_approximate(self):
+        """approximate mode report each duplicate once"""
+        for keys in [("Year",), ("Year", "Month"), ()]:
+            self.assertEqual(
+                list(duplicates(self.data, *keys, approximate=True)),
+                list(duplicates(self.data, *keys))
+            )
+
+
+class TestExternalSort(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(7)
+        cls.data = [
+            {"a": rnd.randint(0, 20), "b": rnd.random(), "i": i}
+            for i in range(5000)
+        ]
+
+    def test_in_memory(self):
+        self.assertEqual(
+            list(external_sort(self.data, "a")),
+            sorted(self.data, key=lambda r: r["a"])
+        )
+
+    def test_spilled(self):
+        """sort is stable when spilled and merged"""
+        for fan_in in [64, 3]:
+            self.assertEqual(
+                list(external_sort(self.data, "a", chunk_size=100, fan_in=fan_in)),
+                sorted(self.data, key=lambda r: r["a"])
+            )
+
+    def test_reverse(self):
+        self.assertEqual(
+            list(external_sort(self.data, "a", "b", reverse=True, chunk_size=300)),
+            sorted(self.data, key=lambda r: (r["a"], r["b"]), reverse=True)
+        )
+
+    def test_mixed_direction(self):
+        self.assertEqual(
+            list(external_sort(iter(self.data), "a", "b", reverse=[True, False],
+                               chunk_size=300)),
+            sorted(self.data, key=lambda r: (-r["a"], r["b"]))
+        )
+
+    def test_key(self):
+        self.assertEqual(
+            list(external_sort(self.data, key=lambda r: -r["i"], chunk_size=999)),
+            list(reversed(self.data))
+        )
+
+    def test_empty(self):
+        self.assertEqual(list(external_sort([], "a")), [])
+
 
 class TestMelt(unittest.TestCase):
 
@@ -281,20 +355,48 @@ class TestShelveKeyIndexer(TestKeyIndexer):
 
     @classmethod
     def setUpClass(cls):
-        cls.backend = shelve.open("data/test_index.db")
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.backend = shelve.open(os.path.join(cls.tmp_dir.name, "test_index.db"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.close()
+        cls.tmp_dir.cleanup()
+
+
+class TestSQLiteKeyIndexer(TestKeyIndexer):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = SQLiteMultiMap()
 
     @classmethod
     def tearDownClass(cls):
         cls.backend.close()
 
+    def test_all_rows(self):
+        """all rows are indexed"""
+        rows = [{"k": i % 3, "v": i} for i in range(100)]
+        for backend in [None, SQLiteMultiMap()]:
+            idx = KeyIndexer(rows, "k", backend=backend)
+            self.assertEqual(sum(len(idx[k]) for k in idx), 100)
+
 
 class TestMerge(unittest.TestCase):
 
+    strategy = "hash"
+
     @classmethod
     def setUpClass(cls):
         cls.backend = None
         cls.create_data(cls)
 
+    def merge(self, left, right, by_l, by_r, **kwargs):
+        return merge(
+            [dict(r) for r in left], [dict(r) for r in right], by_l, by_r,
+            strategy=self.strategy, **kwargs
+        )
+
     def setUp(self):
         super().setUp()
 
@@ -310,7 +412,7 @@ class TestMerge(unittest.TestCase):
         self.rd.append({"keya": 66, "keyb": 2, "value": random.randint(0, 1000)})
 
     def test_inner_join(self):
-        m = list(merge(
+        m = list(self.merge(
             self.ld, self.rd,
             ["key1", "key2"], ["keya", "keyb"],
             backend=self.backend
@@ -321,7 +423,7 @@ class TestMerge(unittest.TestCase):
         """
         inner join with key specified as strings
         """
-        m = list(merge(
+        m = list(self.merge(
             self.ld, self.rd,
             "key1", "keya",
             backend=self.backend
@@ -329,18 +431,23 @@ class TestMerge(unittest.TestCase):
         self.assertEqual(len(m), len(self.ld)-1)
 
     def test_left_join(self):
-        m = list(merge(self.ld, self.rd, ["key1", "key2"], ["keya", "keyb"], all_l=True))
+        m = list(self.merge(self.ld, self.rd, ["key1", "key2"], ["keya", "keyb"], all_l=True))
         self.assertEqual(len(m), len(self.ld))
 
     def test_full_join(self):
         m = list(
-            merge(
+            self.merge(
                 self.ld, self.rd, ["key1", "key2"], ["keya", "keyb"],
                 all_l=True, all_r=True
             )
         )
         self.assertEqual(len(m), len(self.ld) + 2)
 
+    def test_right_join(self):
+        m = list(self.merge(self.ld, self.rd, ["key1", "key2"], ["keya", "keyb"], all_r=True))
+        self.assertEqual(len(m), len(self.ld) + 1)
+        self.assertEqual(sum(1 for r in m if r["key1"] is None), 2)
+
     def tearDown(self):
         super().tearDown()
         self.t_obj = None
@@ -350,13 +457,84 @@ class TestShelveMerge(TestMerge):
 
     @classmethod
     def setUpClass(cls):
-        cls.backend = FlexShelve("data/merge_shelve.db")
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.backend = FlexShelve(os.path.join(cls.tmp_dir.name, "merge_shelve.db"))
+        cls.create_data(cls)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.close()
+        cls.tmp_dir.cleanup()
+
+    def test_rerun_file_backend(self):
+        """repeated joins against the same backend file produce the same result"""
+        file_name = os.path.join(self.tmp_dir.name, "rerun_shelve.db")
+        results = []
+        for _ in range(2):
+            backend = FlexShelve(file_name)
+            results.append(list(merge(self.ld, self.rd, "key1", "keya", backend=backend)))
+            backend.close()
+        self.assertEqual(len(results[0]), len(self.ld) - 1)
+        self.assertEqual(results[0], results[1])
+
+
+class TestSQLiteMerge(TestMerge):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.backend = SQLiteMultiMap()
         cls.create_data(cls)
 
     @classmethod
     def tearDownClass(cls):
         cls.backend.close()
 
+    def merge(self, left, right, by_l, by_r, **kwargs):
+        # each join build a new index
+        if kwargs.get("backend") is not None:
+            kwargs["backend"] = SQLiteMultiMap()
+        return super().merge(left, right, by_l, by_r, **kwargs)
+
+    def test_rerun_file_backend(self):
+        """repeated joins against the same backend file produce the same result"""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_name = os.path.join(tmp_dir, "merge_multimap.sqlite")
+            results = []
+            for _ in range(2):
+                backend = SQLiteMultiMap(file_name, reuse=True)
+                results.append(
+                    list(merge(self.ld, self.rd, "key1", "keya", backend=backend))
+                )
+                backend.close()
+        self.assertEqual(len(results[0]), len(self.ld) - 1)
+        self.assertEqual(results[0], results[1])
+
+
+class TestSortMergeJoin(TestMerge):
+
+    strategy = "sort_merge"
+
+    def merge(self, left, right, by_l, by_r, **kwargs):
+        keys_l = by_l if isinstance(by_l, list) else [by_l]
+        keys_r = by_r if isinstance(by_r, list) else [by_r]
+        return super().merge(
+            external_sort(left, *keys_l), external_sort(right, *keys_r),
+            by_l, by_r, **kwargs
+        )
+
+    def test_unsorted(self):
+        with self.assertRaises(DKitDataException):
+            list(merge(self.ld, self.rd, "key1", "keya", strategy="sort_merge"))
+
+
+class TestGraceHashJoin(TestMerge):
+
+    strategy = "grace_hash"
+
+    def merge(self, left, right, by_l, by_r, **kwargs):
+        kwargs.pop("backend", None)
+        return super().merge(left, right, by_l, by_r, max_rows=3, **kwargs)
+
 
 if __name__ == '__main__':
     unittest.main()
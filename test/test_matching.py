@@ -27,6 +27,8 @@ Test cases for data matching routines
 
 import copy
 import random
+from functools import partial
+from Levenshtein import ratio
 import unittest
 import logging
 from faker import Factory
@@ -121,5 +123,102 @@ class TestMatching(unittest.TestCase):
         self.assertLessEqual(len(unmatched), ROWS-SEED_LENGTH)
 
 
+class TestBlocking(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        l_data = list(left_data())
+        seed = copy.deepcopy(l_data[0:SEED_LENGTH])
+        # introduce a typo in half of the seeded rows
+        for row in seed[::2]:
+            row["name"] = row["name"][:-1] + "x"
+        cls.left_data = l_data
+        cls.right_data = right_data(seed)
+
+    def matcher(self, blocking=None):
+        f1 = mg.FieldSpec("name", "name", 2)
+        f2 = mg.FieldSpec("job", "job", 1, stop_words=['pty', 'ltd'])
+        return mg.DictMatcher(
+            self.left_data, self.right_data, "id", "idr", [f1, f2],
+            threshold=80, blocking=blocking(f1) if blocking else None
+        )
+
+    def pairs(self, blocking=None):
+        return {(i["m.left.key"], i["m.right.key"]) for i in self.matcher(blocking)}
+
+    def test_blockers(self):
+        """blocked matches agree with exhaustive matching"""
+        expected = self.pairs()
+        self.assertGreaterEqual(len(expected), SEED_LENGTH)
+        self.assertEqual(self.pairs(lambda f: [mg.NGramBlocker(f)]), expected)
+        for blocker in [
+            lambda f: [mg.TokenBlocker(f)],
+            lambda f: [mg.PhoneticBlocker(f)],
+            lambda f: [mg.SortedNeighbourhoodBlocker(f, 5)],
+        ]:
+            pairs = self.pairs(blocker)
+            self.assertTrue(pairs <= expected)
+            self.assertGreaterEqual(len(pairs), SEED_LENGTH // 2)
+
+    def scored(self, blocking=None, custom_ratio=False, workers=1):
+        m = self.matcher(blocking)
+        m.workers = workers
+        if custom_ratio:
+            # disable the rapidfuzz kernels
+            for spec in m.field_spec:
+                spec.ratio = partial(ratio)
+        return {
+            (i["m.left.key"], i["m.right.key"]): (round(i["m.score"], 6), i["m.rank"])
+            for i in m
+        }
+
+    def test_scoring(self):
+        """vectorised, row by row and process pool scoring agree"""
+        for blocking in [None, lambda f: [mg.NGramBlocker(f)]]:
+            expected = self.scored(blocking, custom_ratio=True)
+            self.assertGreaterEqual(len(expected), SEED_LENGTH)
+            self.assertEqual(self.scored(blocking), expected)
+            self.assertEqual(self.scored(blocking, workers=-1), expected)
+            self.assertEqual(self.scored(blocking, custom_ratio=True, workers=2), expected)
+
+    def test_pool_in_flight(self):
+        """rows are read ahead at most 2 chunks per process"""
+        consumed = []
+
+        def left():
+            for row in self.left_data:
+                consumed.append(row)
+                yield row
+
+        m = self.matcher()
+        m.left = left()
+        m.workers = 2
+        for spec in m.field_spec:
+            spec.ratio = partial(ratio)
+        batch_size = mg.BATCH_SIZE
+        mg.BATCH_SIZE = 10
+        try:
+            matches = iter(m)
+            next(matches)
+            self.assertLessEqual(len(consumed), (2 * 2 + 1) * 10)
+            list(matches)
+        finally:
+            mg.BATCH_SIZE = batch_size
+        self.assertEqual(len(consumed), ROWS)
+
+    def test_candidates(self):
+        """blocking reduce the number of candidates"""
+        f = mg.FieldSpec("name", "name")
+        blocker = mg.TokenBlocker(f, max_block_size=20)
+        blocker.fit((r["idr"], r) for r in self.right_data)
+        n = sum(len(blocker.candidates(row)) for row in self.left_data)
+        self.assertLess(n, ROWS * ROWS / 10)
+
+    def test_soundex(self):
+        self.assertEqual(mg.soundex("Ashcraft"), "A261")
+        self.assertEqual(mg.soundex("Pfister"), "P236")
+        self.assertEqual(mg.soundex("Lee"), "L000")
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -22,10 +22,12 @@
 import unittest
 import random
 import sys
+from datetime import datetime, timedelta
 sys.path.insert(0, "..")  # noqa
 from dkit.compatibility import fmean, fsum
 from dkit.data import window as win
 from statistics import median
+from scipy.stats import linregress
 
 
 class TestMovingWindow(unittest.TestCase):
@@ -166,6 +168,115 @@ class TestMovingWindow(unittest.TestCase):
             result[-1]["value_min"]
         )
 
+    def test_gradient(self):
+        w = win.MovingWindow(5, truncate=False) \
+            + win.Gradient("value")
+        result = list(w(self.testdata))
+        test = linregress(range(5), [i["value"] for i in result[-5:]])[0]
+        self.assertAlmostEqual(test, result[-1]["value_gr"])
+
+
+class TestIncrementalWindow(unittest.TestCase):
+    """compare incremental functions with the full window"""
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(1)
+        cls.lag = 50
+        cls.data = [
+            {
+                "key": rnd.choice(["a", "b"]),
+                "value": rnd.gauss(1000, 500),
+                "level": rnd.randint(0, 20),
+            }
+            for _ in range(3000)
+        ]
+
+    def windows(self, field):
+        buffers = {}
+        for row in self.data:
+            values = buffers.setdefault(row["key"], [])
+            values.append(row[field])
+            yield row, values[-self.lag:]
+
+    def test_functions(self):
+        w = win.MovingWindow(self.lag, truncate=True).partition_by("key") \
+            + win.Average("value") + win.Sum("value") + win.Median("value") \
+            + win.Max("level") + win.Min("level") + win.Gradient("value")
+        result = list(w(self.data))
+        expected = [
+            (
+                fmean(values), fsum(values), median(values),
+                max(levels), min(levels), linregress(range(self.lag), values)[0]
+            )
+            for (_, values), (_, levels) in zip(self.windows("value"), self.windows("level"))
+            if len(values) == self.lag
+        ]
+        self.assertEqual(len(result), len(expected))
+        for row, test in zip(result, expected):
+            self.assertEqual(row["value_ma"], test[0])
+            self.assertEqual(row["value_sum"], test[1])
+            self.assertEqual(row["value_median"], test[2])
+            self.assertEqual(row["level_max"], test[3])
+            self.assertEqual(row["level_min"], test[4])
+            self.assertAlmostEqual(row["value_gr"], test[5], places=6)
+
+
+class TestTimeWindow(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(2)
+        t = datetime(2026, 1, 1)
+        cls.data = []
+        for _ in range(2000):
+            t += timedelta(seconds=rnd.randint(1, 120))
+            cls.data.append(
+                {"time": t, "key": rnd.choice(["a", "b", "c"]), "value": rnd.random()}
+            )
+        cls.duration = timedelta(minutes=15)
+
+    def expected(self, row):
+        return [
+            r["value"] for r in self.data
+            if r["key"] == row["key"] and row["time"] - self.duration < r["time"] <= row["time"]
+        ]
+
+    def test_functions(self):
+        w = win.TimeWindow("time", self.duration).partition_by("key") \
+            + win.Average("value") + win.Sum("value") + win.Median("value") \
+            + win.Max("value") + win.Min("value")
+        result = list(w(dict(r) for r in self.data))
+        first = {}
+        for row in result:
+            first.setdefault(row["key"], row["time"])
+            if row["time"] - first[row["key"]] < self.duration:
+                self.assertEqual(row["value_ma"], 0)
+                continue
+            values = self.expected(row)
+            self.assertEqual(row["value_ma"], fmean(values))
+            self.assertEqual(row["value_sum"], fsum(values))
+            self.assertEqual(row["value_median"], median(values))
+            self.assertEqual(row["value_max"], max(values))
+            self.assertEqual(row["value_min"], min(values))
+
+    def test_truncate(self):
+        w = win.TimeWindow("time", self.duration, truncate=True) + win.Sum("value")
+        result = list(w(dict(r) for r in self.data))
+        self.assertTrue(all(r["time"] - self.data[0]["time"] >= self.duration for r in result))
+        self.assertEqual(result[-1]["value_sum"], fsum(
+            r["value"] for r in self.data if r["time"] > self.data[-1]["time"] - self.duration
+        ))
+
+    def test_timeout(self):
+        """idle partitions are discarded"""
+        data = [{"time": i, "key": i, "value": 1} for i in range(1000)]
+        data += [{"time": 1000, "key": 0, "value": 1}, {"time": 1004, "key": 999, "value": 1}]
+        w = win.TimeWindow("time", 5, timeout=10).partition_by("key") + win.Sum("value", na=None)
+        result = list(w(data))
+        self.assertEqual(result[-2]["value_sum"], None)
+        self.assertEqual(result[-1]["value_sum"], 1)
+
 
 if __name__ == '__main__':
     unittest.main()
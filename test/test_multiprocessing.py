@@ -12,6 +12,7 @@ from dkit.multi_processing import (
     TaskPipeline,
     Journal,
     MD5TaskMessage,
+    HashTaskMessage,
 )
 from dkit.utilities.log_helper import init_stderr_logger
 
@@ -120,6 +121,11 @@ class TestMultiprocessing(unittest.TestCase):
             "MD5TaskMessage(args=10, _id=c1ecf43a95efdf7cc8b0ec6533492ca4)"
         )
 
+    def test_hash_message_id(self):
+        msg = HashTaskMessage({"a": 1, "b": 2})
+        self.assertEqual(len(msg._id), 32)
+        self.assertEqual(msg._id, HashTaskMessage({"b": 2, "a": 1})._id)
+
 
 if __name__ == '__main__':
     init_stderr_logger(level=logging.DEBUG)
@@ -21,8 +21,11 @@ import unittest
 sys.path.insert(0, "..") # noqa
 from random import choice
 from random import randrange
+import datetime
+import statistics
 
 from dkit.data import manipulate
+from dkit.exceptions import DKitDataException
 from dkit.utilities import instrumentation
 import common
 
@@ -83,6 +86,118 @@ class TestPivot(common.TestBase):
         self.assertEqual(list_p[0]["1998"], 1)
         self.assertEqual(list_p[0]["1999"], 10)
 
+    def float_data(self):
+        return [dict(row, points=float(row["points"])) for row in self.data]
+
+    def test_accumulated(self):
+        """known functions are accumulated for cells of float values"""
+        data = self.float_data()
+        for function in [sum, min, max, statistics.mean]:
+            expected = manipulate.Pivot(
+                data, ["id", "name"], "year", "points", lambda x: function(x)
+            )
+            p = manipulate.Pivot(data, ["id", "name"], "year", "points", function)
+            self.assertIsNotNone(p._accumulator)
+            self.assertNotIsInstance(p._ds[(1, "John")][1999], list)
+            self.assertEqual(list(p), list(expected))
+
+    def test_accumulated_precision(self):
+        """accumulated cells are not rounded"""
+        data = [
+            {"year": 1999, "name": "John", "id": 1, "points": 1e-7},
+            {"year": 1999, "name": "John", "id": 1, "points": 2e-7},
+            {"year": 1998, "name": "John", "id": 1, "points": 0.1234567},
+        ]
+        p = list(manipulate.Pivot(data, ["id", "name"], "year", "points", sum))
+        self.assertAlmostEqual(p[0]["1999"], 3e-7, places=15)
+        self.assertEqual(p[0]["1998"], 0.1234567)
+        p = list(manipulate.Pivot(data, ["id", "name"], "year", "points", statistics.mean))
+        self.assertEqual(p[0]["1998"], 0.1234567)
+
+    def test_accumulated_stdev(self):
+        """stdev and variance of a single value raise like the statistics module"""
+        data = self.float_data()
+        for function in [statistics.stdev, statistics.variance]:
+            p = manipulate.Pivot(data, ["id", "name"], "year", "points", function)
+            with self.assertRaises(statistics.StatisticsError):
+                list(p)
+        data = [row for row in data if row["year"] == 1999]
+        p = manipulate.Pivot(data, ["id", "name"], "year", "points", statistics.stdev)
+        self.assertAlmostEqual(list(p)[0]["1999"], statistics.stdev([10.0, 15.0]))
+
+    def test_count(self):
+        """len count values, missing cells count the missing value"""
+        for data in [self.data, self.float_data()]:
+            p = manipulate.Pivot(data, ["id", "name"], "year", "points", len)
+            list_p = sorted(list(p), key=lambda x: x["id"])
+            self.assertEqual(
+                list_p[0], {"id": 1, "name": "John", "1997": 1, "1998": 1, "1999": 2}
+            )
+
+    def test_int_cells(self):
+        """results for int values retain the int type"""
+        p = list(manipulate.Pivot(self.data, ["id", "name"], "year", "points", sum))
+        p = sorted(p, key=lambda x: x["id"])
+        self.assertEqual(p[0], {"id": 1, "name": "John", "1997": 0, "1998": 0, "1999": 25})
+        self.assertIsInstance(p[0]["1999"], int)
+        p = list(manipulate.Pivot(self.data, ["id", "name"], "year", "points", max))
+        self.assertIsInstance(sorted(p, key=lambda x: x["id"])[0]["1999"], int)
+
+    def test_str_cells(self):
+        """min and max of str values"""
+        data = [dict(row, points=str(row["points"])) for row in self.data]
+        for function, expected in [(min, "10"), (max, "15")]:
+            p = manipulate.Pivot(
+                data, ["id", "name"], "year", "points", function, missing="-"
+            )
+            p = sorted(p, key=lambda x: x["id"])
+            self.assertEqual(p[0], {"id": 1, "name": "John", "1997": "-", "1998": "-",
+                                    "1999": expected})
+
+    def test_date_cells(self):
+        """min and max of date values"""
+        data = [
+            dict(row, points=datetime.date(2000, 1, row["points"])) for row in self.data
+        ]
+        p = manipulate.Pivot(data, ["id", "name"], "year", "points", max, missing=None)
+        p = sorted(p, key=lambda x: x["id"])
+        self.assertEqual(p[0]["1999"], datetime.date(2000, 1, 15))
+        self.assertIsNone(p[0]["1997"])
+        with self.assertRaises(TypeError):
+            list(manipulate.Pivot(data, ["id", "name"], "year", "points", sum))
+
+    def test_mixed_cells(self):
+        """non numeric values in a cell of float values raise like the list path"""
+        data = self.float_data() + [{"year": 1999, "name": "John", "id": 1, "points": "x"}]
+        with self.assertRaises(TypeError):
+            list(manipulate.Pivot(data, ["id", "name"], "year", "points", sum))
+
+    def test_accumulated_function(self):
+        """function not available from the accumulator"""
+        data = [row for row in self.float_data() if row["year"] == 1999]
+        p = manipulate.Pivot(data, ["id", "name"], "year", "points", sum)
+        with self.assertRaises(DKitDataException):
+            list(p.rows(function=statistics.stdev))
+
+    def test_list_function(self):
+        """median is computed from lists of values"""
+        p = manipulate.Pivot(self.data, ["id", "name"], "year", "points", statistics.median)
+        self.assertIsNone(p._accumulator)
+        list_p = sorted(list(p), key=lambda x: x["id"])
+        self.assertEqual(list_p[0]["1999"], 12.5)
+
+    def test_processes(self):
+        """merge partial pivots from worker processes"""
+        for data, function in [(self.data * 1000, sum), (self.float_data() * 1000, sum),
+                               (self.data * 1000, statistics.median)]:
+            key = lambda x: x["id"]  # noqa
+            self.assertEqual(
+                sorted(manipulate.Pivot(data, ["id", "name"], "year", "points", function,
+                                        processes=2), key=key),
+                sorted(manipulate.Pivot(data, ["id", "name"], "year", "points", function),
+                       key=key)
+            )
+
     def test_xperformance(self):
         timer = instrumentation.CounterLogger()
         n = 100000
@@ -0,0 +1,151 @@
+#
+# Copyright (C) 2026  Cobus Nel
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+test dkit.algorithms.probabilistic
+
+=========== =============== =================================================
+19 Oct 2026 Cobus Nel       Created
+=========== =============== =================================================
+"""
+import collections
+import pickle
+import random
+import sys; sys.path.insert(0, "..")  # noqa
+import unittest
+from decimal import Decimal
+
+from dkit.algorithms.probabilistic import (
+    BloomFilter, HyperLogLog, ScalableBloomFilter, SpaceSaving
+)
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_membership(self):
+        bf = BloomFilter(10_000, 0.01)
+        self.assertFalse(bf.add(("id", 0)))
+        self.assertTrue(bf.add(("id", 0)))
+        for i in range(10_000):
+            bf.add(("id", i))
+        self.assertTrue(all(("id", i) in bf for i in range(10_000)))
+        self.assertLessEqual(len(bf), 10_000)
+
+    def test_false_positives(self):
+        bf = BloomFilter(10_000, 0.01)
+        for i in range(10_000):
+            bf.add(i)
+        fp = sum(i in bf for i in range(10_000, 30_000))
+        self.assertLess(fp / 20_000, 0.02)
+
+    def test_equal_items(self):
+        """items that compare equal are members"""
+        bf = BloomFilter(1000, 0.001)
+        bf.add(1)
+        bf.add(("a", 2.0))
+        bf.add({"x": 1, "y": 2})
+        for item in [1.0, True, Decimal("1"), ("a", 2), ("a", Decimal("2.00")),
+                     {"y": 2, "x": 1.0}]:
+            self.assertIn(item, bf)
+        self.assertNotIn("1", bf)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            BloomFilter(0)
+        with self.assertRaises(ValueError):
+            BloomFilter(100, 1.5)
+
+
+class TestScalableBloomFilter(unittest.TestCase):
+
+    def test_grow(self):
+        bf = ScalableBloomFilter(capacity=1000, error_rate=0.01)
+        added = sum(not bf.add(i) for i in range(20_000))
+        self.assertGreater(len(bf.filters), 1)
+        self.assertGreater(added, 19_800)
+        self.assertTrue(all(i in bf for i in range(20_000)))
+        fp = sum(i in bf for i in range(20_000, 40_000))
+        self.assertLess(fp / 20_000, 0.015)
+
+
+class TestHyperLogLog(unittest.TestCase):
+
+    def test_cardinality(self):
+        for n in [0, 10, 1000, 100_000]:
+            hll = HyperLogLog()
+            hll.update(f"event {i % n}" for i in range(2 * n) if n)
+            self.assertAlmostEqual(hll.cardinality(), n, delta=max(2, n * 0.03))
+
+    def test_equal_items(self):
+        """items that compare equal are counted once"""
+        hll = HyperLogLog()
+        hll.update([1, 1.0, True, Decimal("1"), Decimal("1.0"), 2, 2.0])
+        self.assertEqual(round(hll.cardinality()), 2)
+
+    def test_merge(self):
+        a, b = HyperLogLog(12), HyperLogLog(12)
+        a.update(range(0, 60_000))
+        b.update(range(40_000, 100_000))
+        self.assertAlmostEqual(a.merge(b).cardinality(), 100_000, delta=5000)
+        with self.assertRaises(ValueError):
+            a.merge(HyperLogLog(10))
+
+
+class TestSpaceSaving(unittest.TestCase):
+
+    def test_top(self):
+        items = ["x"] * 500 + ["y"] * 300 + [f"noise {i}" for i in range(2000)]
+        s = SpaceSaving(50)
+        s.update(items)
+        self.assertEqual([i for i, _ in s.top(2)], ["x", "y"])
+        self.assertEqual(s.n, len(items))
+
+    def test_merge(self):
+        items = ["x"] * 500 + ["y"] * 300 + [f"noise {i}" for i in range(2000)]
+        a, b = SpaceSaving(50), SpaceSaving(50)
+        a.update(items[::2])
+        b.update(items[1::2])
+        a.merge(b)
+        self.assertEqual([i for i, _ in a.top(2)], ["x", "y"])
+        self.assertLessEqual(len(a.counts), 50)
+        a.update(f"more {i}" for i in range(1000))
+        self.assertEqual([i for i, _ in a.top(2)], ["x", "y"])
+
+    def test_bounds(self):
+        """counts over estimate by at most the error and the minimum is evicted"""
+        rnd = random.Random(1)
+        items = [int(rnd.paretovariate(1.2)) for _ in range(20_000)]
+        s = SpaceSaving(100)
+        for item in items:
+            if len(s.counts) == s.capacity and item not in s.counts:
+                minimum = min(s.counts.values())
+                s.add(item)
+                self.assertEqual(s.counts[item], minimum + 1)
+            else:
+                s.add(item)
+        self.assertEqual(len(s._heap), len(s.counts))
+        true = collections.Counter(items)
+        for item, count in s.counts.items():
+            self.assertGreaterEqual(count, true[item])
+            self.assertLessEqual(count - s.errors[item], true[item])
+        t = pickle.loads(pickle.dumps(s))
+        t.update(items[:100])
+        self.assertEqual(t.n, s.n + 100)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -23,11 +23,16 @@
 # =========== =============== =================================================
 
 import numpy as np
+import pickle
 import unittest
 import random
 import sys
+import warnings
 sys.path.insert(0, "..")  # noqa
-from dkit.data.stats import BufferAccumulator, Accumulator
+from dkit.data.stats import (
+    BufferAccumulator, Accumulator, CountAccumulator, SumAccumulator,
+    MomentAccumulator, DistinctAccumulator, TopKAccumulator
+)
 from dkit.data.histogram import Histogram
 
 
@@ -167,6 +172,169 @@ class TestAccumulator(AccumulatorTestAbstract):
         print(a.as_map())
         print(c.as_map())
 
+    def test_merge_variance(self):
+        """merged variance equal variance of the combined values"""
+        a = Accumulator(self.values[1][:3000])
+        b = Accumulator(self.values[1][3000:])
+        c = a + b
+        self.assertEqual(c.observations, self.n)
+        self.assertAlmostEqual(c.mean, self.a[1].mean, 4)
+        self.assertAlmostEqual(c.variance, self.a[1].variance, 2)
+        self.assertEqual(c.min, self.a[1].min)
+        self.assertEqual(c.max, self.a[1].max)
+        # merging does not modify the operands
+        self.assertEqual(a.observations, 3000)
+
+    def test_pickle(self):
+        """pickle accumulator and t-digest"""
+        a = pickle.loads(pickle.dumps(self.a[2]))
+        self.assertEqual(a.as_map(), self.a[2].as_map())
+
+
+class TestPushMany(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        rnd = random.Random(6)
+        cls.values = [rnd.gauss(100, 15) for _ in range(20_000)]
+
+    def check(self, cls, places=4):
+        expected = cls(self.values)
+        batch = cls()
+        batch.push_many(np.array(self.values[:5000]))
+        batch.push_many(self.values[5000:10_000] + [None, float("nan")])
+        batch.push_many(i for i in self.values[10_000:])
+        self.assertEqual(batch.observations, expected.observations)
+        self.assertEqual(batch.min, expected.min)
+        self.assertEqual(batch.max, expected.max)
+        self.assertAlmostEqual(batch.mean, expected.mean, places)
+        self.assertAlmostEqual(batch.variance, expected.variance, 1)
+        return batch, expected
+
+    def test_accumulator(self):
+        batch, expected = self.check(Accumulator)
+        self.assertAlmostEqual(batch.median, expected.median, delta=0.1)
+
+    def test_buffer_accumulator(self):
+        batch, expected = self.check(BufferAccumulator)
+        self.assertEqual(batch.median, expected.median)
+        self.assertIsInstance(batch.max, float)
+
+    def test_moment_accumulator(self):
+        self.check(MomentAccumulator)
+
+    def test_buffer_merge(self):
+        a = BufferAccumulator(self.values[:100])
+        b = BufferAccumulator(iter(self.values[100:]))
+        c = a + b
+        self.assertEqual(c.observations, len(self.values))
+        self.assertEqual(a.observations, 100)
+        self.assertEqual(c.median, BufferAccumulator(self.values).median)
+        d = pickle.loads(pickle.dumps(c))
+        self.assertEqual(d.as_map(), c.as_map())
+
+    def test_buffer_retained(self):
+        """values can be pushed while buffer_ is held"""
+        a = BufferAccumulator([1, 2])
+        values = a.buffer_
+        a.push(3)
+        a.push_many([4, 5])
+        self.assertEqual(values.tolist(), [1.0, 2.0])
+        self.assertEqual(a.buffer_.tolist(), [1.0, 2.0, 3.0, 4.0, 5.0])
+
+    def test_buffer_numpy(self):
+        """initialise from a numpy array"""
+        a = BufferAccumulator(np.array([1.0, 2.0]))
+        self.assertEqual(a.buffer_.tolist(), [1.0, 2.0])
+        self.assertEqual(BufferAccumulator(np.array([])).observations, 0)
+
+    def test_buffer_empty(self):
+        """empty accumulator"""
+        a = BufferAccumulator()
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertEqual((a.mean, a.stdev, a.variance, a.sum), (0.0, 0.0, 0, 0))
+        with self.assertRaises(ValueError):
+            a.min
+        with self.assertRaises(IndexError):
+            a.median
+
+
+class TestSketchAccumulators(unittest.TestCase):
+
+    def test_distinct(self):
+        a = DistinctAccumulator(i % 500 for i in range(5000))
+        b = DistinctAccumulator(i for i in range(250, 1000))
+        self.assertAlmostEqual(a.distinct, 500, delta=10)
+        self.assertAlmostEqual((a + b).distinct, 1000, delta=20)
+        self.assertEqual((a + b).observations, 5750)
+
+    def test_top_k(self):
+        values = ["a"] * 50 + ["b"] * 30 + [str(i) for i in range(200)]
+        a = TopKAccumulator(values[::2], capacity=20)
+        b = TopKAccumulator(values[1::2], capacity=20)
+        self.assertEqual([v for v, _ in (a + b).top(2)], ["a", "b"])
+        c = pickle.loads(pickle.dumps(a))
+        self.assertEqual(c.top(3), a.top(3))
+
+
+class TestLightweightAccumulators(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.values = [random.random() * 100 for i in range(5000)] + [None]
+        cls.reference = Accumulator(cls.values)
+
+    def test_count(self):
+        """count observations and ignore None"""
+        a = CountAccumulator(self.values + ["text"])
+        self.assertEqual(a.observations, self.reference.observations + 1)
+
+    def test_sum(self):
+        """sum, min and max"""
+        a = SumAccumulator(self.values)
+        self.assertEqual(a.observations, self.reference.observations)
+        self.assertAlmostEqual(a.sum, self.reference.sum, 3)
+        self.assertEqual(a.min, self.reference.min)
+        self.assertEqual(a.max, self.reference.max)
+
+    def test_moments(self):
+        """mean, variance and standard deviation"""
+        a = MomentAccumulator(self.values)
+        self.assertAlmostEqual(a.mean, self.reference.mean, 5)
+        self.assertAlmostEqual(a.variance, self.reference.variance, 4)
+        self.assertAlmostEqual(a.stdev, self.reference.stdev, 5)
+
+    def test_merge_summary(self):
+        """merge summaries of partitions"""
+        a = MomentAccumulator(self.values[:1000])
+        part = [v for v in self.values[1000:] if v is not None]
+        mean = np.mean(part)
+        a.merge_summary(
+            len(part), sum(part), min(part), max(part),
+            sum((v - mean) ** 2 for v in part)
+        )
+        self.assertEqual(a.observations, self.reference.observations)
+        self.assertAlmostEqual(a.mean, self.reference.mean, 5)
+        self.assertAlmostEqual(a.variance, self.reference.variance, 4)
+        self.assertEqual(a.min, self.reference.min)
+        self.assertEqual(a.max, self.reference.max)
+
+    def test_merge(self):
+        """merge lightweight accumulators"""
+        for cls in (CountAccumulator, SumAccumulator, MomentAccumulator):
+            a = cls(self.values[:2000]) + cls(self.values[2000:])
+            self.assertEqual(a.observations, self.reference.observations)
+        a = MomentAccumulator(self.values[:2000]) + MomentAccumulator(self.values[2000:])
+        self.assertAlmostEqual(a.variance, self.reference.variance, 4)
+        self.assertAlmostEqual(a.sum, self.reference.sum, 3)
+
+    def test_empty(self):
+        """empty accumulators"""
+        self.assertEqual(MomentAccumulator().mean, 0.0)
+        self.assertEqual(MomentAccumulator().variance, 0)
+        self.assertEqual(SumAccumulator().sum, 0.0)
+
 
 if __name__ == "__main__":
     unittest.main()
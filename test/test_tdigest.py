@@ -0,0 +1,103 @@
+#
+# Copyright (C) 2026  Cobus Nel
+#
+# This library is free software; you can redistribute it and/or
+# modify it under the terms of the GNU Lesser General Public
+# License as published by the Free Software Foundation; either
+# version 2.1 of the License, or (at your option) any later version.
+#
+# This library is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+# Lesser General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this library; if not, write to the Free Software
+# Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston, MA  02110-1301  USA
+#
+"""
+test dkit.algorithms.probabilistic
+
+=========== =============== =================================================
+19 Oct 2026 Cobus Nel       Created
+=========== =============== =================================================
+"""
+import pickle
+import random
+import sys; sys.path.insert(0, "..")  # noqa
+import unittest
+from array import array
+
+import numpy as np
+
+from dkit.algorithms import tdigest
+from dkit.algorithms.tdigest import TDigest
+
+
+class TestTDigest(unittest.TestCase):
+
+    def setUp(self):
+        rnd = random.Random(4)
+        self.data = [rnd.gauss(10, 2) for _ in range(20_000)]
+        self.digest = TDigest()
+        for value in self.data:
+            self.digest.insert(value)
+
+    def assertSameDigest(self, a, b):
+        self.assertEqual(a.weight, b.weight)
+        for q in [0.0, 0.01, 0.25, 0.5, 0.75, 0.99, 1.0]:
+            self.assertEqual(a.quantile(q), b.quantile(q))
+
+    def test_insert_many(self):
+        """insert_many is equivalent to insert"""
+        for values in [np.array(self.data), array("d", self.data), self.data]:
+            digest = TDigest()
+            digest.insert_many(values)
+            self.assertSameDigest(digest, self.digest)
+
+    def test_insert_many_nan(self):
+        digest = TDigest()
+        digest.insert_many(np.array(self.data + [float("nan")], dtype=np.float32))
+        self.assertEqual(digest.weight, len(self.data))
+
+    def check_add_many(self, add_many):
+        values = np.array(self.data[:1000] + [float("nan")])
+        weights = np.arange(1, len(values) + 1)
+        for w in [None, weights]:
+            digest, expected = TDigest(), TDigest()
+            add_many(digest._struct, values, w, len(values))
+            for value, weight in zip(values[:-1], weights if w is not None else [1] * 1000):
+                expected.insert(value, int(weight))
+            self.assertSameDigest(digest, expected)
+
+    @unittest.skipUnless(tdigest.HAS_ADD_MANY, "compiled library predate tdigest_add_many")
+    def test_add_many_c(self):
+        """insert_many use tdigest_add_many from the compiled library"""
+        self.assertIs(tdigest._add_many, tdigest._add_many_c)
+        self.check_add_many(tdigest._add_many_c)
+
+    def test_add_many_python(self):
+        self.check_add_many(tdigest._add_many_python)
+
+    def test_weights(self):
+        digest = TDigest()
+        digest.insert_many([1.0, 2.0], np.array([3, 1]))
+        self.assertEqual(digest.weight, 4)
+        with self.assertRaises(ValueError):
+            digest.insert_many([1.0, 2.0], [1])
+        with self.assertRaises(ValueError):
+            digest.insert_many([1.0], [0])
+
+    def test_bytes(self):
+        data = self.digest.to_bytes()
+        self.assertLess(len(data), 16 * (self.digest.centroid_count + 2))
+        self.assertSameDigest(TDigest.from_bytes(data), self.digest)
+        with self.assertRaises(ValueError):
+            TDigest.from_bytes(b"XXXX" + data[4:])
+
+    def test_pickle(self):
+        self.assertSameDigest(pickle.loads(pickle.dumps(self.digest)), self.digest)
+
+
+if __name__ == '__main__':
+    unittest.main()